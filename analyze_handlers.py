@@ -1,31 +1,22 @@
-import xml.etree.ElementTree as ET
 import re
+import sys
 
-tree = ET.parse('LuminariGUI.xml')
-root = tree.getroot()
+from package_model import load_package_model
 
-# Find all Script elements with their names
-def find_script_name(elem):
-    # Look for name element in Script
-    if elem.tag == 'Script':
-        name_elem = elem.find('name')
-        if name_elem is not None and name_elem.text:
-            return name_elem.text
-    return None
+# Reuses the cached script index, so repeated runs skip XML parsing
+errors = []
+model = load_package_model('LuminariGUI.xml', errors, use_cache='--no-cache' not in sys.argv)
+if model is None:
+    for error in errors:
+        print(f"Error: {error}")
+    sys.exit(1)
 
 # Analyze each script
 results = {}
 
-for script_elem in root.iter('Script'):
-    script_name = find_script_name(script_elem)
-    if not script_name:
-        continue
-    
-    script_text_elem = script_elem.find('script')
-    if script_text_elem is None or not script_text_elem.text:
-        continue
-    
-    script_text = script_text_elem.text
+for script in model.iter_scripts('Script'):
+    script_name = script['name']
+    script_text = script['content']
     
     # Count handlers and timers
     handler_creates = len(re.findall(r'registerAnonymousEventHandler\s*\(', script_text))
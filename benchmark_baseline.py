@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Benchmark Baselines for LuminariGUI
+Stores the benchmark summaries of a run so later runs can be compared with
+it, failing when a median regressed beyond a percentage and beyond the noise.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+
+from disk_cache import DEFAULT_CACHE_DIR
+from test_history import current_commit
+
+DEFAULT_DIFF_FILE = os.path.join(DEFAULT_CACHE_DIR, "benchmark_diff.json")
+
+# Bump whenever the file layout changes; older baselines are refused
+BASELINE_FORMAT = 2
+
+# Runs of the benchmarks a baseline is saved from; their spread is the run-to-run noise
+DEFAULT_BASELINE_RUNS = 5
+
+# Slowdown of a median, in percent, that fails the comparison
+DEFAULT_MAX_REGRESSION = 10.0
+
+# Summary fields kept per benchmark
+BASELINE_FIELDS = ('samples', 'median', 'median_ci', 'p95', 'p95_ci', 'mad', 'confidence', 'resolution')
+
+
+def noise_band(baseline):
+    """Return the (low, high) medians a run of the baseline's code can plausibly give.
+
+    Timings move between runs far more than within one (calibrated run
+    counts, heap and cache state, other load), so the band is the range
+    of the baseline's own run medians, and at least the confidence
+    interval of its median. It is not widened any further: a run whose
+    median's interval clears the slowest baseline run is slower than
+    anything the baseline's code gave.
+    """
+    run_medians = baseline.get('run_medians') or [baseline['median']]
+    return (min(min(run_medians), baseline['median_ci'][0]),
+            max(max(run_medians), baseline['median_ci'][1]))
+
+
+def compare_summaries(baseline, current, max_regression=DEFAULT_MAX_REGRESSION):
+    """Compare one benchmark's summary with its baseline; return a diff entry.
+
+    The status is 'regressed' when the median is more than max_regression
+    percent slower and its confidence interval lies wholly above the
+    baseline's noise band (see noise_band), 'improved' for the mirror
+    case, 'noise' when the change exceeds max_regression but stays
+    within the band, and 'unchanged' otherwise. The band is widened by a
+    timer tick: a benchmark near the timer's resolution moves by whole
+    ticks between runs.
+    """
+    margin = max(baseline.get('resolution', 0.0), current.get('resolution', 0.0))
+    low, high = noise_band(baseline)
+    change = None
+    if baseline['median'] > 0:
+        change = (current['median'] - baseline['median']) / baseline['median'] * 100
+    status = 'unchanged'
+    if change is not None and abs(change) > max_regression:
+        if change > 0 and current['median_ci'][0] > high + margin:
+            status = 'regressed'
+        elif change < 0 and current['median_ci'][1] < low - margin:
+            status = 'improved'
+        else:
+            status = 'noise'
+    return {
+        'status': status,
+        'baseline_median': baseline['median'],
+        'baseline_ci': list(baseline['median_ci']),
+        'noise_band': [low, high],
+        'baseline_runs': len(baseline.get('run_medians') or [baseline['median']]),
+        'median': current['median'],
+        'median_ci': list(current['median_ci']),
+        'change_percent': change
+    }
+
+
+class BenchmarkBaseline:
+    def __init__(self, baseline_file):
+        self.baseline_file = baseline_file
+        # benchmark name -> summary fields (see BASELINE_FIELDS) and 'run_medians'
+        self.benchmarks = {}
+        self.mode = None
+        self.commit = None
+        self.platform = None
+        self.errors = []
+
+    def load(self):
+        """Load the baseline file; return False if it is missing or unusable."""
+        try:
+            with open(self.baseline_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self.errors.append(f"No benchmark baseline at {self.baseline_file}; create one with --save-baseline")
+            return False
+        except (OSError, ValueError) as e:
+            self.errors.append(f"Could not read baseline {self.baseline_file}: {e}")
+            return False
+
+        if not isinstance(data, dict) or data.get('format') != BASELINE_FORMAT:
+            self.errors.append(f"Baseline {self.baseline_file} uses another format; save it again with --save-baseline")
+            return False
+
+        self.benchmarks = data.get('benchmarks', {})
+        self.mode = data.get('mode')
+        self.commit = data.get('commit')
+        self.platform = data.get('platform')
+        return True
+
+    def save(self, benchmark_runs, mode):
+        """Replace the baseline with repeated runs of the same code, each a dict of name -> summary.
+
+        Each benchmark keeps the summary of its middle run by median, and
+        the medians of all its runs as 'run_medians', whose spread is the
+        noise later comparisons allow for.
+        """
+        commit, dirty = current_commit()
+        self.benchmarks = {}
+        for name in sorted(set().union(*benchmark_runs)):
+            summaries = [run[name] for run in benchmark_runs if name in run]
+            middle = sorted(summaries, key=lambda summary: summary['median'])[(len(summaries) - 1) // 2]
+            self.benchmarks[name] = {field: middle[field] for field in BASELINE_FIELDS}
+            self.benchmarks[name]['run_medians'] = [summary['median'] for summary in summaries]
+        self.mode = mode
+        self.commit = commit if commit is None or not dirty else f"{commit}+"
+        self.platform = platform.platform()
+        directory = os.path.dirname(self.baseline_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.baseline_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': BASELINE_FORMAT,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'commit': self.commit,
+                'platform': self.platform,
+                'mode': self.mode,
+                'benchmarks': self.benchmarks
+            }, f, indent=2)
+            f.write('\n')
+
+    def compare(self, benchmark_results, mode, max_regression=DEFAULT_MAX_REGRESSION, commit=None,
+                platform_name=None, skipped=None):
+        """Diff benchmark summaries (name -> summary) against the loaded baseline.
+
+        Returns the diff document: every benchmark of either run with its
+        status ('new' and 'missing' for benchmarks only one run has), the
+        names that regressed and those missing from this run, and
+        'passed', which is False when there are any of either or when the
+        runs used different benchmark modes. commit and
+        platform_name describe the compared run and default to the
+        working tree and this machine. skipped maps the benchmarks the run
+        skipped to why; a missing benchmark that was skipped says so.
+        """
+        benchmarks = {}
+        for name in sorted(set(self.benchmarks) | set(benchmark_results)):
+            if name not in benchmark_results:
+                benchmarks[name] = {'status': 'missing', 'baseline_median': self.benchmarks[name]['median']}
+                if skipped and name in skipped:
+                    benchmarks[name]['skipped'] = skipped[name]
+            elif name not in self.benchmarks:
+                benchmarks[name] = {'status': 'new', 'median': benchmark_results[name]['median']}
+            else:
+                benchmarks[name] = compare_summaries(self.benchmarks[name], benchmark_results[name], max_regression)
+
+        regressions = [name for name, entry in benchmarks.items() if entry['status'] == 'regressed']
+        missing = [name for name, entry in benchmarks.items() if entry['status'] == 'missing']
+        if commit is None:
+            commit, dirty = current_commit()
+            if commit is not None and dirty:
+                commit = f"{commit}+"
+        return {
+            'format': BASELINE_FORMAT,
+            'baseline_file': self.baseline_file,
+            'baseline_commit': self.commit,
+            'commit': commit,
+            'baseline_mode': self.mode,
+            'mode': mode,
+            'same_platform': self.platform == (platform_name or platform.platform()),
+            'max_regression_percent': max_regression,
+            'passed': not regressions and not missing and self.mode == mode,
+            'regressions': regressions,
+            'missing': missing,
+            'benchmarks': benchmarks
+        }
+
+
+def format_diff(diff):
+    """Return the display lines for a diff document."""
+    lines = [f"Benchmarks compared with {diff['baseline_file']} "
+             f"(commit {diff['baseline_commit'] or 'unknown'}, fail above +{diff['max_regression_percent']:g}%):"]
+    if diff['mode'] != diff['baseline_mode']:
+        lines.append(f"  Baseline was saved in {diff['baseline_mode']} mode, this run is {diff['mode']}; "
+                     f"save a {diff['mode']} baseline to compare")
+    if not diff['same_platform']:
+        lines.append("  Note: the baseline was saved on another platform; timings may not be comparable")
+    for name, entry in diff['benchmarks'].items():
+        if entry['status'] == 'missing' and 'skipped' in entry:
+            lines.append(f"  ✗ {name}: skipped in this run, {entry['skipped']} "
+                         f"(baseline median {entry['baseline_median']:.4f}ms)")
+        elif entry['status'] == 'missing':
+            lines.append(f"  ✗ {name}: not benchmarked in this run (baseline median {entry['baseline_median']:.4f}ms)")
+        elif entry['status'] == 'new':
+            lines.append(f"  + {name}: {entry['median']:.4f}ms (not in the baseline)")
+        else:
+            marker = {'regressed': '✗', 'improved': '✓', 'noise': '~'}.get(entry['status'], ' ')
+            change = 'n/a' if entry['change_percent'] is None else f"{entry['change_percent']:+.1f}%"
+            lines.append(f"  {marker} {name}: {entry['baseline_median']:.4f}ms -> {entry['median']:.4f}ms "
+                         f"({change}, {entry['status']}; noise {entry['noise_band'][0]:.4f}-"
+                         f"{entry['noise_band'][1]:.4f}ms over {entry['baseline_runs']} runs)")
+    if diff['regressions']:
+        lines.append(f"Regressed beyond the noise: {', '.join(diff['regressions'])}")
+    if diff['missing']:
+        lines.append(f"In the baseline but not benchmarked: {', '.join(diff['missing'])}")
+    return lines
+
+
+def write_diff(diff, diff_file=DEFAULT_DIFF_FILE):
+    """Write a diff document as JSON."""
+    directory = os.path.dirname(diff_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(diff_file, 'w', encoding='utf-8') as f:
+        json.dump(diff, f, indent=2)
+        f.write('\n')
+
+
+def compare_with_baseline(benchmark_results, mode, baseline_file, max_regression=DEFAULT_MAX_REGRESSION,
+                          diff_file=DEFAULT_DIFF_FILE, commit=None, platform_name=None, skipped=None):
+    """Compare a run with a baseline file, print the diff and write it to diff_file.
+
+    Returns False when the baseline cannot be used or the gate fails.
+    """
+    baseline = BenchmarkBaseline(baseline_file)
+    if not baseline.load():
+        for error in baseline.errors:
+            print(f"Error: {error}")
+        return False
+    diff = baseline.compare(benchmark_results, mode, max_regression, commit, platform_name, skipped)
+    print('\n'.join(format_diff(diff)))
+    try:
+        write_diff(diff, diff_file)
+        print(f"Benchmark diff saved to: {diff_file}")
+    except OSError as e:
+        print(f"Warning: could not write the benchmark diff to {diff_file}: {e}")
+    return diff['passed']
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare two benchmark baselines saved with --save-baseline')
+    parser.add_argument('baseline', help='Baseline to compare against')
+    parser.add_argument('current', help='Baseline of the run to check')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                        help='Slowdown of a median, in percent, that fails the comparison (default: %(default)s)')
+    parser.add_argument('--diff', default=DEFAULT_DIFF_FILE, help='Where to write the diff document (default: %(default)s)')
+
+    args = parser.parse_args()
+
+    current = BenchmarkBaseline(args.current)
+    if not current.load():
+        for error in current.errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+    passed = compare_with_baseline(current.benchmarks, current.mode, args.baseline, args.max_regression, args.diff,
+                                   current.commit, current.platform)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
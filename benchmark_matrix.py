@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Cross-Interpreter Benchmarks for LuminariGUI
+Runs the same benchmarks on every Lua interpreter found on PATH (Lua 5.1 to
+5.4, LuaJIT), side by side with speedups, and flags the cases that only
+fail, or are skipped, on some of them.
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from test_performance import (PerformanceTester, LUA_INTERPRETERS, DEFAULT_WARMUP_TIME, DEFAULT_TARGET_TIME,
+                              MIN_RUNS)
+
+# Prints the runtime an interpreter implements; LuaJIT reports "Lua 5.1" as _VERSION
+VERSION_SOURCE = 'print(type(jit) == "table" and jit.version or _VERSION)\n'
+
+# Stand-in warnings are compared by their location, as interpreters word the same error differently
+WARNING_LOCATION = re.compile(r'^(.*?\(\S+:\d+\))')
+
+
+def interpreter_version(path, timeout=10):
+    """Return the runtime an interpreter reports, e.g. 'Lua 5.4' or 'LuaJIT 2.1.0-beta3', or None."""
+    with tempfile.TemporaryDirectory(prefix='luminari_matrix_') as tmp_dir:
+        script = os.path.join(tmp_dir, 'version.lua')
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write(VERSION_SOURCE)
+        try:
+            result = subprocess.run([path, script], capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        return None
+    return lines[-1]
+
+
+def find_interpreters(names=LUA_INTERPRETERS):
+    """Return each distinct Lua interpreter on PATH as {'name', 'path', 'version'}.
+
+    Names are tried in order; one reporting a runtime already found (lua
+    is often lua5.1 under another name) is skipped, so the first entry is
+    the interpreter the benchmarks use by default. Interpreters are told
+    apart by what they report rather than by their resolved path, as a
+    single launcher may pick the runtime from the name it is called by.
+    """
+    interpreters = []
+    seen_versions = set()
+    for name in names:
+        path = shutil.which(name)
+        if path is None:
+            continue
+        version = interpreter_version(path)
+        if version is None or version in seen_versions:
+            continue
+        seen_versions.add(version)
+        interpreters.append({'name': name, 'path': path, 'version': version})
+    return interpreters
+
+
+def _warning_key(warning):
+    match = WARNING_LOCATION.match(warning)
+    return match.group(1) if match else warning
+
+
+class BenchmarkMatrix:
+    def __init__(self, xml_file="LuminariGUI.xml", interpreters=None, handlers=False, use_cache=True,
+                 workers=None, reference=None, **tester_options):
+        self.xml_file = xml_file
+        # Interpreters as returned by find_interpreters
+        self.interpreters = find_interpreters() if interpreters is None else interpreters
+        self.handlers = handlers
+        self.use_cache = use_cache
+        self.workers = workers or min(len(self.interpreters), os.cpu_count() or 1) or 1
+        # Speedups are relative to this interpreter's medians; the default one unless named
+        self.reference = reference or (self.interpreters[0]['name'] if self.interpreters else None)
+        # Passed on to each PerformanceTester (iterations, warmup_time, target_time, thresholds...)
+        self.tester_options = tester_options
+        # Interpreter name -> {'benchmarks', 'failures', 'aborted', 'over', 'skipped', 'warnings', 'errors'}
+        self.results = {}
+        self.errors = []
+
+    def _run_interpreter(self, interpreter, model):
+        tester = PerformanceTester(self.xml_file, model=model, use_cache=self.use_cache, handlers=self.handlers,
+                                   lua_path=interpreter['path'], **self.tester_options)
+        # Lua errors are compared across interpreters; timeouts and worker crashes are kept apart,
+        # as are benchmarks that ran but went over a threshold (calibrated on Lua 5.1)
+        failures = {}
+        aborted = {}
+        over = {}
+        for test_case in tester.selected_cases():
+            outcome = tester.run_test_case(test_case)
+            if outcome['failed']:
+                if test_case['name'] in tester.aborted:
+                    found = aborted
+                elif test_case['name'] in tester.benchmark_results:
+                    found = over
+                else:
+                    found = failures
+                found[test_case['name']] = tester.test_results[-1]['message']
+        tester.close_pool()
+        return {
+            'version': interpreter['version'],
+            'path': interpreter['path'],
+            'benchmarks': tester.benchmark_results,
+            'failures': failures,
+            'aborted': aborted,
+            'over': over,
+            'skipped': dict(tester.skipped),
+            'warnings': [warning for warning in tester.warnings if warning.startswith('Mudlet stand-in: ')],
+            'errors': tester.errors
+        }
+
+    def run(self):
+        """Benchmark every interpreter, each in its own worker pool.
+
+        Returns False if any case failed, timed out or crashed its worker,
+        or was skipped on some interpreters but not all: a handler that
+        raises only on one runtime is as much a portability bug as a
+        failure. A benchmark that only went over a threshold does not fail
+        the matrix, as the thresholds are calibrated on Lua 5.1.
+        """
+        if not self.interpreters:
+            self.errors.append("No Lua interpreter found in PATH")
+            return False
+        if self.reference not in {interpreter['name'] for interpreter in self.interpreters}:
+            self.errors.append(f"Reference interpreter {self.reference} was not found")
+            return False
+
+        # Parse the package once; the testers only read the model
+        model = PerformanceTester(self.xml_file, use_cache=self.use_cache).get_model()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            runs = executor.map(lambda interpreter: self._run_interpreter(interpreter, model), self.interpreters)
+            self.results = {interpreter['name']: result for interpreter, result in zip(self.interpreters, runs)}
+        if any(result['failures'] or result['aborted'] or result['errors'] for result in self.results.values()):
+            return False
+        return not any(entry.get('skipped') for entry in self.interpreter_specific())
+
+    def case_names(self):
+        names = []
+        for result in self.results.values():
+            for name in (list(result['benchmarks']) + list(result['failures']) + list(result['aborted'])
+                         + list(result['skipped'])):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def speedup(self, interpreter_name, case_name):
+        """Return the reference median over the interpreter's, or None when either is missing."""
+        reference = self.results.get(self.reference, {}).get('benchmarks', {}).get(case_name)
+        result = self.results[interpreter_name]['benchmarks'].get(case_name)
+        if reference is None or result is None or result['median'] <= 0:
+            return None
+        return reference['median'] / result['median']
+
+    def interpreter_specific(self):
+        """Return the failures, skips and stand-in warnings seen on some interpreters but not all.
+
+        Each entry names the case or warning, the interpreters it occurs
+        on and their messages; a skipped case's entry has 'skipped' set.
+        Timeouts and worker crashes are limits of the run, not of the
+        package on an interpreter, and are not flagged here.
+        """
+        names = list(self.results)
+        flagged = []
+        for case_name in self.case_names():
+            failing = [name for name in names if case_name in self.results[name]['failures']]
+            if failing and len(failing) < len(names):
+                flagged.append({'case': case_name, 'interpreters': failing,
+                                'messages': [self.results[name]['failures'][case_name] for name in failing]})
+            skipping = [name for name in names if case_name in self.results[name]['skipped']]
+            if skipping and len(skipping) < len(names):
+                flagged.append({'case': case_name, 'interpreters': skipping, 'skipped': True,
+                                'messages': [self.results[name]['skipped'][case_name] for name in skipping]})
+        warnings = {}
+        for name in names:
+            for warning in self.results[name]['warnings']:
+                warnings.setdefault(_warning_key(warning), {})[name] = warning
+        for key, by_interpreter in warnings.items():
+            if len(by_interpreter) < len(names):
+                flagged.append({'warning': key, 'interpreters': list(by_interpreter),
+                                'messages': list(by_interpreter.values())})
+        return flagged
+
+    def format_table(self):
+        """Return the display lines of the side-by-side medians with speedups over the reference."""
+        names = list(self.results)
+        cells = {}
+        for case_name in self.case_names():
+            row = []
+            for name in names:
+                result = self.results[name]
+                if case_name in result['failures']:
+                    row.append('FAILED')
+                elif case_name in result['aborted']:
+                    row.append('TIMEOUT' if result['aborted'][case_name] == 'Timeout' else 'CRASHED')
+                elif case_name in result['skipped']:
+                    row.append('SKIPPED')
+                elif case_name not in result['benchmarks']:
+                    row.append('-')
+                else:
+                    cell = f"{result['benchmarks'][case_name]['median']:.4f}ms"
+                    speedup = self.speedup(name, case_name)
+                    if name != self.reference and speedup is not None:
+                        cell += f" {speedup:.2f}x"
+                    if case_name in result['over']:
+                        cell += " OVER"
+                    row.append(cell)
+            cells[case_name] = row
+        headers = [f"{name} ({self.results[name]['version']})" for name in names]
+        first = max([len('Benchmark')] + [len(case_name) for case_name in cells])
+        widths = [max([len(header)] + [len(row[i]) for row in cells.values()]) for i, header in enumerate(headers)]
+        lines = ['  '.join(['Benchmark'.ljust(first)] + [header.rjust(width) for header, width in zip(headers, widths)])]
+        for case_name, row in cells.items():
+            lines.append('  '.join([case_name.ljust(first)] + [cell.rjust(width) for cell, width in zip(row, widths)]))
+        lines.append(f"Speedups are {self.reference}'s median over each interpreter's (above 1 is faster)")
+        if any(result['over'] for result in self.results.values()):
+            lines.append("OVER marks a benchmark above one of its thresholds")
+        return lines
+
+    def get_results(self):
+        return {
+            'mode': 'handlers' if self.handlers else 'synthetic',
+            'reference': self.reference,
+            'interpreters': self.results,
+            'interpreter_specific': self.interpreter_specific(),
+            'errors': self.errors
+        }
+
+
+def run_matrix(matrix):
+    """Run a BenchmarkMatrix and print its table and findings; return whether it passed."""
+    if matrix.interpreters:
+        print("Running benchmarks on: " + ", ".join(f"{interpreter['name']} ({interpreter['version']})"
+                                                    for interpreter in matrix.interpreters))
+    success = matrix.run()
+    if matrix.errors:
+        for error in matrix.errors:
+            print(f"Error: {error}")
+        return False
+
+    print("")
+    for line in matrix.format_table():
+        print(line)
+
+    flagged = matrix.interpreter_specific()
+    if flagged:
+        print("\nInterpreter-specific failures:")
+        for entry in flagged:
+            where = 'skipped only on' if entry.get('skipped') else 'only on'
+            print(f"  {entry.get('case') or entry['warning']}: {where} {', '.join(entry['interpreters'])}")
+            for message in entry['messages']:
+                print(f"    {message}")
+    aborted = [(name, case_name, message) for name, result in matrix.results.items()
+               for case_name, message in result['aborted'].items()]
+    if aborted:
+        print("\nTimed out or crashed the worker (not compared across interpreters):")
+        for name, case_name, message in aborted:
+            print(f"  {case_name} on {name}: {message}")
+    over = [(name, case_name, message) for name, result in matrix.results.items()
+            for case_name, message in result['over'].items()]
+    if over:
+        print("\nAbove thresholds calibrated on Lua 5.1 (not compared across interpreters):")
+        for name, case_name, message in over:
+            print(f"  {case_name} on {name}: {message}")
+    for name, result in matrix.results.items():
+        for error in result['errors']:
+            print(f"Error ({name}): {error}")
+    return success
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the benchmarks on every Lua interpreter found and compare them')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to benchmark')
+    parser.add_argument('--handlers', action='store_true',
+                        help="Benchmark the package's real handlers in the Mudlet stand-in instead of the synthetic loops")
+    parser.add_argument('--interpreters', help='Comma-separated interpreter names to try (default: '
+                        + ','.join(LUA_INTERPRETERS) + ')')
+    parser.add_argument('--reference', help='Interpreter the speedups are relative to (default: the first found)')
+    parser.add_argument('--workers', type=int, help='Interpreters benchmarked at once (default: one per CPU)')
+    parser.add_argument('--iterations', type=int, default=MIN_RUNS,
+                        help='Minimum measured runs of each benchmark body (default: %(default)s)')
+    parser.add_argument('--warmup', type=float, default=DEFAULT_WARMUP_TIME,
+                        help='Seconds to warm up each benchmark before measuring (default: %(default)s)')
+    parser.add_argument('--target-time', type=float, default=DEFAULT_TARGET_TIME,
+                        help='Seconds of measured runs each benchmark is calibrated to (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--json', action='store_true', help='Output the matrix in JSON format')
+
+    args = parser.parse_args()
+
+    names = LUA_INTERPRETERS if not args.interpreters else [name.strip() for name in args.interpreters.split(',')]
+    matrix = BenchmarkMatrix(args.xml, find_interpreters(names), handlers=args.handlers, use_cache=not args.no_cache,
+                             workers=args.workers, reference=args.reference, iterations=args.iterations,
+                             warmup_time=args.warmup, target_time=args.target_time)
+    if args.json:
+        success = matrix.run()
+        print(json.dumps(matrix.get_results(), indent=2))
+    else:
+        success = run_matrix(matrix)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
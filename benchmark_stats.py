@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark Statistics for LuminariGUI
+Robust summaries of benchmark timings: median, 95th percentile and median
+absolute deviation, with bootstrap confidence intervals for both percentiles.
+"""
+
+import sys
+import json
+import math
+import random
+import statistics
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 1000
+
+# Fixed so the same samples always give the same intervals
+BOOTSTRAP_SEED = 0
+
+
+def percentile(sorted_values, q):
+    """Return the q-th percentile (0-100) of sorted values, interpolating linearly."""
+    if not sorted_values:
+        raise ValueError("percentile of no values")
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    fraction = position - lower
+    return sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+
+
+def median_absolute_deviation(values, center=None):
+    """Return the median distance of values from center (their median by default)."""
+    if center is None:
+        center = statistics.median(values)
+    return statistics.median(abs(value - center) for value in values)
+
+
+def bootstrap_intervals(sorted_samples, quantiles, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES,
+                        seed=BOOTSTRAP_SEED):
+    """Return {q: (low, high)} percentile-bootstrap confidence intervals for each percentile q.
+
+    A percentile of a resample (n draws with replacement) only depends on
+    one or two of its order statistics. The k-th smallest of n uniform
+    draws follows Beta(k, n - k + 1), and the next one lies above it like
+    the smallest of the remaining n - k, so both are drawn directly and
+    mapped onto the sorted samples. That is the same distribution as
+    sorting real resamples, at constant cost per resample.
+    """
+    rng = random.Random(seed)
+    count = len(sorted_samples)
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    for q in quantiles:
+        position = (count - 1) * q / 100.0
+        lower = math.floor(position)
+        fraction = position - lower
+        estimates = []
+        for _ in range(resamples):
+            u = rng.betavariate(lower + 1, count - lower)
+            value = sorted_samples[min(count - 1, int(u * count))]
+            if fraction and lower + 1 < count:
+                u_next = u + (1 - u) * rng.betavariate(1, count - lower - 1)
+                value += (sorted_samples[min(count - 1, int(u_next * count))] - value) * fraction
+            estimates.append(value)
+        estimates.sort()
+        intervals[q] = (percentile(estimates, tail), percentile(estimates, 100 - tail))
+    return intervals
+
+
+def summarize(samples, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES):
+    """Summarize timing samples (milliseconds) as a dict of plain numbers.
+
+    Keys: samples, mean, min, max, median, p95, mad, confidence,
+    median_ci and p95_ci ([low, high]), and resolution: the smallest gap
+    between two distinct samples, an estimate of the timer's tick (0 when
+    all samples are equal). Returns None for no samples.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    median = percentile(ordered, 50)
+    intervals = bootstrap_intervals(ordered, (50, 95), confidence, resamples)
+    return {
+        'samples': len(ordered),
+        'mean': statistics.fmean(ordered),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'median': median,
+        'p95': percentile(ordered, 95),
+        'mad': median_absolute_deviation(ordered, median),
+        'confidence': confidence,
+        'median_ci': list(intervals[50]),
+        'p95_ci': list(intervals[95]),
+        'resolution': min((b - a for a, b in zip(ordered, ordered[1:]) if b > a), default=0.0)
+    }
+
+
+def format_summary(summary):
+    """Return the display lines for a summary, values in milliseconds."""
+    level = f"{summary['confidence']:.0%}"
+    return [
+        f"Median: {summary['median']:.4f}ms ({level} CI {summary['median_ci'][0]:.4f}-{summary['median_ci'][1]:.4f})",
+        f"P95: {summary['p95']:.4f}ms ({level} CI {summary['p95_ci'][0]:.4f}-{summary['p95_ci'][1]:.4f})",
+        f"MAD: {summary['mad']:.4f}ms",
+        f"Samples: {summary['samples']}"
+    ]
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summarize benchmark timings (one number in ms per line or whitespace separated)')
+    parser.add_argument('file', nargs='?', help='File of samples (default: stdin)')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help='Confidence level of the intervals (default: %(default)s)')
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help='Bootstrap resamples (default: %(default)s)')
+    parser.add_argument('--json', action='store_true', help='Output the summary as JSON')
+
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = sys.stdin.read()
+    try:
+        samples = [float(word) for word in text.split()]
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    summary = summarize(samples, args.confidence, args.resamples)
+    if summary is None:
+        print("No samples")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for line in format_summary(summary):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
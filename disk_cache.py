@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Disk Cache for LuminariGUI Tooling
+Size-bounded, content-addressed on-disk cache with LRU eviction.
+"""
+
+import os
+import pickle
+import tempfile
+
+# Default cache location, relative to the working directory like test_results.json
+DEFAULT_CACHE_DIR = os.environ.get('LUMINARI_CACHE_DIR', '.luminari_cache')
+
+ENTRY_SUFFIX = '.pickle'
+
+# Eviction frees the cache down to this fraction of max_bytes, so a full
+# cache is not scanned again on every write
+EVICT_TO = 0.9
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes=32 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Bytes of entries on disk: scanned on the first put, then kept up to date by
+        # put and evict, so a write only scans the directory when it may be over max_bytes
+        self._total = None
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or incompatible entry - drop it and treat as a miss
+            self._remove(path)
+            return None
+
+        # Refresh the access time so eviction keeps recently used entries
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store value under key and evict old entries once the cache exceeds max_bytes.
+
+        The size of the cache is tracked across writes rather than
+        re-scanned for each one; entries other processes add are counted
+        at the next scan, when this process's total first goes over.
+        """
+        path = self._entry_path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._total is None:
+                self._total = self._scan()[1]
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except OSError:
+            # A read-only or full disk must never break validation
+            return False
+
+        self._total += size - replaced
+        if self._total > self.max_bytes:
+            self.evict()
+        return True
+
+    def _scan(self):
+        """Return the (mtime, size, path) of every entry, oldest first, and their total size."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        return entries, total
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits EVICT_TO of max_bytes."""
+        try:
+            entries, total = self._scan()
+        except OSError:
+            return
+
+        for _, size, path in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            self._remove(path)
+            total -= size
+        self._total = total
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        self.max_bytes, saved = 0, self.max_bytes
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = saved
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+MSDP Event Storms for LuminariGUI
+Raises a configurable mix of MSDP events through the package's handlers in
+the Mudlet stand-in, as a fight sends them, and measures the sustained event
+rate, per-handler latencies and the backlog, finding the rate at which the
+GUI falls behind.
+"""
+
+import sys
+import json
+import random
+
+from benchmark_stats import percentile
+from mudlet_standin import lua_string
+from test_performance import PerformanceTester
+
+# Relative weights of the events a fight sends: every combat round updates
+# the vitals of both sides and the action economy, the group on each
+# member's change, affects less often
+DEFAULT_MIX = {
+    'msdp.HEALTH': 4,
+    'msdp.OPPONENT_HEALTH': 4,
+    'msdp.ACTIONS': 3,
+    'msdp.GROUP': 2,
+    'msdp.AFFECTS': 1
+}
+
+# Offered load in events per second, and events arriving together in a burst
+DEFAULT_RATE = 100.0
+DEFAULT_BURST = 4
+
+# Events timed per storm, after the untimed warmup ones
+DEFAULT_EVENTS = 5000
+WARMUP_EVENTS = 500
+
+# Latency, in milliseconds, from an event arriving to its handlers finishing
+# beyond which the GUI counts as fallen behind (99th percentile)
+DEFAULT_MAX_LATENCY = 100.0
+
+# Fixed so every storm raises the same sequence of events
+STORM_SEED = 0
+
+# Relative precision of the search for the highest sustainable rate
+SATURATION_PRECISION = 0.01
+
+
+def parse_mix(text):
+    """Parse 'msdp.HEALTH=4,msdp.ACTIONS=3' into {event: weight}; raise ValueError if malformed."""
+    mix = {}
+    for item in text.split(','):
+        event, separator, weight = item.strip().partition('=')
+        if not event or not separator:
+            raise ValueError(f"expected EVENT=WEIGHT, got {item.strip()!r}")
+        mix[event.strip()] = float(weight)
+        if mix[event.strip()] <= 0:
+            raise ValueError(f"weight of {event.strip()} must be positive")
+    return mix
+
+
+def event_sequence(mix, count, seed=STORM_SEED):
+    """Return count event names drawn from the mix by weight, the same for the same seed."""
+    events = sorted(mix)
+    return random.Random(seed).choices(events, weights=[mix[event] for event in events], k=count)
+
+
+def _percentiles(values):
+    ordered = sorted(values)
+    return {'p50': percentile(ordered, 50), 'p95': percentile(ordered, 95), 'p99': percentile(ordered, 99),
+            'max': ordered[-1]}
+
+
+def replay(services, rate, burst=DEFAULT_BURST, events=None):
+    """Replay measured handling times against arrivals at rate events per second.
+
+    Mudlet handles events one at a time on its main thread, so an event
+    starts when it arrives or when the one before it finishes, whichever
+    is later. Events arrive in bursts of `burst` at once, bursts evenly
+    spaced. services are the milliseconds each event took to handle, in
+    order; events optionally names them, adding latency percentiles per
+    event name. Returns the offered load (rate times the mean handling
+    time; 1 or more means the queue grows without bound), the achieved
+    throughput, latency percentiles in milliseconds, the backlog (events
+    waiting when one arrives) at its largest and when the last event
+    arrives, and the drain time after it.
+    """
+    spacing = 1000.0 * burst / rate
+    finish = 0.0
+    finishes = []
+    latencies = []
+    backlogs = []
+    done = 0
+    for index, service in enumerate(services):
+        arrival = (index // burst) * spacing
+        # Finish times never decrease, so the handled events are a prefix
+        while done < index and finishes[done] <= arrival:
+            done += 1
+        backlogs.append(index - done)
+        finish = max(arrival, finish) + service
+        finishes.append(finish)
+        latencies.append(finish - arrival)
+
+    last_arrival = ((len(services) - 1) // burst) * spacing
+    result = {
+        'rate': rate,
+        'burst': burst,
+        'events': len(services),
+        'load': rate * sum(services) / len(services) / 1000.0,
+        'throughput': len(services) * 1000.0 / finish if finish > 0 else 0.0,
+        'latency': _percentiles(latencies),
+        'backlog_max': max(backlogs),
+        'backlog_final': backlogs[-1],
+        'drain_ms': finish - last_arrival
+    }
+    if events is not None:
+        by_event = {}
+        for event, latency in zip(events, latencies):
+            by_event.setdefault(event, []).append(latency)
+        result['event_latency'] = {event: _percentiles(values) for event, values in sorted(by_event.items())}
+    return result
+
+
+def keeps_up(result, max_latency=DEFAULT_MAX_LATENCY):
+    """Whether a replay kept up: the queue drains between bursts and the p99 latency stays within max_latency."""
+    return result['load'] < 1.0 and result['latency']['p99'] <= max_latency
+
+
+def find_saturation(services, burst=DEFAULT_BURST, max_latency=DEFAULT_MAX_LATENCY,
+                    precision=SATURATION_PRECISION):
+    """Return the highest rate (events per second) the measured handling times keep up with.
+
+    Latency only grows with the rate, so the rate is bisected between 0
+    and the capacity (the rate at which the handlers are busy all the
+    time) to the given relative precision.
+    """
+    capacity = len(services) * 1000.0 / sum(services)
+    if keeps_up(replay(services, capacity * (1 - precision), burst), max_latency):
+        return capacity * (1 - precision)
+    low, high = 0.0, capacity
+    while high - low > capacity * precision:
+        middle = (low + high) / 2
+        if keeps_up(replay(services, middle, burst), max_latency):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+class EventStorm:
+    def __init__(self, xml_file="LuminariGUI.xml", mix=None, rate=DEFAULT_RATE, events=DEFAULT_EVENTS,
+                 burst=DEFAULT_BURST, max_latency=DEFAULT_MAX_LATENCY, seed=STORM_SEED, use_cache=True,
+                 lua_path=None, timeout=60):
+        self.xml_file = xml_file
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.rate = rate
+        self.events = events
+        self.burst = max(1, burst)
+        self.max_latency = max_latency
+        self.seed = seed
+        self.tester = PerformanceTester(xml_file, use_cache=use_cache, handlers=True, lua_path=lua_path,
+                                        timeout=timeout)
+        # Milliseconds each timed event took to handle, and its name
+        self.services = []
+        self.sequence = []
+        # Handler label ('msdp.HEALTH -> GUI.updateHealthGauge') -> milliseconds per call
+        self.handler_samples = {}
+        # Handler label -> (calls that raised, first error)
+        self.handler_errors = {}
+        self.result = None
+        self.saturation = None
+        self.errors = []
+        self.warnings = []
+
+    def _registrations_source(self, names):
+        """Lua registering the package's handlers of the named events from the hot-path catalog.
+
+        GUI.registerEventHandlers lives in a script that may not load in
+        the stand-in, so the handlers are registered as the catalog found
+        them: each as often as the package registers it.
+        """
+        registrations = []
+        for entry in self.tester.hot_path_catalog():
+            if entry['kind'] == 'event' and entry['event'] in names:
+                registrations.append('{' + ', '.join([
+                    lua_string(entry['event']),
+                    lua_string(entry['handler']) if entry['handler'] else 'nil',
+                    lua_string(entry['script']), str(entry['line']), str(len(entry['registrations']))
+                ]) + '}')
+        return f'''
+local registrations = {{{', '.join(registrations)}}}
+local handlers = {{}}
+for _, registration in ipairs(registrations) do
+    local event, name, script, line, count = registration[1], registration[2], registration[3], registration[4],
+                                             registration[5]
+    local handler = name and standin.resolve(name) or standin.registered(event, script, line)
+    if type(handler) ~= "function" then
+        print("Missing: " .. event .. " -> " .. (name or ("function at " .. script .. ":" .. line)))
+    else
+        handlers[event] = handlers[event] or {{}}
+        for _ = 1, count do table.insert(handlers[event], name or handler) end
+    end
+end
+for _, name in ipairs(names) do
+    standin.handlers[name] = {{}}
+    for _, handler in ipairs(handlers[name] or {{}}) do registerAnonymousEventHandler(name, handler) end
+end
+'''
+    
+    def _storm_source(self, sequence):
+        """Lua raising the events of sequence one at a time, timing every handler call."""
+        names = sorted(set(sequence))
+        indices = {name: index for index, name in enumerate(names, 1)}
+        return f'''
+local print = standin and standin.report or print
+local ok, err = pcall(function()
+{self.tester.entry_setup_source()}
+end)
+if not ok then
+    print("FAIL: " .. tostring(err))
+    return
+end
+
+local names = {{{', '.join(lua_string(name) for name in names)}}}
+local sequence = {{{','.join(str(indices[name]) for name in sequence)}}}
+{self._registrations_source(names)}local warmup = {WARMUP_EVENTS}
+-- The numeric MSDP variable an event announces changes with each event
+local bases = {{}}
+for i, name in ipairs(names) do
+    if name:sub(1, 5) == "msdp." then bases[i] = msdp[name:sub(6)] end
+end
+
+local labels, samples, failures, order = {{}}, {{}}, {{}}, {{}}
+local function label(event, entry)
+    local handler = entry.handler
+    if type(handler) == "function" then
+        local info = debug.getinfo(handler, "S")
+        return event .. " -> function at " .. (info.source:gsub("^[=@]", "")) .. ":" .. info.linedefined
+    end
+    return event .. " -> " .. tostring(handler)
+end
+
+-- Dispatch as raiseEvent does, an error in one handler not stopping the others
+local clock = os.clock
+local services = {{}}
+for n, i in ipairs(sequence) do
+    local event = names[i]
+    if type(bases[i]) == "number" then msdp[event:sub(6)] = bases[i] - n % 10 end
+    local started = clock()
+    for _, entry in ipairs(standin.handlers[event] or {{}}) do
+        local key = labels[entry]
+        if not key then
+            key = label(event, entry)
+            labels[entry] = key
+            if not samples[key] then
+                samples[key] = {{}}
+                order[#order + 1] = key
+            end
+        end
+        local handler = entry.handler
+        if type(handler) == "string" then handler = standin.resolve(handler) end
+        local called = clock()
+        local ok, err = pcall(handler, event)
+        local elapsed = clock() - called
+        if not ok then
+            local failure = failures[key] or {{count = 0, message = tostring(err)}}
+            failure.count = failure.count + 1
+            failures[key] = failure
+        end
+        if n > warmup then
+            local list = samples[key]
+            list[#list + 1] = string.format("%.9g", elapsed * 1000)
+        end
+    end
+    if n > warmup then services[#services + 1] = string.format("%.9g", (clock() - started) * 1000) end
+end
+
+print("PASS")
+print("Service: " .. table.concat(services, " "))
+for _, key in ipairs(order) do
+    print("Handler: " .. key .. "\\t" .. table.concat(samples[key], " "))
+    if failures[key] then
+        print("Raised: " .. key .. "\\t" .. failures[key].count .. "\\t" .. failures[key].message:gsub("\\n", " "))
+    end
+end
+for i, name in ipairs(names) do
+    if not standin.handlers[name] or #standin.handlers[name] == 0 then print("Unhandled: " .. name) end
+end
+'''
+
+    def run(self):
+        """Raise the storm and replay it at the configured rate; return False if the GUI fell behind."""
+        if not self.tester.lua_path:
+            self.errors.append("lua interpreter not found in PATH")
+            return False
+        if self.tester.get_model() is None:
+            self.errors.extend(self.tester.errors)
+            return False
+
+        sequence = event_sequence(self.mix, WARMUP_EVENTS + self.events, self.seed)
+        success, output = self.tester.execute({'name': 'event_storm'}, self._storm_source(sequence))
+        self.tester.close_pool()
+        self.warnings.extend(self.tester.warnings)
+        if not success:
+            self.errors.append(f"Event storm failed: {output}")
+            return False
+
+        for line in output:
+            if line.startswith('Service: '):
+                self.services = [float(value) for value in line[len('Service: '):].split()]
+            elif line.startswith('Handler: '):
+                key, _, values = line[len('Handler: '):].partition('\t')
+                self.handler_samples[key] = [float(value) for value in values.split()]
+            elif line.startswith('Raised: '):
+                key, count, message = line[len('Raised: '):].split('\t', 2)
+                message = self.tester.remap_standin_error(message)
+                self.handler_errors[key] = (int(count), message)
+                self.warnings.append(f"{key}: raised in {count} calls, {message}")
+            elif line.startswith('Missing: '):
+                self.warnings.append(f"{line[len('Missing: '):]}: not defined in the stand-in, not raised")
+            elif line.startswith('Unhandled: '):
+                self.warnings.append(f"{line[len('Unhandled: '):]}: the package registers no handler for it")
+        self.sequence = sequence[WARMUP_EVENTS:]
+
+        if not self.services or sum(self.services) <= 0:
+            self.errors.append("No handling time was measured; the mix has no handled events")
+            return False
+        self.result = replay(self.services, self.rate, self.burst, self.sequence)
+        self.saturation = find_saturation(self.services, self.burst, self.max_latency)
+        return keeps_up(self.result, self.max_latency)
+
+    def handler_latencies(self):
+        """Return {handler label: percentiles of its milliseconds per call, with 'calls'}, slowest p99 first."""
+        latencies = {}
+        for key, samples in self.handler_samples.items():
+            if samples:
+                latencies[key] = dict(_percentiles(samples), calls=len(samples))
+        return dict(sorted(latencies.items(), key=lambda item: -item[1]['p99']))
+
+    def format_report(self):
+        """Return the display lines of the last storm."""
+        result = self.result
+        capacity = len(self.services) * 1000.0 / sum(self.services)
+        latency = result['latency']
+        lines = [
+            f"Event storm: {result['events']} events at {self.rate:g}/s in bursts of {self.burst} "
+            f"({', '.join(f'{event}={weight:g}' for event, weight in sorted(self.mix.items()))})",
+            f"  Sustained: {result['throughput']:.0f} events/s handled, load {result['load']:.1%} "
+            f"(capacity {capacity:.0f} events/s back to back)",
+            f"  Latency: p50 {latency['p50']:.3f}ms, p95 {latency['p95']:.3f}ms, p99 {latency['p99']:.3f}ms, "
+            f"max {latency['max']:.3f}ms",
+            f"  Backlog: {result['backlog_max']} events at most, {result['backlog_final']} when the last "
+            f"arrived, drained {result['drain_ms']:.3f}ms later",
+            f"  Falls behind above {self.saturation:.0f} events/s (p99 latency over {self.max_latency:g}ms "
+            f"or handlers busy all the time)",
+            "",
+            "Latency by event (arrival to handled):"
+        ]
+        for event, percentiles in result['event_latency'].items():
+            lines.append(f"  {event}: p50 {percentiles['p50']:.3f}ms, p95 {percentiles['p95']:.3f}ms, "
+                         f"p99 {percentiles['p99']:.3f}ms")
+        lines.append("")
+        lines.append("Time per handler call:")
+        for key, percentiles in self.handler_latencies().items():
+            lines.append(f"  {key} ({percentiles['calls']} calls): p50 {percentiles['p50']:.4f}ms, "
+                         f"p95 {percentiles['p95']:.4f}ms, p99 {percentiles['p99']:.4f}ms, "
+                         f"max {percentiles['max']:.4f}ms")
+        return lines
+
+    def get_results(self):
+        return {
+            'mix': self.mix,
+            'rate': self.rate,
+            'burst': self.burst,
+            'max_latency': self.max_latency,
+            'replay': self.result,
+            'saturation_rate': self.saturation,
+            'handlers': self.handler_latencies(),
+            'handler_errors': {key: {'calls': count, 'message': message}
+                               for key, (count, message) in self.handler_errors.items()},
+            'errors': self.errors,
+            'warnings': self.warnings
+        }
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Raise a storm of MSDP events through the package handlers and '
+                                                 'find the rate at which the GUI falls behind')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to load')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='Events per second to replay the storm at (default: %(default)s)')
+    parser.add_argument('--mix', help='Comma-separated EVENT=WEIGHT pairs (default: '
+                        + ','.join(f'{event}={weight}' for event, weight in DEFAULT_MIX.items()) + ')')
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST,
+                        help='Events arriving at once, as a combat round sends them (default: %(default)s)')
+    parser.add_argument('--events', type=int, default=DEFAULT_EVENTS,
+                        help='Events timed, after %d warmup events (default: %%(default)s)' % WARMUP_EVENTS)
+    parser.add_argument('--max-latency', type=float, default=DEFAULT_MAX_LATENCY,
+                        help='p99 latency in milliseconds beyond which the GUI has fallen behind (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=STORM_SEED, help='Seed of the event sequence (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--json', action='store_true', help='Output the results in JSON format')
+
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else None
+    except ValueError as e:
+        parser.error(f"--mix: {e}")
+    if args.rate <= 0 or args.events < 1:
+        parser.error("--rate and --events must be positive")
+
+    storm = EventStorm(args.xml, mix, args.rate, args.events, args.burst, args.max_latency, args.seed,
+                       use_cache=not args.no_cache)
+    success = storm.run()
+    if args.json:
+        print(json.dumps(storm.get_results(), indent=2))
+    elif storm.errors:
+        for error in storm.errors:
+            print(f"Error: {error}")
+    else:
+        for line in storm.format_report():
+            print(line)
+        if storm.warnings:
+            print("\nWarnings:")
+            for warning in storm.warnings:
+                print(f"  {warning}")
+        if not success:
+            print(f"\nThe GUI falls behind at {args.rate:g} events/s")
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Hot-Path Catalog for LuminariGUI
+Finds every entry point Mudlet calls into the package (event handlers,
+triggers and aliases) by reading the scripts statically, and weights each by
+how often it runs in a typical session.
+"""
+
+import os
+import re
+import sys
+import json
+
+import lua_parser
+from package_model import load_package_model, xml_line
+from mudlet_standin import MATCH_CONTAINERS
+
+# How often each entry point runs in an hour of typical play (exploring and
+# fighting in a group). MSDP variables are sent when they change: vitals and
+# actions every combat round, the room on every move. Keys are event names,
+# or script paths for triggers and aliases; other entry points fall back to
+# DEFAULT_FREQUENCIES by kind.
+SESSION_FREQUENCIES = {
+    'msdp.HEALTH': 1200,
+    'msdp.HEALTH_MAX': 10,
+    'msdp.MOVEMENT': 600,
+    'msdp.MOVEMENT_MAX': 10,
+    'msdp.PSP': 600,
+    'msdp.PSP_MAX': 10,
+    'msdp.OPPONENT_HEALTH': 900,
+    'msdp.OPPONENT_HEALTH_MAX': 120,
+    'msdp.OPPONENT_NAME': 120,
+    'msdp.ACTIONS': 900,
+    'msdp.ROOM': 600,
+    'msdp.GROUP': 900,
+    'msdp.AFFECTS': 120,
+    'msdp.MONEY': 60,
+    'msdp.ALIGNMENT': 10,
+    'msdp.AC': 10,
+    'LuminariGUI/GUI/Gag blank lines': 1800,
+    'LuminariGUI/GUI/Capture Room Map': 600,
+    'LuminariGUI/GUI/Capture Wilderness Map': 120,
+    'LuminariGUI/GUI/Cast Console/Started Cast': 120,
+    'LuminariGUI/GUI/Cast Console/Cast Complete': 110,
+    'LuminariGUI/GUI/Cast Console/Cast Aborted': 5,
+    'LuminariGUI/GUI/Cast Console/Cast Canceled': 5,
+    'LuminariGUI/YATCOConfig/Chat': 120,
+    'LuminariGUI/YATCOConfig/Group': 120,
+    'LuminariGUI/YATCOConfig/Say': 60
+}
+
+# Runs per hour of entry points not listed above: profile events such as
+# sysLoadEvent fire about once a session, aliases when a player types them
+DEFAULT_FREQUENCIES = {'event': 1, 'trigger': 30, 'alias': 1}
+
+REGISTER_CALL = 'registerAnonymousEventHandler'
+
+
+def dotted_name(node):
+    """Return 'GUI.updateGroup' for a Name/Index chain with string keys, or None."""
+    parts = []
+    while node['type'] == 'Index' and node['key']['type'] == 'String':
+        parts.append(node['key']['value'])
+        node = node['obj']
+    if node['type'] != 'Name':
+        return None
+    parts.append(node['name'])
+    return '.'.join(reversed(parts))
+
+
+def _handler(node):
+    """Return (handler name or None, line of an inline function or None) for a handler argument."""
+    if node['type'] == 'String':
+        return node['value'], None
+    if node['type'] == 'Function':
+        return None, node['line']
+    return dotted_name(node), None
+
+
+def _mentions(node, name):
+    return any(child['type'] == 'Name' and child['name'] == name for child in lua_parser.walk(node))
+
+
+def registrations(chunk):
+    """Return the (event, handler, function line, line) registrations in a parsed script.
+
+    Found are registerAnonymousEventHandler calls (also through pcall)
+    whose event is a string literal, and tables of event -> handler name
+    strings that a `for event, handler in pairs(table)` loop registers,
+    as GUI.registerEventHandlers does. handler is None for an inline
+    function, whose definition line is given instead.
+    """
+    found = []
+    tables = {}
+    for node in lua_parser.walk(chunk):
+        if node['type'] in ('Local', 'Assign'):
+            targets = node['names'] if node['type'] == 'Local' else [dotted_name(target) for target in node['targets']]
+            for target, value in zip(targets, node['values']):
+                if target and value['type'] == 'Table':
+                    tables[target] = value
+        elif node['type'] == 'Call':
+            args = node['args']
+            if node['func']['type'] == 'Name' and node['func']['name'] == 'pcall' and args:
+                func, args = args[0], args[1:]
+            else:
+                func = node['func']
+            if (func['type'] == 'Name' and func['name'] == REGISTER_CALL and len(args) >= 2
+                    and args[0]['type'] == 'String'):
+                handler, function_line = _handler(args[1])
+                if handler or function_line:
+                    found.append((args[0]['value'], handler, function_line, node['line']))
+
+    for node in lua_parser.walk(chunk):
+        if node['type'] != 'GenericFor' or len(node['iters']) != 1:
+            continue
+        call = node['iters'][0]
+        if (call['type'] != 'Call' or dotted_name(call['func']) != 'pairs' or len(call['args']) != 1
+                or not _mentions(node['body'], REGISTER_CALL)):
+            continue
+        table = tables.get(dotted_name(call['args'][0]) or '')
+        for field in table['fields'] if table else ():
+            if field['key'] is not None and field['key']['type'] == 'String' and field['value']['type'] == 'String':
+                found.append((field['key']['value'], field['value']['value'], None, field['line']))
+    return found
+
+
+class HotPathCatalog:
+    def __init__(self, scripts=(), frequencies=None):
+        self.scripts = list(scripts)
+        # Overrides of SESSION_FREQUENCIES, e.g. from the test settings
+        self.frequencies = dict(SESSION_FREQUENCIES, **(frequencies or {}))
+        self.entries = []
+        self.warnings = []
+
+    def frequency(self, kind, key):
+        """Return the runs per hour of one registration of an entry point."""
+        return self.frequencies.get(key, DEFAULT_FREQUENCIES[kind])
+
+    def build(self):
+        """Collect the entry points, most frequent first; return them.
+
+        Each entry has 'kind' ('event', 'trigger' or 'alias'), 'event',
+        'handler' (a global function name; None for inline functions,
+        triggers and aliases), 'script' and 'line' (where its code is:
+        the registration, the inline function or the body; line 1 of the
+        script for a script registered through its <eventHandlerList>),
+        'registrations' ('path:line (LuminariGUI.xml:N)' per place that
+        registers it) and 'frequency': runs per hour, counting every
+        registration, since Mudlet calls a handler registered twice
+        twice.
+        """
+        entries = {}
+        for script in self.scripts:
+            if script['container'] in MATCH_CONTAINERS:
+                kind = script['container'].lower()
+                entries[(kind, script['path'])] = {
+                    'kind': kind, 'event': None, 'handler': None,
+                    'script': script['path'], 'line': 1, 'registrations': []
+                }
+                continue
+            # Mudlet calls the function named after the script on the events of its list
+            for registration in script['event_handlers']:
+                key = ('event', registration['event'], script['name'])
+                entry = entries.setdefault(key, {
+                    'kind': 'event', 'event': registration['event'], 'handler': script['name'],
+                    'script': script['path'], 'line': 1, 'registrations': []
+                })
+                entry['registrations'].append(f"{script['path']} eventHandlerList "
+                                              f"(LuminariGUI.xml:{registration['line']})")
+            try:
+                chunk = lua_parser.parse(script['content'])
+            except lua_parser.LuaSyntaxError as e:
+                self.warnings.append(f"{script['path']}: not cataloged, {e}")
+                continue
+            for event, handler, function_line, line in registrations(chunk):
+                key = ('event', event, handler or f"{script['path']}:{function_line}")
+                entry = entries.setdefault(key, {
+                    'kind': 'event', 'event': event, 'handler': handler,
+                    'script': script['path'], 'line': function_line or line, 'registrations': []
+                })
+                location = f"{script['path']}:{line}"
+                if xml_line(script, line) is not None:
+                    location += f" (LuminariGUI.xml:{xml_line(script, line)})"
+                entry['registrations'].append(location)
+
+        for entry in entries.values():
+            key = entry['event'] if entry['kind'] == 'event' else entry['script']
+            entry['frequency'] = self.frequency(entry['kind'], key) * max(1, len(entry['registrations']))
+        self.entries = sorted(entries.values(), key=lambda entry: -entry['frequency'])
+        return self.entries
+
+    def format_catalog(self):
+        """Return the display lines of the catalog."""
+        lines = [f"Entry points ({len(self.entries)}), by runs per hour of play:"]
+        for entry in self.entries:
+            lines.append(f"  {entry['frequency']:7g}/h  {entry_label(entry)}")
+            if len(entry['registrations']) > 1:
+                lines.append(f"             registered {len(entry['registrations'])} times: "
+                             + ", ".join(entry['registrations']))
+        return lines
+
+
+def entry_label(entry):
+    """Return a readable name for an entry point, e.g. 'msdp.GROUP -> GUI.updateGroup'."""
+    if entry['kind'] != 'event':
+        return f"{entry['kind']} {entry['script']}"
+    handler = entry['handler'] or f"function at {entry['script']}:{entry['line']}"
+    return f"{entry['event']} -> {handler}"
+
+
+def entry_case_name(entry):
+    """Return the benchmark name of an entry point, e.g. 'entry_gui_updategroup_msdp_group'."""
+    if entry['kind'] == 'event':
+        handler = entry['handler'] or f"{os.path.basename(entry['script'])}_{entry['line']}"
+        parts = ['entry', handler, entry['event']]
+    else:
+        parts = [entry['kind'], os.path.basename(entry['script'])]
+    return re.sub(r'\W+', '_', '_'.join(parts)).strip('_').lower()
+
+
+def weighted_costs(benchmark_results, case_frequencies):
+    """Rank benchmarks by their time per hour of play: median per call times runs per hour.
+
+    case_frequencies maps benchmark names to runs per hour; benchmarks
+    without a frequency or a result are left out. Entries hold the
+    case, median, frequency, ms_per_hour and percent of the total.
+    """
+    costs = []
+    for name, frequency in case_frequencies.items():
+        result = benchmark_results.get(name)
+        if result is not None:
+            costs.append({'case': name, 'median': result['median'], 'frequency': frequency,
+                          'ms_per_hour': result['median'] * frequency})
+    total = sum(cost['ms_per_hour'] for cost in costs) or 1.0
+    for cost in costs:
+        cost['percent'] = cost['ms_per_hour'] * 100 / total
+    return sorted(costs, key=lambda cost: -cost['ms_per_hour'])
+
+
+def format_weighted_costs(costs, top=None):
+    """Return the display lines of weighted_costs."""
+    total = sum(cost['ms_per_hour'] for cost in costs)
+    lines = [f"Hot paths by time per hour of play ({total:.1f}ms/h in total):"]
+    for cost in costs[:top]:
+        lines.append(f"  {cost['ms_per_hour']:9.2f}ms/h {cost['percent']:5.1f}%  {cost['case']} "
+                     f"({cost['median']:.4f}ms x {cost['frequency']:g}/h)")
+    return lines
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='List the entry points Mudlet calls into the package, by session frequency')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to read')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--json', action='store_true', help='Output the catalog in JSON format')
+
+    args = parser.parse_args()
+
+    errors = []
+    model = load_package_model(args.xml, errors, use_cache=not args.no_cache)
+    if model is None:
+        for error in errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+
+    catalog = HotPathCatalog(model.scripts)
+    catalog.build()
+    if args.json:
+        print(json.dumps({'entries': catalog.entries, 'warnings': catalog.warnings}, indent=2))
+    else:
+        for line in catalog.format_catalog():
+            print(line)
+        for warning in catalog.warnings:
+            print(f"Warning: {warning}")
+
+
+if __name__ == "__main__":
+    main()
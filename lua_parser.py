@@ -0,0 +1,692 @@
+#!/usr/bin/env python3
+"""
+Lua 5.1 Parser for LuminariGUI
+In-process tokenizer and recursive-descent parser for Lua 5.1, used to check
+script syntax without luac and to give analyzers a lightweight AST.
+"""
+
+import re
+import sys
+import time
+
+from package_model import load_package_model, xml_line
+
+KEYWORDS = frozenset((
+    'and', 'break', 'do', 'else', 'elseif', 'end', 'false', 'for', 'function',
+    'if', 'in', 'local', 'nil', 'not', 'or', 'repeat', 'return', 'then',
+    'true', 'until', 'while'
+))
+
+# Longest operators first so '...' wins over '..' and '.'
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<long_comment>--\[=*\[)
+  | (?P<comment>--[^\n]*)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<number>(?:[0-9]|\.[0-9])[0-9.]*(?:[eE][+-]?)?[A-Za-z0-9_]*)
+  | (?P<long_string>\[=*\[)
+  | (?P<string>"(?:\\(?:\r\n|\n\r|.)|[^"\\\n])*"|'(?:\\(?:\r\n|\n\r|.)|[^'\\\n])*')
+  | (?P<op>\.\.\.|\.\.|==|~=|<=|>=|[-+*/%^\#<>=(){}\[\];:,.])
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+# The number pattern above reads as much as luac does; this is what it accepts
+VALID_NUMBER = re.compile(r'0[xX][0-9a-fA-F]+|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?')
+
+# Unfinished quoted string: everything up to the first unescaped newline
+UNFINISHED_STRING = re.compile(r'["\'](?:\\(?:\r\n|\n\r|.)|[^\\\n])*', re.DOTALL)
+
+ESCAPE_PATTERN = re.compile(r'\\([0-9]{1,3}|\r\n|\n\r|.)', re.DOTALL)
+ESCAPES = {
+    'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+    '\n': '\n', '\r': '\n', '\r\n': '\n', '\n\r': '\n'
+}
+
+# Binary operator priorities (left, right) from lparser.c; right < left means right-associative
+BINARY_PRIORITY = {
+    'or': (1, 1), 'and': (2, 2),
+    '<': (3, 3), '>': (3, 3), '<=': (3, 3), '>=': (3, 3), '~=': (3, 3), '==': (3, 3),
+    '..': (5, 4),
+    '+': (6, 6), '-': (6, 6),
+    '*': (7, 7), '/': (7, 7), '%': (7, 7),
+    '^': (10, 9)
+}
+UNARY_OPERATORS = frozenset(('not', '-', '#'))
+UNARY_PRIORITY = 8
+
+BLOCK_END = frozenset(('else', 'elseif', 'end', 'until', '<eof>'))
+
+
+class LuaSyntaxError(Exception):
+    """A Lua syntax error with the 1-based line and column it was found at."""
+
+    def __init__(self, message, line, column):
+        super().__init__(message)
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        return f"{self.line}:{self.column}: {self.message}"
+
+
+def _scan(source):
+    """Tokenize source, ending the list with an '<error>' token on a lexical error."""
+    tokens = []
+    append = tokens.append
+    match = TOKEN_PATTERN.match
+    length = len(source)
+    pos = 0
+    line = 1
+    line_start = 0
+
+    # A leading '#' line (shebang) is skipped like lua does
+    if source.startswith('#'):
+        pos = source.find('\n')
+        if pos == -1:
+            pos = length
+
+    try:
+        while pos < length:
+            m = match(source, pos)
+            kind = m.lastgroup
+            end = m.end()
+            column = pos - line_start + 1
+
+            if kind == 'space' or kind == 'comment':
+                newlines = m.group().count('\n')
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind('\n', pos, end) + 1
+            elif kind == 'name':
+                text = m.group()
+                append((text if text in KEYWORDS else '<name>', text, line, column))
+            elif kind == 'op':
+                text = m.group()
+                if text == '[' and source.startswith('=', end):
+                    delimiter = re.match(r'\[=*', source[pos:]).group()
+                    raise LuaSyntaxError(f"invalid long string delimiter near '{delimiter}'", line, column)
+                append((text, text, line, column))
+            elif kind == 'number':
+                text = m.group()
+                if not VALID_NUMBER.fullmatch(text):
+                    raise LuaSyntaxError(f"malformed number near '{text}'", line, column)
+                append(('<number>', text, line, column))
+            elif kind == 'string':
+                text = m.group()
+                _check_escapes(text, line, column)
+                append(('<string>', text, line, column))
+                newlines = text.count('\n')
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind('\n', pos, end) + 1
+            elif kind == 'other':
+                char = m.group()
+                if char in '"\'':
+                    text = UNFINISHED_STRING.match(source, pos).group()
+                    _check_escapes(text, line, column)
+                    if pos + len(text) == length:
+                        near = '<eof>'
+                    else:
+                        near = char + ESCAPE_PATTERN.sub(_unescape, text[1:])
+                    raise LuaSyntaxError(f"unfinished string near '{near}'",
+                                         line + text.count('\n'), column)
+                # luac passes unknown characters to the parser as single-char tokens
+                text = char if char.isprintable() else f"char({ord(char)})"
+                append((char, text, line, column))
+            else:
+                # Long string or long comment: find the matching ]==] bracket
+                opener = m.group()
+                level = opener.count('=')
+                close = source.find(']' + '=' * level + ']', end)
+                what = 'long comment' if kind == 'long_comment' else 'long string'
+                if close == -1:
+                    raise LuaSyntaxError(f"unfinished {what} near '<eof>'", line + source.count('\n', pos), column)
+                if level == 0:
+                    nested = source.find('[[', end, close)
+                    if nested != -1:
+                        raise LuaSyntaxError("nesting of [[...]] is deprecated near '['",
+                                             line + source.count('\n', pos, nested),
+                                             nested - source.rfind('\n', 0, nested))
+                end = close + level + 2
+                if kind == 'long_string':
+                    append(('<string>', source[pos:end], line, column))
+                newlines = source.count('\n', pos, end)
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind('\n', pos, end) + 1
+
+            pos = end
+
+    except LuaSyntaxError as error:
+        # luac reads tokens on demand, so the parser raises this only when it
+        # gets here and any earlier syntax error is still reported first
+        append(('<error>', error, error.line, error.column))
+        return tokens
+
+    append(('<eof>', '<eof>', line, pos - line_start + 1))
+    return tokens
+
+
+def _check_escapes(text, line, column):
+    """Raise the error luac gives for a decimal escape above 255 in a quoted string."""
+    if '\\' not in text:
+        return
+    for m in ESCAPE_PATTERN.finditer(text, 1):
+        if m.group(1)[0].isdigit() and int(m.group(1)) > 255:
+            # luac shows the string as read so far, escapes already decoded
+            near = text[0] + ESCAPE_PATTERN.sub(_unescape, text[1:m.start()])
+            raise LuaSyntaxError(f"escape sequence too large near '{near}'",
+                                 line + text.count('\n', 0, m.start()), column)
+
+
+def tokenize(source):
+    """Split Lua source into (kind, text, line, column) tuples.
+
+    kind is the keyword or operator itself, or one of '<name>',
+    '<number>', '<string>' and '<eof>' - the same names luac uses in its
+    messages. Comments and whitespace are dropped; the list always ends
+    with an '<eof>' token. Raises LuaSyntaxError for malformed tokens.
+    """
+    tokens = _scan(source)
+    if tokens[-1][0] == '<error>':
+        raise tokens[-1][1]
+    return tokens
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[0].isdigit():
+        return chr(int(escape))
+    return ESCAPES.get(escape, escape)
+
+
+def string_value(text):
+    """Return the value of a string token's source text."""
+    if text[0] == '[':
+        level = text.index('[', 1) + 1
+        body = text[level:-level]
+        # A newline right after the opening bracket is not part of the string
+        if body.startswith('\r\n') or body.startswith('\n\r'):
+            return body[2:]
+        if body[:1] in ('\n', '\r'):
+            return body[1:]
+        return body
+    body = text[1:-1]
+    if '\\' not in body:
+        return body
+    return ESCAPE_PATTERN.sub(_unescape, body)
+
+
+def number_value(text):
+    """Return the value of a number token's source text."""
+    if text[:2] in ('0x', '0X'):
+        return int(text, 16)
+    return int(text) if text.isdigit() else float(text)
+
+
+class LuaParser:
+    def __init__(self, source):
+        self.tokens = _scan(source)
+        self.pos = 0
+        self.tok = self.tokens[0]
+        if self.tok[0] == '<error>':
+            raise self.tok[1]
+        self.last_line = 1
+        self._vararg = [True]  # the main chunk is a vararg function
+        self._loops = [0]      # open loops per function, for 'break'
+
+    # Token helpers
+
+    def _next(self):
+        self.last_line = self._end_line(self.tok)
+        self.pos += 1
+        self.tok = self.tokens[self.pos]
+        if self.tok[0] == '<error>':
+            raise self.tok[1]
+
+    def _lookahead(self):
+        return self.tokens[self.pos + 1]
+
+    @staticmethod
+    def _end_line(tok):
+        """Return the line a token ends on (strings may span lines)."""
+        if tok[0] == '<string>':
+            return tok[2] + tok[1].count('\n')
+        return tok[2]
+
+    def _error(self, message, tok=None):
+        # Like luac, report the line the offending token ends on
+        tok = tok or self.tok
+        near = tok[1]
+        if tok[0] == '<string>':
+            # luac shows the string's value between its original delimiters
+            level = near.index('[', 1) + 1 if near[0] == '[' else 1
+            near = near[:level] + string_value(near) + near[-level:]
+        raise LuaSyntaxError(f"{message} near '{near}'", self._end_line(tok), tok[3])
+
+    def _check(self, kind):
+        if self.tok[0] != kind:
+            self._error(f"'{kind}' expected")
+
+    def _check_next(self, kind):
+        self._check(kind)
+        self._next()
+
+    def _test_next(self, kind):
+        if self.tok[0] == kind:
+            self._next()
+            return True
+        return False
+
+    def _check_match(self, what, who, line):
+        if self.tok[0] != what:
+            if line == self.tok[2]:
+                self._error(f"'{what}' expected")
+            self._error(f"'{what}' expected (to close '{who}' at line {line})")
+        self._next()
+
+    def _name(self):
+        if self.tok[0] != '<name>':
+            self._error("'<name>' expected")
+        name = self.tok[1]
+        self._next()
+        return name
+
+    # Blocks and statements
+
+    def parse(self):
+        """Parse the whole chunk and return its AST."""
+        body = self._block()
+        self._check('<eof>')
+        return {'type': 'Chunk', 'line': 1, 'body': body}
+
+    def _block(self):
+        body = []
+        while self.tok[0] not in BLOCK_END:
+            kind = self.tok[0]
+            if kind == 'return':
+                body.append(self._return())
+                break
+            if kind == 'break':
+                line = self.tok[2]
+                if not self._loops[-1]:
+                    self._error("no loop to break")
+                self._next()
+                self._test_next(';')
+                body.append({'type': 'Break', 'line': line})
+                break
+            body.append(self._statement())
+            self._test_next(';')
+        return body
+
+    def _statement(self):
+        kind = self.tok[0]
+        line = self.tok[2]
+        if kind == 'if':
+            return self._if(line)
+        if kind == 'while':
+            self._next()
+            cond = self._expr()
+            self._check_next('do')
+            body = self._loop_block()
+            self._check_match('end', 'while', line)
+            return {'type': 'While', 'line': line, 'cond': cond, 'body': body}
+        if kind == 'do':
+            self._next()
+            body = self._block()
+            self._check_match('end', 'do', line)
+            return {'type': 'Do', 'line': line, 'body': body}
+        if kind == 'for':
+            return self._for(line)
+        if kind == 'repeat':
+            self._next()
+            body = self._loop_block()
+            self._check_match('until', 'repeat', line)
+            cond = self._expr()
+            return {'type': 'Repeat', 'line': line, 'body': body, 'cond': cond}
+        if kind == 'function':
+            self._next()
+            names = [self._name()]
+            method = None
+            while self.tok[0] == '.':
+                self._next()
+                names.append(self._name())
+            if self._test_next(':'):
+                method = self._name()
+            func = self._function_body(line, method is not None)
+            return {'type': 'FunctionDecl', 'line': line, 'names': names, 'method': method, 'func': func}
+        if kind == 'local':
+            self._next()
+            if self._test_next('function'):
+                name = self._name()
+                func = self._function_body(line, False)
+                return {'type': 'LocalFunction', 'line': line, 'name': name, 'func': func}
+            names = [self._name()]
+            while self._test_next(','):
+                names.append(self._name())
+            values = self._expr_list() if self._test_next('=') else []
+            return {'type': 'Local', 'line': line, 'names': names, 'values': values}
+        return self._expr_statement(line)
+
+    def _loop_block(self):
+        self._loops[-1] += 1
+        try:
+            return self._block()
+        finally:
+            self._loops[-1] -= 1
+
+    def _if(self, line):
+        clauses = []
+        self._next()
+        cond = self._expr()
+        self._check_next('then')
+        clauses.append((cond, self._block()))
+        orelse = None
+        while self.tok[0] == 'elseif':
+            self._next()
+            cond = self._expr()
+            self._check_next('then')
+            clauses.append((cond, self._block()))
+        if self._test_next('else'):
+            orelse = self._block()
+        self._check_match('end', 'if', line)
+        return {'type': 'If', 'line': line, 'clauses': clauses, 'orelse': orelse}
+
+    def _for(self, line):
+        self._next()
+        first = self._name()
+        if self.tok[0] == '=':
+            self._next()
+            start = self._expr()
+            self._check_next(',')
+            stop = self._expr()
+            step = self._expr() if self._test_next(',') else None
+            self._check_next('do')
+            body = self._loop_block()
+            self._check_match('end', 'for', line)
+            return {'type': 'NumericFor', 'line': line, 'var': first,
+                    'start': start, 'stop': stop, 'step': step, 'body': body}
+        if self.tok[0] in (',', 'in'):
+            names = [first]
+            while self._test_next(','):
+                names.append(self._name())
+            self._check_next('in')
+            iters = self._expr_list()
+            self._check_next('do')
+            body = self._loop_block()
+            self._check_match('end', 'for', line)
+            return {'type': 'GenericFor', 'line': line, 'names': names, 'iters': iters, 'body': body}
+        self._error("'=' or 'in' expected")
+
+    def _return(self):
+        line = self.tok[2]
+        self._next()
+        if self.tok[0] in BLOCK_END or self.tok[0] == ';':
+            values = []
+        else:
+            values = self._expr_list()
+        self._test_next(';')
+        return {'type': 'Return', 'line': line, 'values': values}
+
+    def _expr_statement(self, line):
+        expr = self._suffixed_expr()
+        if expr['type'] in ('Call', 'Invoke'):
+            return {'type': 'CallStatement', 'line': line, 'call': expr}
+
+        # Anything else must be an assignment to names or table fields
+        targets = [expr]
+        while True:
+            if targets[-1]['type'] not in ('Name', 'Index'):
+                self._error("syntax error")
+            if not self._test_next(','):
+                break
+            targets.append(self._suffixed_expr())
+        self._check_next('=')
+        values = self._expr_list()
+        return {'type': 'Assign', 'line': line, 'targets': targets, 'values': values}
+
+    # Functions
+
+    def _function_body(self, line, is_method):
+        params = ['self'] if is_method else []
+        is_vararg = False
+        self._check_next('(')
+        if self.tok[0] != ')':
+            while True:
+                if self.tok[0] == '<name>':
+                    params.append(self._name())
+                elif self.tok[0] == '...':
+                    self._next()
+                    is_vararg = True
+                    break
+                else:
+                    self._error("<name> or '...' expected")
+                if not self._test_next(','):
+                    break
+        self._check_next(')')
+
+        self._vararg.append(is_vararg)
+        self._loops.append(0)
+        try:
+            body = self._block()
+        finally:
+            self._vararg.pop()
+            self._loops.pop()
+        end_line = self.tok[2]
+        self._check_match('end', 'function', line)
+        return {'type': 'Function', 'line': line, 'end_line': end_line,
+                'params': params, 'is_vararg': is_vararg, 'body': body}
+
+    # Expressions
+
+    def _expr_list(self):
+        values = [self._expr()]
+        while self._test_next(','):
+            values.append(self._expr())
+        return values
+
+    def _expr(self, limit=0):
+        tok = self.tok
+        if tok[0] in UNARY_OPERATORS:
+            self._next()
+            operand = self._expr(UNARY_PRIORITY)
+            left = {'type': 'Unop', 'line': tok[2], 'op': tok[0], 'operand': operand}
+        else:
+            left = self._simple_expr()
+
+        priority = BINARY_PRIORITY.get(self.tok[0])
+        while priority is not None and priority[0] > limit:
+            op = self.tok
+            self._next()
+            right = self._expr(priority[1])
+            left = {'type': 'Binop', 'line': op[2], 'op': op[0], 'left': left, 'right': right}
+            priority = BINARY_PRIORITY.get(self.tok[0])
+        return left
+
+    def _simple_expr(self):
+        tok = self.tok
+        kind = tok[0]
+        if kind == '<number>':
+            self._next()
+            return {'type': 'Number', 'line': tok[2], 'value': number_value(tok[1])}
+        if kind == '<string>':
+            self._next()
+            return {'type': 'String', 'line': tok[2], 'value': string_value(tok[1])}
+        if kind == 'nil':
+            self._next()
+            return {'type': 'Nil', 'line': tok[2]}
+        if kind == 'true':
+            self._next()
+            return {'type': 'True', 'line': tok[2]}
+        if kind == 'false':
+            self._next()
+            return {'type': 'False', 'line': tok[2]}
+        if kind == '...':
+            if not self._vararg[-1]:
+                self._error("cannot use '...' outside a vararg function")
+            self._next()
+            return {'type': 'Vararg', 'line': tok[2]}
+        if kind == '{':
+            return self._table()
+        if kind == 'function':
+            self._next()
+            return self._function_body(tok[2], False)
+        return self._suffixed_expr()
+
+    def _primary_expr(self):
+        tok = self.tok
+        if tok[0] == '<name>':
+            self._next()
+            return {'type': 'Name', 'line': tok[2], 'name': tok[1]}
+        if tok[0] == '(':
+            self._next()
+            expr = self._expr()
+            self._check_match(')', '(', tok[2])
+            return {'type': 'Paren', 'line': tok[2], 'expr': expr}
+        self._error("unexpected symbol")
+
+    def _suffixed_expr(self):
+        expr = self._primary_expr()
+        while True:
+            kind = self.tok[0]
+            line = self.tok[2]
+            if kind == '.':
+                self._next()
+                tok = self.tok
+                key = {'type': 'String', 'line': tok[2], 'value': self._name()}
+                expr = {'type': 'Index', 'line': line, 'obj': expr, 'key': key}
+            elif kind == '[':
+                self._next()
+                key = self._expr()
+                self._check_next(']')
+                expr = {'type': 'Index', 'line': line, 'obj': expr, 'key': key}
+            elif kind == ':':
+                self._next()
+                method = self._name()
+                args = self._call_args()
+                expr = {'type': 'Invoke', 'line': line, 'obj': expr, 'method': method, 'args': args}
+            elif kind in ('(', '<string>', '{'):
+                args = self._call_args()
+                expr = {'type': 'Call', 'line': line, 'func': expr, 'args': args}
+            else:
+                return expr
+
+    def _call_args(self):
+        tok = self.tok
+        kind = tok[0]
+        if kind == '<string>':
+            self._next()
+            return [{'type': 'String', 'line': tok[2], 'value': string_value(tok[1])}]
+        if kind == '{':
+            return [self._table()]
+        if kind == '(':
+            if tok[2] != self.last_line:
+                self._error("ambiguous syntax (function call x new statement)")
+            self._next()
+            args = [] if self.tok[0] == ')' else self._expr_list()
+            self._check_match(')', '(', tok[2])
+            return args
+        self._error("function arguments expected")
+
+    def _table(self):
+        line = self.tok[2]
+        self._check_next('{')
+        fields = []
+        while self.tok[0] != '}':
+            if self.tok[0] == '<name>' and self._lookahead()[0] == '=':
+                tok = self.tok
+                self._next()
+                self._next()
+                key = {'type': 'String', 'line': tok[2], 'value': tok[1]}
+                fields.append({'type': 'Field', 'line': tok[2], 'key': key, 'value': self._expr()})
+            elif self.tok[0] == '[':
+                field_line = self.tok[2]
+                self._next()
+                key = self._expr()
+                self._check_next(']')
+                self._check_next('=')
+                fields.append({'type': 'Field', 'line': field_line, 'key': key, 'value': self._expr()})
+            else:
+                fields.append({'type': 'Field', 'line': self.tok[2], 'key': None, 'value': self._expr()})
+            if not (self._test_next(',') or self._test_next(';')):
+                break
+        self._check_match('}', '{', line)
+        return {'type': 'Table', 'line': line, 'fields': fields}
+
+
+def parse(source):
+    """Parse Lua 5.1 source and return its AST; raises LuaSyntaxError."""
+    return LuaParser(source).parse()
+
+
+def check_syntax(source):
+    """Return the LuaSyntaxError for source, or None if it parses."""
+    try:
+        parse(source)
+    except LuaSyntaxError as e:
+        return e
+    return None
+
+
+def walk(node):
+    """Yield node and every AST node nested inside it, depth first."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if 'type' in current:
+                yield current
+            children = current.values()
+        elif isinstance(current, (list, tuple)):
+            children = current
+        else:
+            continue
+        stack.extend(child for child in reversed(list(children))
+                     if isinstance(child, (dict, list, tuple)))
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check Lua syntax in-process, without luac')
+    parser.add_argument('files', nargs='*', help='Lua files to check (default: every script in the XML)')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file whose scripts are checked')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+
+    args = parser.parse_args()
+
+    if args.files:
+        sources = []
+        for path in args.files:
+            with open(path, encoding='utf-8') as f:
+                sources.append((path, f.read(), None))
+    else:
+        errors = []
+        model = load_package_model(args.xml, errors, use_cache=not args.no_cache)
+        if model is None:
+            for error in errors:
+                print(f"Error: {error}")
+            sys.exit(1)
+        sources = [(f"<{script['name']}>", script['content'], script) for script in model.scripts]
+
+    failed = 0
+    start = time.perf_counter()
+    for label, source, script in sources:
+        error = check_syntax(source)
+        if error is None:
+            continue
+        failed += 1
+        location = f"{label}:{error.line}:{error.column}"
+        if script is not None:
+            location += f" ({args.xml}:{xml_line(script, error.line)})"
+        print(f"✗ {location}: {error.message}")
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"\nChecked {len(sources)} chunks in {elapsed:.1f} ms, {failed} with syntax errors")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
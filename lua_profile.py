@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Lua Profiles for LuminariGUI
+Samples Lua call stacks with a debug.sethook profiler while the performance
+harness replays events, attributes every frame to its XML script, function
+and line, and reports folded stacks and the hottest lines.
+"""
+
+import os
+import re
+import sys
+from collections import Counter
+
+from package_model import xml_line
+from disk_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_FOLDED_FILE = os.path.join(DEFAULT_CACHE_DIR, "profile.folded")
+
+# VM instructions between samples in count mode
+DEFAULT_INTERVAL = 1000
+
+# Lines listed by the hot-lines report
+DEFAULT_TOP = 20
+
+# Separators between the fields of a frame and between frames in the sampler's output
+FIELD_SEPARATOR = '\x1f'
+FRAME_SEPARATOR = '\x1e'
+
+# Function definitions, for naming a frame from the line it was defined on
+DEFINITION_PATTERNS = (
+    re.compile(r'^\s*(?:local\s+)?function\s+([\w.:]+)\s*\('),
+    re.compile(r'([\w.:\[\]"\']+)\s*=\s*function\b')
+)
+
+PROFILER_SOURCE = r'''
+-- Stack sampler behind the profiler mode (see lua_profile.py)
+profiler = {}
+
+-- Replay events (prepare then fire, as in the allocation profile) for at
+-- least `seconds` under a debug hook. mask "" samples the stack every
+-- `interval` VM instructions, "l" on every line executed. Only frames
+-- called from fire are kept, leaf first. Returns stack -> samples, the
+-- number of events and the samples taken outside fire.
+function profiler.run(prepare, fire, first, seconds, mask, interval)
+    local stacks, outside = {}, 0
+    local getinfo = debug.getinfo
+    local function sample()
+        local frames = {}
+        local level = 2
+        while true do
+            local info = getinfo(level, "Slnf")
+            if info == nil then
+                outside = outside + 1
+                return
+            end
+            if info.func == fire then break end
+            frames[#frames + 1] = table.concat({info.source, info.linedefined, info.currentline,
+                                                info.name or ""}, "\031")
+            level = level + 1
+        end
+        if #frames > 0 then
+            local key = table.concat(frames, "\030")
+            stacks[key] = (stacks[key] or 0) + 1
+        end
+    end
+
+    local events, started = 0, os.clock()
+    debug.sethook(sample, mask, mask == "" and interval or 0)
+    repeat
+        prepare(first + events)
+        fire(first + events)
+        events = events + 1
+    until os.clock() - started >= seconds
+    debug.sethook()
+    return stacks, events, outside
+end
+'''
+
+
+def function_name(script, line_defined, fallback=None):
+    """Name the function defined on a line of a script, e.g. 'GUI.updateRoom'."""
+    if line_defined == 0:
+        return '(main chunk)'
+    lines = script['content'].splitlines() if script else []
+    if 0 < line_defined <= len(lines):
+        for pattern in DEFINITION_PATTERNS:
+            match = pattern.search(lines[line_defined - 1])
+            if match:
+                return match.group(1)
+    return fallback or f"<anonymous:{line_defined}>"
+
+
+class StackProfile:
+    def __init__(self, scripts=(), xml_file="LuminariGUI.xml", source_labels=None):
+        self.xml_file = xml_file
+        self.scripts = {script['path']: script for script in scripts}
+        # Chunk name -> label for code outside the package, e.g. the stand-in prelude
+        self.source_labels = source_labels or {}
+        # Folded stack (root first, ';'-separated) -> samples
+        self.stacks = Counter()
+        # Leaf frame -> (script path, line in the script, XML line) for the hot-lines report
+        self.locations = {}
+        self.events = {}
+        self.outside = 0
+
+    def frame(self, source, line_defined, current_line, name):
+        """Return the folded-stack label of one sampled frame."""
+        if source == '=[C]':
+            return f"{name or '?'} [C]"
+        path = source[1:] if source[:1] in '=@' else source
+        script = self.scripts.get(path)
+        if script is None:
+            # Stand-in, prelude or benchmark code rather than a package script
+            return f"{name or '?'} [{self.source_labels.get(path, path)}]"
+        label = f"{function_name(script, line_defined, name)} {path}:{current_line}"
+        line = xml_line(script, current_line)
+        if line is not None:
+            label += f" ({os.path.basename(self.xml_file)}:{line})"
+        self.locations[label] = (path, current_line, line)
+        return label
+
+    def add(self, case_name, count, raw_stack):
+        """Record count samples of a stack as printed by profiler.run (leaf first)."""
+        frames = []
+        for raw_frame in raw_stack.split(FRAME_SEPARATOR):
+            source, line_defined, current_line, name = raw_frame.split(FIELD_SEPARATOR)
+            frames.append(self.frame(source, int(line_defined), int(current_line), name))
+        # ';' separates frames in the folded format
+        frames = [frame.replace(';', ',') for frame in reversed(frames)]
+        self.stacks[';'.join([case_name] + frames)] += count
+
+    def folded_lines(self):
+        """Return the profile in the folded format read by flamegraph.pl, inferno and speedscope."""
+        return [f"{stack} {count}" for stack, count in sorted(self.stacks.items())]
+
+    def write_folded(self, folded_file=DEFAULT_FOLDED_FILE):
+        directory = os.path.dirname(folded_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(folded_file, 'w', encoding='utf-8') as f:
+            for line in self.folded_lines():
+                f.write(line + '\n')
+
+    def hot_lines(self, top=DEFAULT_TOP):
+        """Return the hottest package lines; see hot_lines."""
+        return hot_lines(self.stacks, top)
+
+    def format_hot_lines(self, top=DEFAULT_TOP):
+        """Return the hot-lines report, with each line's source text when it is a package line."""
+        total = sum(self.stacks.values())
+        lines = [f"Hot lines ({total} samples):"]
+        for entry in self.hot_lines(top):
+            lines.append(f"  {entry['samples']:7d} {entry['percent']:5.1f}%  {entry['frame']}")
+            path, script_line, _ = self.locations.get(entry['frame'], (None, None, None))
+            script = self.scripts.get(path)
+            if script is not None:
+                text = script['content'].splitlines()[script_line - 1:script_line]
+                if text:
+                    lines.append(f"                  {text[0].strip()}")
+        return lines
+
+
+def hot_lines(stacks, top=DEFAULT_TOP):
+    """Sum folded stacks (stack -> samples) by line; return the top entries.
+
+    Samples count against the deepest package frame of their stack, so
+    time spent in C functions or the stand-in is charged to the package
+    line that called them. Entries hold the frame, its samples and their
+    share of all samples.
+    """
+    leaves = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        # Frames outside the package end in "[C]" or "[<chunk>]"; the first frame is the case
+        package = [frame for frame in frames[1:] if not frame.endswith(']')]
+        leaves[package[-1] if package else frames[-1]] += count
+    total = sum(leaves.values()) or 1
+    return [{'frame': frame, 'samples': count, 'percent': count * 100 / total}
+            for frame, count in leaves.most_common(top)]
+
+
+def read_folded(folded_file):
+    """Read a folded stack file into stack -> samples."""
+    stacks = Counter()
+    with open(folded_file, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='List the hottest lines of a folded profile from test_performance.py --profile')
+    parser.add_argument('folded', nargs='?', default=DEFAULT_FOLDED_FILE, help='Folded stack file (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Number of lines to list (default: %(default)s)')
+    parser.add_argument('--case', help='Only count the stacks of one benchmark case')
+
+    args = parser.parse_args()
+
+    try:
+        stacks = read_folded(args.folded)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read {args.folded}: {e}")
+        sys.exit(1)
+    if args.case:
+        stacks = Counter({stack: count for stack, count in stacks.items() if stack.split(';', 1)[0] == args.case})
+    if not stacks:
+        print("No samples")
+        sys.exit(1)
+
+    print(f"Hot lines ({sum(stacks.values())} samples):")
+    for entry in hot_lines(stacks, args.top):
+        print(f"  {entry['samples']:7d} {entry['percent']:5.1f}%  {entry['frame']}")
+
+
+if __name__ == "__main__":
+    main()
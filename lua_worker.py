@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Lua Worker Pool for LuminariGUI Testing
+Long-lived Lua interpreters that run test cases over a framed stdin/stdout
+protocol, so each test costs a function call instead of a process launch.
+"""
+
+import os
+import sys
+import queue
+import tempfile
+import threading
+import subprocess
+from collections import deque
+
+# The worker loop run by every interpreter. Requests are a header line
+# "<command> <len> <len> ...\n" followed by that many bytes per field;
+# responses are "<ok|error> <stdout len> <error len>\n" plus both payloads.
+WORKER_SOURCE = r'''
+local stdin, stdout = io.stdin, io.stdout
+local load_chunk = loadstring or load
+local set_env = setfenv
+local libraries = {
+    string = true, table = true, math = true, os = true, io = true,
+    coroutine = true, debug = true, bit = true, bit32 = true, utf8 = true
+}
+local base = {}
+for name, value in pairs(_G) do base[name] = value end
+local string_meta = getmetatable("")
+local preludes = {}
+
+-- Point a compiled chunk at env (setfenv on 5.1/LuaJIT, the _ENV upvalue on 5.2+)
+local function bind(fn, env)
+    if set_env then
+        set_env(fn, env)
+        return fn
+    end
+    local i = 1
+    while true do
+        local name = debug.getupvalue(fn, i)
+        if name == nil then break end
+        if name == "_ENV" then
+            debug.setupvalue(fn, i, env)
+            break
+        end
+        i = i + 1
+    end
+    return fn
+end
+
+-- A fresh global table per case: library tables are copied so a case that
+-- patches string/table/os cannot leak into the next one, and output is captured
+local function fresh_env(out)
+    local env = {}
+    for name, value in pairs(base) do
+        if libraries[name] and type(value) == "table" then
+            local copy = {}
+            for key, item in pairs(value) do copy[key] = item end
+            env[name] = copy
+        else
+            env[name] = value
+        end
+    end
+    env._G = env
+    -- Method calls on strings (s:upper()) see the case's string table, as in plain Lua
+    string_meta.__index = env.string
+
+    local function capture(...)
+        for i = 1, select("#", ...) do
+            out[#out + 1] = tostring((select(i, ...)))
+        end
+    end
+    local captured = {}
+    function captured.write(self, ...) capture(...) return self end
+    function captured.flush(self) return self end
+    function captured.close() return true end
+
+    env.print = function(...)
+        for i = 1, select("#", ...) do
+            if i > 1 then out[#out + 1] = "\t" end
+            out[#out + 1] = tostring((select(i, ...)))
+        end
+        out[#out + 1] = "\n"
+    end
+    env.io.stdout = captured
+    env.io.write = function(...) capture(...) return captured end
+    return env
+end
+
+local function run_case(prelude_name, chunkname, code)
+    local out = {}
+    local fn, err = load_chunk(code, "=" .. chunkname)
+    if not fn then return "error", "", err end
+
+    local prelude = preludes[prelude_name]
+    local env = fresh_env(out)
+    collectgarbage("collect")
+    local ok, run_err = xpcall(function()
+        if prelude then bind(prelude, env)() end
+        bind(fn, env)()
+    end, function(e) return tostring(e) end)
+    if ok then return "ok", table.concat(out), "" end
+    return "error", table.concat(out), run_err
+end
+
+local function respond(status, out, err)
+    stdout:write(status, " ", #out, " ", #err, "\n", out, err)
+    stdout:flush()
+end
+
+while true do
+    local header = stdin:read("*l")
+    if not header then break end
+    local fields = {}
+    for word in header:gmatch("%S+") do fields[#fields + 1] = word end
+    local parts = {}
+    for i = 2, #fields do
+        local size = tonumber(fields[i])
+        parts[i - 1] = size > 0 and stdin:read(size) or ""
+    end
+
+    if fields[1] == "prelude" then
+        local fn, err = load_chunk(parts[2], "=" .. parts[1])
+        if fn then
+            preludes[parts[1]] = fn
+            respond("ok", "", "")
+        else
+            respond("error", "", err)
+        end
+    elseif fields[1] == "run" then
+        respond(run_case(parts[1], parts[2], parts[3]))
+    else
+        respond("error", "", "unknown command: " .. tostring(fields[1]))
+    end
+end
+'''
+
+# Lines of worker stderr kept for crash reports
+STDERR_LINES = 50
+
+
+class LuaWorker:
+    def __init__(self, lua_path, script_path):
+        self.lua_path = lua_path
+        self.script_path = script_path
+        self.process = None
+        self.loaded = set()
+        self.restarts = 0
+        self._responses = None
+        self._stderr = deque(maxlen=STDERR_LINES)
+
+    def start(self):
+        """Launch the interpreter and the threads that read its output."""
+        self.process = subprocess.Popen(
+            [self.lua_path, self.script_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        self.loaded = set()
+        self._responses = queue.Queue()
+        self._stderr = deque(maxlen=STDERR_LINES)
+        threading.Thread(target=self._read_responses, args=(self.process, self._responses),
+                         daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self.process, self._stderr),
+                         daemon=True).start()
+
+    def stop(self):
+        """Kill the interpreter; the next request starts a new one."""
+        self.loaded = set()
+        if self.process is None:
+            return
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        for stream in (self.process.stdin, self.process.stdout, self.process.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self.process = None
+
+    @staticmethod
+    def _read_responses(process, responses):
+        """Decode response frames until the worker exits; None marks EOF."""
+        stdout = process.stdout
+        try:
+            while True:
+                header = stdout.readline()
+                if not header:
+                    break
+                status, out_size, err_size = header.split()
+                out = stdout.read(int(out_size)).decode('utf-8', 'replace')
+                err = stdout.read(int(err_size)).decode('utf-8', 'replace')
+                responses.put((status.decode('ascii'), out, err))
+        except (OSError, ValueError):
+            pass
+        responses.put(None)
+
+    @staticmethod
+    def _read_stderr(process, lines):
+        try:
+            for line in process.stderr:
+                lines.append(line.decode('utf-8', 'replace').rstrip())
+        except (OSError, ValueError):
+            pass
+
+    def _restart_result(self, message):
+        """Stop the worker after a hang or crash and describe what happened."""
+        self.stop()
+        self.restarts += 1
+        return {'returncode': 1, 'stdout': '', 'stderr': message, 'timed_out': False, 'restarted': True}
+
+    def request(self, command, fields, timeout):
+        """Send one framed request and wait up to timeout seconds for the reply."""
+        if self.process is None or self.process.poll() is not None:
+            self.stop()
+            self.start()
+
+        payloads = [field.encode('utf-8') for field in fields]
+        header = ' '.join([command] + [str(len(payload)) for payload in payloads]) + '\n'
+        try:
+            self.process.stdin.write(header.encode('ascii') + b''.join(payloads))
+            self.process.stdin.flush()
+        except OSError:
+            return self._restart_result("Lua worker crashed: " + '\n'.join(self._stderr))
+
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            result = self._restart_result("Timeout")
+            result['timed_out'] = True
+            return result
+
+        if response is None:
+            self.process.wait()
+            stderr = '\n'.join(self._stderr) or f"exit code {self.process.returncode}"
+            return self._restart_result(f"Lua worker crashed: {stderr}")
+
+        status, out, err = response
+        return {'returncode': 0 if status == 'ok' else 1, 'stdout': out, 'stderr': err,
+                'timed_out': False, 'restarted': False}
+
+    def run(self, code, prelude_name, prelude_source, name, timeout):
+        """Run code after the named prelude, compiling the prelude on first use."""
+        if prelude_name and prelude_name not in self.loaded:
+            result = self.request('prelude', [prelude_name, prelude_source], timeout)
+            if result['returncode'] != 0:
+                return result
+            self.loaded.add(prelude_name)
+        return self.request('run', [prelude_name or '', name, code], timeout)
+
+
+class LuaWorkerPool:
+    def __init__(self, lua_path, size=1):
+        self.lua_path = lua_path
+        self.size = max(1, size)
+        self.preludes = {}
+        self._workers = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._script_dir = None
+        self._script_path = None
+
+    def add_prelude(self, name, source):
+        """Register code (usually Mudlet mocks) that cases can run on top of."""
+        if self.preludes.get(name) == source:
+            return
+        with self._lock:
+            self.preludes[name] = source
+            # Workers that compiled an older version must reload it
+            for worker in self._workers:
+                worker.loaded.discard(name)
+
+    def _worker_script(self):
+        if self._script_path is None:
+            self._script_dir = tempfile.TemporaryDirectory(prefix='luminari-lua-')
+            self._script_path = os.path.join(self._script_dir.name, 'worker.lua')
+            with open(self._script_path, 'w', encoding='utf-8') as f:
+                f.write(WORKER_SOURCE)
+        return self._script_path
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = LuaWorker(self.lua_path, self._worker_script())
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def run(self, code, prelude=None, name='test', timeout=10):
+        """Run one test case in a fresh environment on an idle worker.
+
+        Returns a dict with returncode (0 when the chunk ran without an
+        uncaught error), stdout (everything printed), stderr (the error
+        message), timed_out and restarted. A worker that hangs past timeout
+        or crashes is killed and transparently restarted for the next case;
+        restarted marks the result of the case that brought it down.
+        """
+        worker = self._acquire()
+        try:
+            return worker.run(code, prelude, self.preludes.get(prelude, ''), name, timeout)
+        finally:
+            self._idle.put(worker)
+
+    @property
+    def restarts(self):
+        return sum(worker.restarts for worker in self._workers)
+
+    def close(self):
+        """Stop every worker and remove the worker script."""
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            self._idle = queue.Queue()
+            if self._script_dir is not None:
+                self._script_dir.cleanup()
+                self._script_dir = None
+                self._script_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Run Lua files through a persistent worker')
+    parser.add_argument('files', nargs='+', help='Lua files to run, each in a fresh environment')
+    parser.add_argument('--lua', default='lua', help='Lua interpreter to use')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-file timeout in seconds')
+
+    args = parser.parse_args()
+
+    failed = 0
+    with LuaWorkerPool(args.lua) as pool:
+        for path in args.files:
+            with open(path, encoding='utf-8') as f:
+                code = f.read()
+            start = time.perf_counter()
+            result = pool.run(code, name=os.path.basename(path), timeout=args.timeout)
+            elapsed = (time.perf_counter() - start) * 1000
+            sys.stdout.write(result['stdout'])
+            if result['returncode'] != 0:
+                failed += 1
+                print(f"✗ {path}: {result['stderr']}")
+            else:
+                print(f"✓ {path} ({elapsed:.1f} ms)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
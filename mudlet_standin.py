@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+"""
+Mudlet API Stand-in for LuminariGUI
+Loads the package's real script bodies into a plain Lua interpreter on top of
+a small stateful imitation of the Mudlet API (mapper, events, Geyser widgets),
+so the shipped handlers can be driven with MSDP fixtures and timed.
+"""
+
+import os
+import re
+import sys
+import json
+
+# Script bodies Mudlet runs when the profile loads, in document order
+SCRIPT_CONTAINERS = ('Script', 'ScriptGroup')
+
+# Script bodies Mudlet runs on a matching line or command; compiled, not run
+MATCH_CONTAINERS = ('Trigger', 'Alias')
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'mock_data')
+
+# Events raised after the scripts are loaded, as Mudlet does when a profile
+# starts and connects to an MSDP game
+STARTUP_EVENTS = (
+    ('sysLoadEvent',),
+    ('sysConnectionEvent',),
+    ('sysProtocolEnabled', 'MSDP'),
+)
+
+# The Mudlet API the package calls. Output goes to per-window buffers,
+# timers and temporary triggers are recorded but never fire, and the mapper
+# keeps real room, area and exit state so make_room/handle_move take the
+# same branches they take in Mudlet.
+STANDIN_SOURCE = r'''
+standin = {
+    report = print,
+    windows = {},
+    handlers = {},
+    timers = {},
+    errors = {},
+    loaded = {},
+    -- Scripts that failed on the first pass, retried once the rest has loaded
+    deferred = {},
+    -- Trigger and alias bodies by path, run with matches/line set
+    bodies = {},
+    next_id = 0
+}
+
+local function next_id()
+    standin.next_id = standin.next_id + 1
+    return standin.next_id
+end
+
+local function noop() end
+
+local function window(name)
+    name = name or "main"
+    local buffer = standin.windows[name]
+    if not buffer then
+        buffer = {}
+        standin.windows[name] = buffer
+    end
+    return buffer
+end
+
+-- Keep only the latest lines so long benchmarks do not grow without bound
+local function write(name, text)
+    local buffer = window(name)
+    buffer[#buffer + 1] = tostring(text)
+    if #buffer > 200 then
+        for i = 1, 100 do table.remove(buffer, 1) end
+    end
+end
+
+-- Output: the main window unless a window name comes first
+local function echo_to(...)
+    local count = select("#", ...)
+    if count >= 2 then
+        write((select(1, ...)), (select(2, ...)))
+    else
+        write("main", (select(1, ...)))
+    end
+end
+
+function print(...)
+    local parts = {}
+    for i = 1, select("#", ...) do parts[i] = tostring((select(i, ...))) end
+    write("main", table.concat(parts, "\t"))
+end
+
+echo, cecho, decho, hecho, display = echo_to, echo_to, echo_to, echo_to, print
+function clearWindow(name) standin.windows[name or "main"] = {} end
+clearUserWindow = clearWindow
+appendBuffer, copy, deleteLine, selectCurrentLine = noop, noop, noop, noop
+setWindowWrap, setMiniConsoleFontSize, setBgColor, setProfileStyleSheet = noop, noop, noop, noop
+enableHorizontalScrollBar, disableHorizontalScrollBar = noop, noop
+setBorderTop, setBorderBottom, setBorderLeft, setBorderRight = noop, noop, noop, noop
+playSoundFile, sendMSDP, downloadFile, loadMap, updateMap, centerview = noop, noop, noop, noop, noop, noop
+
+function getMudletHomeDir() return "/tmp/mudlet" end
+function getMainWindowSize() return 1600, 900 end
+function getFontSize() return 10 end
+function getColumnCount() return 120 end
+function getFgColor() return 192, 192, 192 end
+function getBgColor() return 0, 0, 0 end
+function getTime(as_string) return as_string and os.date("%H:%M:%S") or {hour = 0, min = 0, sec = 0, msec = 0} end
+-- Character cell size in pixels for a font size
+function calcFontSize(size)
+    size = tonumber(size) or getFontSize()
+    return math.floor(size * 0.8 + 0.5), math.floor(size * 1.6 + 0.5)
+end
+
+-- Events: handlers are functions or global names resolved when raised
+function registerAnonymousEventHandler(event, handler)
+    local id = next_id()
+    standin.handlers[event] = standin.handlers[event] or {}
+    table.insert(standin.handlers[event], {id = id, handler = handler})
+    return id
+end
+
+function killAnonymousEventHandler(id)
+    for _, list in pairs(standin.handlers) do
+        for i = #list, 1, -1 do
+            if list[i].id == id then table.remove(list, i) return true end
+        end
+    end
+    return false
+end
+
+function standin.resolve(name)
+    local value = _G
+    for part in tostring(name):gmatch("[^%.]+") do
+        if type(value) ~= "table" then return nil end
+        value = value[part]
+    end
+    return value
+end
+
+-- The inline function registered for an event that a script defines at a line
+function standin.registered(event, source, line)
+    for _, entry in ipairs(standin.handlers[event] or {}) do
+        local handler = entry.handler
+        if type(handler) == "function" then
+            local info = debug.getinfo(handler, "S")
+            if info.source == "=" .. source and info.linedefined == line then return handler end
+        end
+    end
+    return nil
+end
+
+-- Like Mudlet, an error in one handler is logged and the others still run
+function raiseEvent(event, ...)
+    for _, entry in ipairs(standin.handlers[event] or {}) do
+        local handler = entry.handler
+        if type(handler) == "string" then handler = standin.resolve(handler) end
+        if type(handler) == "function" then
+            local ok, err = pcall(handler, event, ...)
+            if not ok then
+                table.insert(standin.errors, event .. " handler: " .. tostring(err))
+            end
+        else
+            table.insert(standin.errors, event .. " handler: " .. tostring(entry.handler) .. " is not a function")
+        end
+    end
+end
+
+function tempTimer(delay, code)
+    local id = next_id()
+    standin.timers[id] = {delay = delay, code = code}
+    return id
+end
+
+function killTimer(id)
+    local found = standin.timers[id] ~= nil
+    standin.timers[id] = nil
+    return found
+end
+
+function tempAlias() return next_id() end
+tempTrigger, tempLineTrigger, tempRegexTrigger = tempAlias, tempAlias, tempAlias
+killAlias, killTrigger = noop, noop
+function exists() return 0 end
+
+-- Mapper; rooms are also indexed by position so lookups stay cheap on big maps
+local rooms, areas, area_names, positions = {}, {}, {}, {}
+standin.rooms = rooms
+
+local function position_key(area, x, y, z)
+    return tostring(area) .. ":" .. x .. ":" .. y .. ":" .. z
+end
+
+local function place(id, area, x, y, z)
+    local room = rooms[id]
+    local old = positions[position_key(room.area, room.x, room.y, room.z)]
+    if old then old[id] = nil end
+    room.area, room.x, room.y, room.z = area, x, y, z
+    local key = position_key(area, x, y, z)
+    positions[key] = positions[key] or {}
+    positions[key][id] = true
+end
+
+function getAreaTable()
+    local copy = {}
+    for name, id in pairs(areas) do copy[name] = id end
+    return copy
+end
+
+function addAreaName(name)
+    if areas[name] then return nil, "area already exists" end
+    local id = #area_names + 1
+    area_names[id] = name
+    areas[name] = id
+    return id
+end
+
+function addRoom(id)
+    if rooms[id] then return false end
+    rooms[id] = {name = "", x = 0, y = 0, z = 0, exits = {}, stubs = {}}
+    place(id, nil, 0, 0, 0)
+    return true
+end
+
+function getRoomName(id)
+    local room = rooms[id]
+    return room and room.name or nil
+end
+
+function setRoomName(id, name) if rooms[id] then rooms[id].name = name end end
+function setRoomArea(id, area)
+    local room = rooms[id]
+    if not room then return false end
+    place(id, area, room.x, room.y, room.z)
+    return true
+end
+
+function setRoomEnv(id, env) if rooms[id] then rooms[id].env = env end end
+function setCustomEnvColor() end
+
+function getRoomCoordinates(id)
+    local room = rooms[id]
+    if not room then return nil end
+    return room.x, room.y, room.z
+end
+
+function setRoomCoordinates(id, x, y, z)
+    local room = rooms[id]
+    if room then place(id, room.area, x, y, z) end
+end
+
+function getRoomsByPosition(area, x, y, z)
+    local found = {}
+    for id in pairs(positions[position_key(area, x, y, z)] or {}) do found[#found + 1] = id end
+    return found
+end
+
+function getAreaRooms(area)
+    local found = {}
+    for id, room in pairs(rooms) do
+        if room.area == area then found[#found + 1] = id end
+    end
+    return found
+end
+
+local direction_names = {
+    "north", "northeast", "northwest", "east", "west",
+    "south", "southeast", "southwest", "up", "down", "in", "out"
+}
+
+function setExit(from, to, direction)
+    local room = rooms[from]
+    local name = direction_names[direction] or direction
+    if not room or not rooms[to] or not name then return false end
+    room.exits[name] = to
+    return true
+end
+
+function setExitStub(id, direction, set)
+    local room = rooms[id]
+    if room then room.stubs[direction] = set or nil end
+end
+
+function getRoomExits(id)
+    local copy = {}
+    local room = rooms[id]
+    if room then
+        for name, to in pairs(room.exits) do copy[name] = to end
+    end
+    return copy
+end
+
+function getExitStubs1(id)
+    local room = rooms[id]
+    if not room or next(room.stubs) == nil then return nil end
+    local stubs = {}
+    for direction in pairs(room.stubs) do stubs[#stubs + 1] = direction end
+    table.sort(stubs)
+    return stubs
+end
+
+-- Mudlet's table and string extensions
+function table.is_empty(t) return next(t) == nil end
+function table.size(t)
+    local count = 0
+    for _ in pairs(t) do count = count + 1 end
+    return count
+end
+function table.contains(t, ...)
+    for _, wanted in ipairs({...}) do
+        for key, value in pairs(t) do
+            if key == wanted or value == wanted then return true end
+            if type(value) == "table" and table.contains(value, wanted) then return true end
+        end
+    end
+    return false
+end
+function table.keys(t)
+    local keys = {}
+    for key in pairs(t) do keys[#keys + 1] = key end
+    return keys
+end
+function table.deepcopy(t)
+    if type(t) ~= "table" then return t end
+    local copy = {}
+    for key, value in pairs(t) do copy[key] = table.deepcopy(value) end
+    return copy
+end
+function table.update(t1, t2)
+    local copy = table.deepcopy(t1)
+    for key, value in pairs(t2) do
+        if type(value) == "table" and type(copy[key]) == "table" then
+            copy[key] = table.update(copy[key], value)
+        else
+            copy[key] = table.deepcopy(value)
+        end
+    end
+    return copy
+end
+function table.index_of(t, wanted)
+    for i, value in ipairs(t) do
+        if value == wanted then return i end
+    end
+    return nil
+end
+function string.findPattern(text, pattern)
+    if not text:find(pattern) then return nil end
+    return text:match(pattern)
+end
+function string.starts(s, prefix) return s:sub(1, #prefix) == prefix end
+function string.ends(s, suffix) return suffix == "" or s:sub(-#suffix) == suffix end
+function string.trim(s) return (s:gsub("^%s+", ""):gsub("%s+$", "")) end
+function string.title(s) return (s:gsub("^%l", string.upper)) end
+function string.split(s, delimiter)
+    local parts = {}
+    delimiter = delimiter or " "
+    local start = 1
+    while true do
+        local first, last = s:find(delimiter, start, true)
+        if not first then break end
+        parts[#parts + 1] = s:sub(start, first - 1)
+        start = last + 1
+    end
+    parts[#parts + 1] = s:sub(start)
+    return parts
+end
+
+-- Files written through Mudlet's helpers are kept in memory
+standin.files = {}
+function io.exists(path) return standin.files[path] ~= nil end
+function table.save(path, t) standin.files[path] = table.deepcopy(t) end
+function table.load(path, t)
+    local saved = standin.files[path]
+    if not saved then return nil, "cannot open " .. tostring(path) end
+    for key, value in pairs(table.deepcopy(saved)) do t[key] = value end
+    return t
+end
+lfs = {}
+function lfs.mkdir(path)
+    standin.files[path] = standin.files[path] or {}
+    return true
+end
+function lfs.attributes(path)
+    if standin.files[path] then return {mode = "file"} end
+    return nil, "cannot obtain information from file " .. tostring(path)
+end
+
+-- Geyser: widgets track their geometry, report sizes through the per-instance
+-- get_width/get_height closures real Geyser provides, and accept any other
+-- method call as a no-op
+Geyser = {}
+color_table = setmetatable({}, {__index = function() return {0, 0, 0} end})
+
+local root = {name = "main"}
+root.get_width = function() return (getMainWindowSize()) end
+root.get_height = function() return select(2, getMainWindowSize()) end
+
+local function extent(value, size)
+    if type(value) == "number" then return value end
+    if type(value) ~= "string" then return size end
+    local percent = value:match("^%s*(-?[%d%.]+)%%%s*$")
+    if percent then return size * tonumber(percent) / 100 end
+    local pixels = tonumber(value:match("^%s*(-?[%d%.]+)") or "")
+    if not pixels then return size end
+    if pixels < 0 then return size + pixels end
+    return pixels
+end
+
+local Widget = {}
+
+local function widget_index(self, key)
+    local method = Widget[key]
+    if method ~= nil then return method end
+    local class = rawget(self, "_class")
+    if class and class[key] ~= nil then return class[key] end
+    return noop
+end
+
+function Widget:add(child)
+    rawset(child, "container", self)
+    local windows = rawget(self, "windowList") or {}
+    windows[#windows + 1] = child
+    rawset(self, "windowList", windows)
+end
+
+function Widget:move(x, y) rawset(self, "x", x) rawset(self, "y", y) end
+function Widget:resize(width, height)
+    if width then rawset(self, "width", width) end
+    if height then rawset(self, "height", height) end
+end
+function Widget:show() rawset(self, "hidden", false) end
+function Widget:hide() rawset(self, "hidden", true) end
+function Widget:echo(text) write(rawget(self, "name"), text) end
+Widget.cecho, Widget.decho, Widget.hecho, Widget.print = Widget.echo, Widget.echo, Widget.echo, Widget.echo
+function Widget:clear() standin.windows[rawget(self, "name")] = {} end
+function Widget:getWindowName() return rawget(self, "name") end
+function Widget:get_x() return extent(rawget(self, "x") or 0, self.container.get_width()) end
+function Widget:get_y() return extent(rawget(self, "y") or 0, self.container.get_height()) end
+
+local function new_class(parent)
+    local class = {}
+    class.__index = class
+    -- Class-level calls such as Adjustable.Container:saveAll() are no-ops too
+    setmetatable(class, {__index = parent or function() return noop end})
+    function class:new(cons, container)
+        cons = cons or {}
+        local widget = {}
+        for key, value in pairs(cons) do widget[key] = value end
+        widget.name = widget.name or ("standin" .. next_id())
+        widget._class = class
+        widget.container = container or root
+        widget.windowList = {}
+        widget.get_width = function() return extent(widget.width or "100%", widget.container.get_width()) end
+        widget.get_height = function() return extent(widget.height or "100%", widget.container.get_height()) end
+        setmetatable(widget, {__index = widget_index})
+        if widget.container ~= root and type(widget.container.add) == "function" then
+            widget.container:add(widget)
+        end
+        if class.setup then class.setup(widget, cons) end
+        return widget
+    end
+    return class
+end
+
+Geyser.Container = new_class()
+Geyser.Label = new_class(Geyser.Container)
+Geyser.MiniConsole = new_class(Geyser.Container)
+Geyser.Mapper = new_class(Geyser.Container)
+Geyser.UserWindow = new_class(Geyser.Container)
+Geyser.VBox = new_class(Geyser.Container)
+Geyser.HBox = new_class(Geyser.Container)
+Geyser.Gauge = new_class(Geyser.Container)
+Geyser.StyleSheet = new_class(Geyser.Container)
+Geyser.Container.new_class = new_class
+Adjustable = {Container = new_class(Geyser.Container)}
+Geyser.Label.Fixed = setmetatable({}, {__index = Geyser.Label})
+Geyser.Label.Dynamic = setmetatable({}, {__index = Geyser.Label})
+
+function Geyser.Gauge.setup(gauge)
+    gauge.back = Geyser.Label:new({name = gauge.name .. "_back"}, gauge)
+    gauge.front = Geyser.Label:new({name = gauge.name .. "_front"}, gauge)
+    gauge.text = Geyser.Label:new({name = gauge.name .. "_text"}, gauge)
+end
+
+function Geyser.Gauge:setValue(current, maximum, text)
+    rawset(self, "value", maximum and maximum ~= 0 and current / maximum or current)
+    if text then self.text:echo(text) end
+end
+
+-- Load one package script into the current environment
+local load_chunk = loadstring or load
+local function compile(source, name)
+    if setfenv then
+        local fn, err = load_chunk(source, "=" .. name)
+        if fn then setfenv(fn, getfenv(1)) end
+        return fn, err
+    end
+    return load(source, "=" .. name, "t", _ENV)
+end
+
+-- A script that raises while it runs may call code a later script defines
+-- (Config builds the boxes with GUI.AdjustableContainers), so on the first
+-- pass it is deferred to standin.load_deferred instead of failing
+function standin.load_script(name, source, retry)
+    local fn, err = compile(source, name)
+    if fn then
+        local ok, run_err = pcall(fn)
+        if ok then
+            standin.loaded[name] = true
+            return true
+        end
+        err = run_err
+        if not retry then
+            standin.loaded[name] = false
+            table.insert(standin.deferred, {name = name, source = source})
+            return false
+        end
+    end
+    standin.loaded[name] = false
+    table.insert(standin.errors, name .. ": " .. tostring(err))
+    return false
+end
+
+-- Run the deferred scripts again, in order, now that every other script has loaded
+function standin.load_deferred()
+    local deferred = standin.deferred
+    standin.deferred = {}
+    for _, script in ipairs(deferred) do
+        standin.load_script(script.name, script.source, true)
+    end
+end
+
+-- Compile a trigger or alias body without running it
+function standin.define_body(name, source)
+    local fn, err = compile(source, name)
+    standin.loaded[name] = fn ~= nil
+    if fn then
+        standin.bodies[name] = fn
+        return true
+    end
+    table.insert(standin.errors, name .. ": " .. tostring(err))
+    return false
+end
+
+-- Fail with every recorded error when a script the benchmark needs did not load
+function standin.require(name)
+    if standin.loaded[name] == nil then
+        error("script not found in the package: " .. name, 0)
+    end
+    if not standin.loaded[name] then
+        error("package script failed to load:\n" .. table.concat(standin.errors, "\n"), 0)
+    end
+end
+'''
+
+
+def lua_string(text):
+    """Quote text as a Lua string literal that is valid on every Lua version."""
+    def escape(match):
+        char = match.group(0)
+        return {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r', '\t': '\\t'}.get(char, f"\\{ord(char):03d}")
+    return '"' + re.sub(r'[\\"\x00-\x1f\x7f]', escape, text) + '"'
+
+
+def lua_long_string(text):
+    """Wrap text in a long bracket whose level does not occur inside it."""
+    level = 0
+    while f"]{'=' * level}]" in text or text.endswith(']' + '=' * level):
+        level += 1
+    equals = '=' * level
+    # A newline right after the opening bracket is dropped by Lua, so add one
+    return f"[{equals}[\n{text}]{equals}]"
+
+
+def lua_literal(value, indent=''):
+    """Render a JSON value (as loaded by json.load) as a Lua constructor."""
+    if value is None:
+        return 'nil'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        return lua_string(value)
+
+    inner = indent + '    '
+    if isinstance(value, (list, tuple)):
+        items = [lua_literal(item, inner) for item in value]
+    else:
+        items = []
+        for key, item in value.items():
+            key = str(key)
+            if re.fullmatch(r'[A-Za-z_]\w*', key):
+                items.append(f"{key} = {lua_literal(item, inner)}")
+            else:
+                items.append(f"[{lua_string(key)}] = {lua_literal(item, inner)}")
+    if not items:
+        return '{}'
+    return '{\n' + ''.join(f"{inner}{item},\n" for item in items) + indent + '}'
+
+
+def load_fixture(name, directory=FIXTURE_DIR):
+    """Load tests/mock_data/mock_msdp_<name>.json."""
+    with open(os.path.join(directory, f"mock_msdp_{name}.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def package_source(scripts, startup_events=STARTUP_EVENTS):
+    """Return Lua that builds the stand-in, loads the scripts and starts the profile.
+
+    scripts are package script records; only the Script and ScriptGroup
+    bodies are run, in the order given, each as its own chunk named after
+    its path so errors point at the script. A script that raises is run
+    again after the others, as it may call code a later script defines;
+    if it fails again, or does not compile, it is recorded in
+    standin.errors and standin.loaded and the rest still load.
+    A script's <eventHandlerList> events are registered to the function
+    named after it, as Mudlet does. Trigger and alias bodies are compiled
+    into standin.bodies.
+    """
+    parts = [STANDIN_SOURCE]
+    for script in scripts:
+        if script['container'] in SCRIPT_CONTAINERS:
+            parts.append(f"standin.load_script({lua_string(script['path'])}, {lua_long_string(script['content'])})\n")
+            for registration in script['event_handlers']:
+                parts.append(f"registerAnonymousEventHandler({lua_string(registration['event'])}, "
+                             f"{lua_string(script['name'])})\n")
+        elif script['container'] in MATCH_CONTAINERS:
+            parts.append(f"standin.define_body({lua_string(script['path'])}, {lua_long_string(script['content'])})\n")
+    parts.append("standin.load_deferred()\n")
+    for event in startup_events:
+        parts.append(f"raiseEvent({', '.join(lua_string(arg) for arg in event)})\n")
+    return ''.join(parts)
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+    from package_model import load_package_model
+    from lua_worker import LuaWorkerPool
+    from test_performance import PerformanceTester
+
+    parser = argparse.ArgumentParser(description='Load the package scripts into the Mudlet stand-in and report what failed')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to load')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--dump', metavar='FILE', help='Also write the generated Lua to FILE')
+
+    args = parser.parse_args()
+
+    errors = []
+    model = load_package_model(args.xml, errors, use_cache=not args.no_cache)
+    if model is None:
+        for error in errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+
+    source = package_source(model.scripts)
+    if args.dump:
+        with open(args.dump, 'w', encoding='utf-8') as f:
+            f.write(source)
+
+    lua_path = PerformanceTester(args.xml, model=model).lua_path
+    if not lua_path:
+        print("lua interpreter not found in PATH")
+        sys.exit(1)
+
+    report = '''
+local names = {}
+for name in pairs(standin.loaded) do names[#names + 1] = name end
+table.sort(names)
+for _, name in ipairs(names) do
+    standin.report((standin.loaded[name] and "ok     " or "FAILED ") .. name)
+end
+for _, err in ipairs(standin.errors) do standin.report("error: " .. err) end
+'''
+    with LuaWorkerPool(lua_path) as pool:
+        pool.add_prelude('standin', source)
+        result = pool.run(report, prelude='standin', name='standin')
+    sys.stdout.write(result['stdout'])
+    if result['returncode'] != 0:
+        print(f"Error: {result['stderr']}")
+        sys.exit(1)
+    sys.exit(1 if 'FAILED ' in result['stdout'] or 'error: ' in result['stdout'] else 0)
+
+
+if __name__ == "__main__":
+    main()
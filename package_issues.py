@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Package Issue Scanner for LuminariGUI
+Single-pass detection of common XML and embedded-script problems, driven by
+the element positions recorded in the package model.
+"""
+
+import re
+import sys
+import time
+
+from package_model import load_package_model, xml_line
+
+# Raw script source: anything XML serializers always escape is reported,
+# except inside CDATA sections
+RAW_BRACKET_PATTERN = re.compile(rb'[<>]')
+RAW_AMPERSAND_PATTERN = re.compile(rb'&(?!(?:lt|gt|amp|quot|apos|#[0-9]+|#x[0-9a-fA-F]+);)')
+
+# Lua comments and string literals, including long brackets like [==[ ... ]==]
+LUA_STRING_PATTERN = re.compile(
+    r'--\[(?P<cdepth>=*)\[.*?\](?P=cdepth)\]|--[^\n]*'
+    r'|\[(?P<ldepth>=*)\[.*?\](?P=ldepth)\]'
+    r'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'',
+    re.DOTALL
+)
+
+HTML_ENTITY_PATTERN = re.compile(r'&(?:[a-zA-Z][a-zA-Z0-9]*|#[0-9]+|#x[0-9a-fA-F]+);')
+
+CONTROL_CHAR_PATTERN = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ufeff]')
+
+
+def _outside_cdata(script):
+    """Yield the (start, end) byte ranges of a script body that lie outside its CDATA sections."""
+    start = script['body_offset']
+    end = script['end_offset'] - len('</script>')
+    for span_start, span_end in script['cdata_spans']:
+        # A body opening with CDATA starts inside the section
+        if span_start > start:
+            yield start, span_start
+        start = max(start, span_end)
+    if start < end:
+        yield start, end
+
+
+def check_raw_markup(scanner, script):
+    """Report raw '<', '>' or '&' in script source outside CDATA sections."""
+    source = scanner.model.source
+    offsets = []
+    for start, end in _outside_cdata(script):
+        # Most scripts contain no raw markup at all; find() rules them out in C
+        if source.find(b'<', start, end) != -1 or source.find(b'>', start, end) != -1:
+            offsets.extend(match.start() for match in RAW_BRACKET_PATTERN.finditer(source, start, end))
+        if source.find(b'&', start, end) != -1:
+            offsets.extend(match.start() for match in RAW_AMPERSAND_PATTERN.finditer(source, start, end))
+
+    for offset in sorted(offsets):
+        char = chr(source[offset])
+        yield scanner.issue_at_offset(
+            offset, script,
+            f"Raw '{char}' in script text should be escaped or wrapped in CDATA"
+        )
+
+
+def check_html_entities(scanner, script):
+    """Report HTML entities inside Lua string literals (double-escaped text)."""
+    content = script['content']
+    if '&' not in content:
+        return
+    for match in LUA_STRING_PATTERN.finditer(content):
+        if match.group(0).startswith('--'):
+            continue
+        for entity in HTML_ENTITY_PATTERN.finditer(match.group(0)):
+            position = match.start() + entity.start()
+            yield scanner.issue_in_script(
+                position, script,
+                f"HTML entity '{entity.group(0)}' inside a Lua string"
+            )
+
+
+def check_control_characters(scanner, script):
+    """Report stray control characters in script text."""
+    content = script['content']
+    for match in CONTROL_CHAR_PATTERN.finditer(content):
+        yield scanner.issue_in_script(
+            match.start(), script,
+            f"Stray control character U+{ord(match.group(0)):04X}"
+        )
+
+
+def check_duplicate_names(scanner):
+    """Report sibling items of the same kind that share a name."""
+    seen = {}
+    for item in scanner.model.items:
+        kind = item['tag'].replace('Group', '')
+        key = (item['parent_offset'], kind, item['name'])
+        first = seen.setdefault(key, item)
+        if first is not item:
+            path = '/'.join(item['folder'] + (item['name'],))
+            yield {
+                'rule': 'duplicate_sibling_name',
+                'line': item['line'],
+                'column': scanner.column_at(item['offset']),
+                'script': path,
+                'message': f"Duplicate {kind} name '{item['name']}' (first defined on line {first['line']})"
+            }
+
+
+# Rules that run once per script, and rules that look at the whole package
+SCRIPT_RULES = {
+    'raw_markup': check_raw_markup,
+    'html_entity_in_string': check_html_entities,
+    'control_character': check_control_characters
+}
+
+PACKAGE_RULES = {
+    'duplicate_sibling_name': check_duplicate_names
+}
+
+
+class IssueScanner:
+    def __init__(self, model, script_rules=None, package_rules=None):
+        self.model = model
+        self.script_rules = SCRIPT_RULES if script_rules is None else script_rules
+        self.package_rules = PACKAGE_RULES if package_rules is None else package_rules
+        self.issues = []
+        self._current_rule = None
+
+    def column_at(self, offset):
+        """Return the 1-based column of a byte offset in the XML file."""
+        return offset - self.model.source.rfind(b'\n', 0, offset)
+
+    def issue_at_offset(self, offset, script, message):
+        """Build an issue located at a byte offset inside a script body.
+
+        Lines are counted from the script's indexed body position, so the
+        cost depends on the script size rather than the package size.
+        """
+        line = script['body_line'] + self.model.source.count(b'\n', script['body_offset'], offset)
+        return {
+            'rule': self._current_rule,
+            'line': line,
+            'column': self.column_at(offset),
+            'script': script['path'],
+            'message': message
+        }
+
+    def issue_in_script(self, position, script, message):
+        """Build an issue located at a character position inside script text."""
+        content = script['content']
+        script_line = content.count('\n', 0, position) + 1
+        line_start = content.rfind('\n', 0, position) + 1
+        column = position - line_start + 1
+        if script_line == 1:
+            column += self.column_at(script['body_offset']) - 1
+        return {
+            'rule': self._current_rule,
+            'line': xml_line(script, script_line),
+            'column': column,
+            'script': script['path'],
+            'message': message
+        }
+
+    def scan(self):
+        """Run every rule over the package and return the issues found."""
+        if self.model.source is None:
+            with open(self.model.xml_file, 'rb') as f:
+                self.model.source = f.read()
+
+        self.issues = []
+        for script in self.model.scripts:
+            for rule_name, rule in self.script_rules.items():
+                self._current_rule = rule_name
+                self.issues.extend(rule(self, script))
+
+        for rule_name, rule in self.package_rules.items():
+            self._current_rule = rule_name
+            self.issues.extend(rule(self))
+
+        self._current_rule = None
+        self.issues.sort(key=lambda issue: (issue['line'] or 0, issue['column']))
+        return self.issues
+
+
+def format_issue(issue):
+    """Format an issue the way validate_package.py prints it."""
+    return (f"Line {issue['line']}, column {issue['column']}: {issue['message']}"
+            f" [{issue['rule']}] ({issue['script']})")
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Scan a LuminariGUI package for common issues')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to scan')
+    parser.add_argument('--rule', action='append', help='Only run the named rule (repeatable)')
+    parser.add_argument('--list-rules', action='store_true', help='List available rules')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+
+    args = parser.parse_args()
+
+    if args.list_rules:
+        for name, rule in {**SCRIPT_RULES, **PACKAGE_RULES}.items():
+            print(f"  {name}: {rule.__doc__}")
+        return
+
+    errors = []
+    model = load_package_model(args.xml, errors, use_cache=not args.no_cache)
+    if model is None:
+        for error in errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+
+    script_rules = package_rules = None
+    if args.rule:
+        script_rules = {name: rule for name, rule in SCRIPT_RULES.items() if name in args.rule}
+        package_rules = {name: rule for name, rule in PACKAGE_RULES.items() if name in args.rule}
+
+    start = time.perf_counter()
+    issues = IssueScanner(model, script_rules, package_rules).scan()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for issue in issues:
+        print(f"  ⚠ {format_issue(issue)}")
+    print(f"\n{len(issues)} issues found in {elapsed:.1f} ms")
+
+    sys.exit(1 if issues else 0)
+
+
+if __name__ == "__main__":
+    main()
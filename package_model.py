@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Package Model for LuminariGUI
+Parses the Mudlet package XML once and exposes an indexed view of its scripts
+that every validation and testing tool can share.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+
+from disk_cache import DiskCache, DEFAULT_CACHE_DIR
+
+# Top-level package sections counted by validate_package.py
+PACKAGE_COMPONENTS = (
+    'TriggerPackage',
+    'AliasPackage',
+    'ScriptPackage',
+    'TimerPackage',
+    'KeyPackage',
+    'ActionPackage'
+)
+
+# Bump whenever the layout of the cached script index changes
+INDEX_FORMAT = 6
+
+
+def default_package_cache():
+    """Return the on-disk cache used for parsed package indexes."""
+    return DiskCache(os.path.join(DEFAULT_CACHE_DIR, 'package'))
+
+
+class PackageModel:
+    def __init__(self, xml_file="LuminariGUI.xml", cache=None):
+        self.xml_file = xml_file
+        self.cache = cache
+        self.digest = None
+        self.from_cache = False
+        self.root_tag = None
+        self.version = None
+        self.components = {}
+        self.scripts = []
+        self.items = []
+        self.source = None
+        self._by_name = {}
+        self._by_container = {}
+
+    def load(self, data=None):
+        """Parse the XML file and build the script index.
+
+        When a cache is configured the index is looked up by the SHA-256 of
+        the XML content first, so an unchanged package is never re-parsed.
+        data, if given, is another version of the file's content (e.g. from
+        git) to index instead of reading the file.
+        Raises FileNotFoundError or ET.ParseError so callers can report
+        failures in their own style.
+        """
+        if data is None:
+            with open(self.xml_file, 'rb') as f:
+                data = f.read()
+
+        self.source = data
+        self.digest = hashlib.sha256(data).hexdigest()
+        cache_key = f"package-v{INDEX_FORMAT}-{self.digest}"
+
+        if self.cache is not None:
+            index = self.cache.get(cache_key)
+            if index is not None:
+                self._restore_index(index)
+                self.from_cache = True
+                return self
+
+        self._parse(data)
+
+        if self.cache is not None:
+            self.cache.put(cache_key, self._export_index())
+        return self
+
+    def _parse(self, data):
+        """Build the script index from raw XML bytes."""
+        info = {}
+        self.items = []
+        self.scripts = index_script_records(data, info, self.items)
+        self.root_tag = info.get('root_tag')
+        self.version = info.get('version')
+        self.components = info.get('components', {})
+        self._build_indexes()
+
+    def _export_index(self):
+        """Return the index as plain data suitable for caching."""
+        return {
+            'root_tag': self.root_tag,
+            'version': self.version,
+            'components': self.components,
+            'scripts': self.scripts,
+            'items': self.items
+        }
+
+    def _restore_index(self, index):
+        """Populate the model from a cached index."""
+        self.root_tag = index['root_tag']
+        self.version = index['version']
+        self.components = index['components']
+        self.scripts = index['scripts']
+        self.items = index['items']
+        self._build_indexes()
+
+    def _build_indexes(self):
+        """Index scripts by name and by owning element type."""
+        self._by_name = {}
+        self._by_container = {}
+        for script in self.scripts:
+            self._by_name.setdefault(script['name'], []).append(script)
+            self._by_container.setdefault(script['container'], []).append(script)
+
+    def subset(self, scripts):
+        """Return a model with this package's metadata but only the given scripts."""
+        model = PackageModel(self.xml_file)
+        model.digest = self.digest
+        model.root_tag = self.root_tag
+        model.version = self.version
+        model.components = self.components
+        model.items = self.items
+        model.source = self.source
+        model.scripts = list(scripts)
+        model._build_indexes()
+        return model
+
+    def __iter__(self):
+        return iter(self.scripts)
+
+    def __len__(self):
+        return len(self.scripts)
+
+    def iter_scripts(self, containers=None):
+        """Iterate scripts, optionally limited to the given element types."""
+        if containers is None:
+            return iter(self.scripts)
+        if isinstance(containers, str):
+            containers = (containers,)
+        return (script for container in containers
+                for script in self._by_container.get(container, []))
+
+    def find_scripts(self, name):
+        """Return every script whose owning item has the given name."""
+        return list(self._by_name.get(name, []))
+
+    def get_script(self, name):
+        """Return the first script with the given name, or None."""
+        matches = self._by_name.get(name)
+        return matches[0] if matches else None
+
+
+def index_script_records(data, info=None, items=None):
+    """Index every script in raw XML bytes with a single expat pass.
+
+    Positions come straight from the parser callbacks, so each record's
+    body_line and body_offset point at the first character of the Lua
+    code in the XML file regardless of how the document is formatted.
+    If an items list is given it receives the position of every named
+    Mudlet item (trigger, alias, script, group, ...) and its parent.
+    Each record's event_handlers lists the events its item's
+    <eventHandlerList> registers it for, as {'event', 'line'} with the
+    line of the <string> in the XML file: Mudlet calls the global
+    function named after the script on those events. Each record's
+    cdata_spans lists the (start, end) byte offsets of the CDATA
+    sections in its body, from '<![CDATA[' to past ']]>'.
+    Raises ET.ParseError for malformed XML.
+    """
+    if info is None:
+        info = {}
+    info['components'] = {tag: 0 for tag in PACKAGE_COMPONENTS}
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = False
+    records = []
+    stack = []  # [tag, item name, line, byte offset] for every open element
+    text = None  # text parts of the <name> or <script> being read
+    script_start = None
+    body_start = None
+    cdata_spans = None  # CDATA sections of the <script> being read
+    cdata_start = None
+    owner = None  # byte offset of the item that owns the last record
+
+    def start_element(tag, attrs):
+        nonlocal text, script_start, body_start, cdata_spans
+        if not stack:
+            info['root_tag'] = tag
+            info['version'] = attrs.get('version')
+        elif len(stack) == 1 and tag in info['components']:
+            info['components'][tag] += 1
+
+        if tag == 'script':
+            script_start = (parser.CurrentLineNumber, parser.CurrentByteIndex)
+            body_start = None
+            cdata_spans = []
+            text = []
+        elif tag == 'name' or (tag == 'string' and stack and stack[-1][0] == 'eventHandlerList'):
+            text = []
+        stack.append([tag, None, parser.CurrentLineNumber, parser.CurrentByteIndex])
+
+    def character_data(data):
+        nonlocal body_start
+        if text is None:
+            return
+        if body_start is None and stack[-1][0] == 'script':
+            body_start = (parser.CurrentLineNumber, parser.CurrentByteIndex)
+        text.append(data)
+
+    def start_cdata():
+        nonlocal cdata_start
+        if stack and stack[-1][0] == 'script':
+            cdata_start = parser.CurrentByteIndex
+
+    def end_cdata():
+        nonlocal cdata_start
+        if cdata_start is not None:
+            cdata_spans.append((cdata_start, parser.CurrentByteIndex + len(']]>')))
+            cdata_start = None
+
+    def end_element(tag):
+        nonlocal text, owner
+        element = stack.pop()
+        if element[1] is not None and items is not None:
+            items.append({
+                'tag': tag,
+                'name': element[1],
+                'folder': tuple(entry[1] for entry in stack if entry[1]),
+                'line': element[2],
+                'offset': element[3],
+                'parent_offset': stack[-1][3] if stack else -1
+            })
+        if tag == 'name' and stack and text is not None:
+            stack[-1][1] = ''.join(text)
+        elif tag == 'string' and len(stack) > 1 and stack[-1][0] == 'eventHandlerList' and text is not None:
+            if records and stack[-2][3] == owner and ''.join(text).strip():
+                records[-1]['event_handlers'].append({'event': ''.join(text).strip(), 'line': element[2]})
+        elif tag == 'script' and stack and text is not None:
+            content = ''.join(text)
+            if content.strip():
+                item_name = stack[-1][1] or "unnamed"
+                folder = tuple(entry[1] for entry in stack[:-1] if entry[1])
+                records.append({
+                    'name': item_name,
+                    'container': stack[-1][0],
+                    'folder': folder,
+                    'path': '/'.join(folder + (item_name,)),
+                    'content': content,
+                    'line': script_start[0],
+                    'end_line': parser.CurrentLineNumber,
+                    'offset': script_start[1],
+                    'end_offset': parser.CurrentByteIndex + len('</script>'),
+                    'body_line': body_start[0],
+                    'body_offset': body_start[1],
+                    'cdata_spans': cdata_spans,
+                    'event_handlers': []
+                })
+                owner = stack[-1][3]
+        text = None
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = character_data
+    parser.StartCdataSectionHandler = start_cdata
+    parser.EndCdataSectionHandler = end_cdata
+
+    try:
+        parser.Parse(data, True)
+    except expat.ExpatError as e:
+        error = ET.ParseError(str(e))
+        error.code = e.code
+        error.position = (e.lineno, e.offset)
+        raise error
+
+    return records
+
+
+def xml_line(script, lua_line):
+    """Map a 1-based line inside a script body to its line in the XML file."""
+    body_line = script.get('body_line')
+    if not body_line or not lua_line:
+        return None
+    return body_line + int(lua_line) - 1
+
+
+def remap_lua_error(message, label, script, xml_file="LuminariGUI.xml"):
+    """Annotate 'label:N:' locations in Lua tool output with XML file lines.
+
+    luac, luacheck and the lua runtime all report 'chunk:line:' positions
+    relative to the temporary file a script was written to. Given the
+    label that replaced the temp path, each location is rewritten as
+    'label:N (LuminariGUI.xml:M):'; an optional column ('label:N:C:', as
+    reported by lua_parser) is kept.
+    """
+    xml_name = os.path.basename(xml_file)
+    pattern = re.compile(re.escape(label) + r':(\d+)(:\d+)?:')
+
+    def annotate(match):
+        line = xml_line(script, match.group(1))
+        if line is None:
+            return match.group(0)
+        return f"{label}:{match.group(1)}{match.group(2) or ''} ({xml_name}:{line}):"
+
+    return pattern.sub(annotate, message)
+
+
+def strip_xml_lines(message, xml_file="LuminariGUI.xml"):
+    """Remove the ' (LuminariGUI.xml:M)' annotations added by remap_lua_error.
+
+    What is left only depends on the script text, so it can be cached
+    and annotated again for wherever the script sits in the XML.
+    """
+    xml_name = os.path.basename(xml_file)
+    return re.sub(r' \(' + re.escape(xml_name) + r':\d+\)', '', message)
+
+
+def iter_script_records(source, info=None):
+    """Stream script records from an XML file path or binary file object.
+
+    Built on ElementTree's pull parser: the document is fed one line at a
+    time, ancestor context is kept on a small stack and every finished
+    element is detached from its parent, so memory stays bounded by the
+    nesting depth instead of the package size. Each record carries the
+    item name, owning element type, folder path, text and the line and
+    byte span of its <script> element, and the events of its item's
+    <eventHandlerList> (see index_script_records); a record is yielded
+    once that list, which follows the <script>, has been read. If given,
+    the info dict receives the root tag, version and top-level component
+    counts.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_script_records(f, info)
+        return
+
+    if info is None:
+        info = {}
+    info['components'] = {tag: 0 for tag in PACKAGE_COMPONENTS}
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []  # [element, item name] for every open element
+    script_start = (0, 0, 0)
+    line_no = 0
+    offset = 0
+    pending = None  # [owning item element, record] until its eventHandlerList is read
+
+    def drain(raw):
+        nonlocal script_start, pending
+        for event, elem in parser.read_events():
+            if pending is not None and event == 'start' and elem.tag not in ('eventHandlerList', 'string'):
+                yield pending[1]
+                pending = None
+            if event == 'start':
+                if not stack:
+                    info['root_tag'] = elem.tag
+                    info['version'] = elem.get('version')
+                elif len(stack) == 1 and elem.tag in info['components']:
+                    info['components'][elem.tag] += 1
+                if elem.tag == 'script':
+                    column = max(raw.find(b'<script'), 0)
+                    body_column = raw.find(b'>', column) + 1
+                    script_start = (line_no, offset + column, offset + body_column)
+                stack.append([elem, None])
+                continue
+
+            stack.pop()
+            if pending is not None and elem is pending[0]:
+                yield pending[1]
+                pending = None
+            if elem.tag == 'name' and stack:
+                stack[-1][1] = elem.text
+            elif elem.tag == 'string' and len(stack) > 1 and stack[-1][0].tag == 'eventHandlerList':
+                if pending is not None and stack[-2][0] is pending[0] and (elem.text or '').strip():
+                    pending[1]['event_handlers'].append({'event': elem.text.strip(), 'line': line_no})
+            elif elem.tag == 'script' and stack:
+                content = elem.text or ""
+                if content.strip():
+                    column = raw.find(b'</script>')
+                    end_offset = offset + (column + len(b'</script>') if column >= 0 else len(raw))
+                    item_name = stack[-1][1] or "unnamed"
+                    folder = tuple(name for _, name in stack[:-1] if name)
+                    pending = [stack[-1][0], {
+                        'name': item_name,
+                        'container': stack[-1][0].tag,
+                        'folder': folder,
+                        'path': '/'.join(folder + (item_name,)),
+                        'content': content,
+                        'line': script_start[0],
+                        'end_line': line_no,
+                        'offset': script_start[1],
+                        'end_offset': end_offset,
+                        'body_line': script_start[0],
+                        'body_offset': script_start[2],
+                        'event_handlers': []
+                    }]
+
+            # Drop the finished element so the tree never grows
+            if stack:
+                parent = stack[-1][0]
+                if len(parent) and parent[-1] is elem:
+                    del parent[-1]
+            elem.clear()
+
+    raw = b''
+    for raw in source:
+        line_no += 1
+        parser.feed(raw)
+        yield from drain(raw)
+        offset += len(raw)
+
+    parser.close()
+    yield from drain(raw)
+    if pending is not None:
+        yield pending[1]
+
+
+def stream_package_scripts(xml_file, errors):
+    """Stream script records, appending failures to errors like the testers do."""
+    if not os.path.exists(xml_file):
+        errors.append(f"XML file not found: {xml_file}")
+        return
+
+    try:
+        yield from iter_script_records(xml_file)
+    except ET.ParseError as e:
+        errors.append(f"XML parsing error: {e}")
+
+
+def load_package_model(xml_file, errors, use_cache=True):
+    """Load a PackageModel, appending failures to errors like the testers do."""
+    if not os.path.exists(xml_file):
+        errors.append(f"XML file not found: {xml_file}")
+        return None
+
+    cache = default_package_cache() if use_cache else None
+    try:
+        return PackageModel(xml_file, cache=cache).load()
+    except ET.ParseError as e:
+        errors.append(f"XML parsing error: {e}")
+        return None
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show the script index of a LuminariGUI package')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to index')
+    parser.add_argument('--container', help='Only list scripts owned by this element type (e.g. Script, Trigger)')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse the XML instead of using the cached index')
+    parser.add_argument('--clear-cache', action='store_true', help='Delete all cached package indexes and exit')
+
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        default_package_cache().clear()
+        print("Package index cache cleared")
+        return
+
+    errors = []
+    model = load_package_model(args.xml, errors, use_cache=not args.no_cache)
+    if model is None:
+        for error in errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+
+    source = "cache" if model.from_cache else "XML"
+    print(f"Scripts in {args.xml} (version {model.version}, loaded from {source}):")
+    for script in model.iter_scripts(args.container):
+        print(f"  {script['line']:>5}  {script['container']:<12} {script['path']}")
+    print(f"\nTotal: {len(model)} scripts")
+
+
+if __name__ == "__main__":
+    main()
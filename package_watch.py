@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Package Watcher for LuminariGUI
+Polls the package XML and reports which embedded scripts changed between saves,
+so validation and tests only need to re-check those scripts.
+"""
+
+import os
+import sys
+import time
+import hashlib
+
+from package_model import load_package_model
+
+# How often the XML file is stat()ed; a change is processed once the file has
+# been stable for one poll, so results appear within two intervals of a save
+DEFAULT_POLL_INTERVAL = 0.25
+
+
+def script_key(script):
+    """Return the identity of a script across saves (owning type and folder path)."""
+    return f"{script['container']}:{script['path']}"
+
+
+def script_fingerprints(model):
+    """Map every script in the model to the SHA-1 of its text and <eventHandlerList> events."""
+    fingerprints = {}
+    for script in model.scripts:
+        key = script_key(script)
+        # Sibling items may share a name; number the repeats in document order
+        unique_key = key
+        count = 1
+        while unique_key in fingerprints:
+            count += 1
+            unique_key = f"{key}#{count}"
+        events = ''.join(f"\0{registration['event']}" for registration in script['event_handlers'])
+        fingerprints[unique_key] = (hashlib.sha1((script['content'] + events).encode('utf-8')).hexdigest(), script)
+    return fingerprints
+
+
+def diff_fingerprints(old, new):
+    """Return (changed or added scripts, removed script keys) between two snapshots."""
+    changed = [script for key, (digest, script) in new.items()
+               if key not in old or old[key][0] != digest]
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+class PackageWatcher:
+    def __init__(self, xml_file="LuminariGUI.xml", interval=DEFAULT_POLL_INTERVAL):
+        self.xml_file = xml_file
+        self.interval = interval
+        self.model = None
+        self.fingerprints = {}
+        self.errors = []
+        self._state = None
+        self._pending = None
+
+    def _file_state(self):
+        """Return what identifies one version of the XML file on disk."""
+        try:
+            st = os.stat(self.xml_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self):
+        """Parse the current XML without touching the on-disk index cache."""
+        # Every save has a new digest, so caching intermediate versions only churns the cache
+        errors = []
+        model = load_package_model(self.xml_file, errors, use_cache=False)
+        self.errors = errors
+        return model
+
+    def snapshot(self):
+        """Load the package and remember its per-script hashes as the baseline."""
+        self._state = self._file_state()
+        self._pending = None
+        model = self._load()
+        if model is not None:
+            self.model = model
+            self.fingerprints = script_fingerprints(model)
+        return model
+
+    def poll(self):
+        """Check the XML once and return a change record, or None if nothing to do.
+
+        The record holds the new model, the scripts whose text changed or
+        that were added, the keys of removed scripts and any load errors.
+        A file that fails to parse keeps the previous baseline, so the
+        next good save is still diffed against the last good version.
+        """
+        state = self._file_state()
+        if state is None or state == self._state:
+            self._pending = None
+            return None
+
+        # Wait until the editor has finished writing before parsing
+        if state != self._pending:
+            self._pending = state
+            return None
+
+        self._state = state
+        self._pending = None
+        model = self._load()
+        if model is None:
+            return {'model': None, 'changed': [], 'removed': [], 'errors': list(self.errors)}
+
+        fingerprints = script_fingerprints(model)
+        changed, removed = diff_fingerprints(self.fingerprints, fingerprints)
+        self.model = model
+        self.fingerprints = fingerprints
+        return {'model': model, 'changed': changed, 'removed': removed, 'errors': []}
+
+    def run(self, on_change):
+        """Poll until interrupted, calling on_change(change) for every save."""
+        print(f"Watching {self.xml_file} for changes (Ctrl+C to stop)...")
+        try:
+            while True:
+                change = self.poll()
+                if change is not None:
+                    on_change(change)
+                    print(f"\nWatching {self.xml_file} for changes (Ctrl+C to stop)...")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+
+
+def print_change(change):
+    """Print a one-screen summary of a change record."""
+    print("\n" + "=" * 50)
+    print(f"[{time.strftime('%H:%M:%S')}] Package changed")
+    for error in change['errors']:
+        print(f"  ✗ {error}")
+    for script in change['changed']:
+        print(f"  ~ {script['path']} ({script['container']})")
+    for key in change['removed']:
+        print(f"  - {key}")
+    if change['model'] is not None and not change['changed'] and not change['removed']:
+        print("  No script changes")
+    print("=" * 50)
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Report which LuminariGUI scripts change on each save')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to watch')
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL, help='Polling interval in seconds')
+
+    args = parser.parse_args()
+
+    watcher = PackageWatcher(args.xml, interval=args.interval)
+    if watcher.snapshot() is None:
+        for error in watcher.errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+
+    print(f"Tracking {len(watcher.fingerprints)} scripts")
+    watcher.run(print_change)
+
+
+if __name__ == "__main__":
+    main()
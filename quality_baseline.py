@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Quality Baseline for LuminariGUI
+Stores fingerprints of known luacheck issues so quality analysis can report
+only the issues introduced since the baseline was last refreshed.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+from collections import Counter
+
+DEFAULT_BASELINE_FILE = os.path.join("tests", "test_configs", "luacheck_baseline.json")
+
+# Bump whenever the fingerprint recipe changes; older baselines are ignored
+BASELINE_FORMAT = 1
+
+# Line numbers inside messages ("shadowing upvalue 'x' on line 12") move with edits
+LINE_REFERENCE_PATTERN = re.compile(r'\bon line \d+')
+
+
+def normalize_message(message):
+    """Drop the parts of a luacheck message that change when code moves."""
+    message = LINE_REFERENCE_PATTERN.sub('on line N', message)
+    return ' '.join(message.split())
+
+
+def issue_fingerprint(script_path, code, message, source_line):
+    """Return the fingerprint of an issue that survives line shifts.
+
+    It combines the script path, the warning code, the normalized
+    message and a hash of the offending line's text with surrounding
+    whitespace removed, but not the line number itself.
+    """
+    line_hash = hashlib.sha1(source_line.strip().encode('utf-8')).hexdigest()
+    key = '\0'.join((script_path, code, normalize_message(message), line_hash))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class QualityBaseline:
+    def __init__(self, baseline_file=DEFAULT_BASELINE_FILE):
+        self.baseline_file = baseline_file
+        # fingerprint -> number of identical issues accepted in the baseline
+        self.counts = Counter()
+        self.entries = []
+        self.errors = []
+
+    def load(self):
+        """Load the baseline file; return False if it is missing or unusable."""
+        try:
+            with open(self.baseline_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            self.errors.append(f"Could not read baseline {self.baseline_file}: {e}")
+            return False
+
+        if data.get('format') != BASELINE_FORMAT:
+            self.errors.append(f"Baseline {self.baseline_file} uses an old format; refresh it with --update-baseline")
+            return False
+
+        self.entries = data.get('issues', [])
+        self.counts = Counter({entry['fingerprint']: entry.get('count', 1) for entry in self.entries})
+        return True
+
+    def new_issues(self, issues):
+        """Return the issues not covered by the baseline, in their original order.
+
+        A fingerprint accepted n times covers its first n occurrences, so a
+        copy of an existing warning still shows up as new.
+        """
+        remaining = Counter(self.counts)
+        new = []
+        for issue in issues:
+            fingerprint = issue['fingerprint']
+            if remaining[fingerprint] > 0:
+                remaining[fingerprint] -= 1
+            else:
+                new.append(issue)
+        return new
+
+    def save(self, issues):
+        """Replace the baseline with the given issues."""
+        self.counts = Counter(issue['fingerprint'] for issue in issues)
+        entries = {}
+        for issue in issues:
+            entry = entries.setdefault(issue['fingerprint'], {
+                'fingerprint': issue['fingerprint'],
+                'script': issue['script'],
+                'code': issue['code'],
+                'message': normalize_message(issue['message']),
+                'count': 0
+            })
+            entry['count'] += 1
+
+        self.entries = sorted(entries.values(), key=lambda entry: (entry['script'], entry['code'], entry['message']))
+        directory = os.path.dirname(self.baseline_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.baseline_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': BASELINE_FORMAT,
+                'issues': self.entries
+            }, f, indent=2)
+            f.write('\n')
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show the accepted luacheck issues in a quality baseline')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_FILE, help='Baseline file to read')
+
+    args = parser.parse_args()
+
+    baseline = QualityBaseline(args.baseline)
+    if not baseline.load():
+        for error in baseline.errors:
+            print(f"Error: {error}")
+        if not baseline.errors:
+            print(f"No baseline at {args.baseline}; create one with: python3 test_lua_quality.py --update-baseline")
+        sys.exit(1)
+
+    by_code = Counter()
+    for entry in baseline.entries:
+        by_code[entry['code']] += entry['count']
+    print(f"{sum(by_code.values())} accepted issues in {args.baseline}")
+    for code, count in sorted(by_code.items()):
+        print(f"  {code}: {count}")
+
+
+if __name__ == "__main__":
+    main()
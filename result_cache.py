@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Result Cache for LuminariGUI Testing
+Remembers per-script and per-case suite outcomes on disk, keyed by everything
+that can change them, so re-running the suites only repeats work whose inputs
+changed.
+"""
+
+import os
+import hashlib
+import threading
+import subprocess
+
+from disk_cache import DiskCache, DEFAULT_CACHE_DIR
+
+# Bump whenever the layout of cached outcomes changes
+RESULT_FORMAT = 1
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def file_signature(path):
+    """Identify a file version cheaply by its resolved path, size and mtime."""
+    path = os.path.realpath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path
+    return f"{path}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def tool_version(path, flag='-v'):
+    """Return the version banner of an executable plus its file signature.
+
+    The banner is read once per process; the signature catches a tool
+    that was upgraded in place without changing its banner.
+    """
+    with _versions_lock:
+        if (path, flag) not in _versions:
+            try:
+                result = subprocess.run(
+                    [path, flag],
+                    stdin=subprocess.DEVNULL,
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+                banner = (result.stdout + result.stderr).strip()
+            except (OSError, subprocess.TimeoutExpired):
+                banner = ''
+            _versions[(path, flag)] = banner
+        banner = _versions[(path, flag)]
+    return f"{banner}\0{file_signature(path)}"
+
+
+def content_digest(*parts):
+    """Return the SHA-256 of a sequence of str/bytes parts, unambiguously framed."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode('utf-8')
+        digest.update(str(len(part)).encode('ascii') + b':' + part)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache = cache or DiskCache(os.path.join(DEFAULT_CACHE_DIR, 'results'), max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, suite, *parts):
+        """Build the key of one outcome from its suite and everything it depends on."""
+        return content_digest(RESULT_FORMAT, suite, *parts)
+
+    def get(self, key):
+        """Return the stored outcome for key, or None if it has to be recomputed."""
+        value = self.cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.cache.put(key, value)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or clear the cached test results')
+    parser.add_argument('--clear', action='store_true', help='Remove every cached result')
+
+    args = parser.parse_args()
+
+    cache = ResultCache()
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {cache.cache.directory}")
+        return
+
+    count = 0
+    total = 0
+    try:
+        with os.scandir(cache.cache.directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    count += 1
+                    total += entry.stat().st_size
+    except FileNotFoundError:
+        pass
+    print(f"{count} cached results ({total / 1024:.1f} KB) in {cache.cache.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,29 +5,188 @@ Orchestrates all testing suites and provides unified reporting.
 """
 
 import os
+import io
 import sys
 import subprocess
 import json
 import time
 import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextlib
+import multiprocessing.util
+import sqlite3
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # Import test modules
 try:
+    from package_model import load_package_model
     from test_lua_syntax import LuaSyntaxTester
     from test_lua_quality import LuaQualityAnalyzer
     from test_functions import LuaFunctionTester
     from test_events import EventSystemTester
     from test_system import SystemTester
     from test_performance import PerformanceTester
+    from package_watch import PackageWatcher, print_change, DEFAULT_POLL_INTERVAL
+    from lua_worker import LuaWorkerPool
+    from result_cache import ResultCache, DEFAULT_MAX_BYTES
+    from disk_cache import DEFAULT_CACHE_DIR
+    from test_impact import ImpactIndex, package_changes
+    from test_report import CaseReporter
+    from test_history import RunHistory, DEFAULT_HISTORY_FILE
+    from benchmark_baseline import (BenchmarkBaseline, compare_with_baseline, DEFAULT_MAX_REGRESSION, DEFAULT_DIFF_FILE,
+                                    DEFAULT_BASELINE_RUNS)
 except ImportError as e:
     print(f"Error importing test modules: {e}")
     sys.exit(1)
 
+# Suites that run Lua test cases and share the persistent worker pool
+LUA_RUNTIME_SUITES = (LuaFunctionTester, EventSystemTester, SystemTester, PerformanceTester)
+
+# Suites whose per-script or per-case outcomes are deterministic and cached
+CACHED_SUITES = (LuaSyntaxTester, LuaQualityAnalyzer, LuaFunctionTester, EventSystemTester)
+
+DEFAULT_SETTINGS_FILE = os.path.join("tests", "test_configs", "test_settings.json")
+
+# Wall time of every suite and runtime case, used to schedule the next run
+DEFAULT_TIMINGS_FILE = os.path.join(DEFAULT_CACHE_DIR, "test_timings.json")
+
+# Section of test_settings.json that configures each suite
+SUITE_SETTINGS = {
+    LuaSyntaxTester: 'syntax_tests',
+    LuaQualityAnalyzer: 'quality_tests',
+    LuaFunctionTester: 'function_tests',
+    EventSystemTester: 'event_tests',
+    SystemTester: 'system_tests',
+    PerformanceTester: 'performance_tests'
+}
+
+def load_test_settings(settings_file=DEFAULT_SETTINGS_FILE):
+    """Load the runner settings; a missing or unreadable file means defaults."""
+    try:
+        with open(settings_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring {settings_file}: {e}")
+        return {}
+
+def load_test_timings(timings_file=DEFAULT_TIMINGS_FILE):
+    """Load the recorded wall times, keyed "<suite>" or "<suite>::<case>"."""
+    try:
+        with open(timings_file, 'r', encoding='utf-8') as f:
+            timings = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return timings if isinstance(timings, dict) else {}
+
+def save_test_timings(timings, timings_file=DEFAULT_TIMINGS_FILE):
+    """Write the wall times atomically so a killed run never leaves half a file."""
+    directory = os.path.dirname(timings_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = f"{timings_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(timings, f, indent=2, sort_keys=True)
+    os.replace(temp_file, timings_file)
+
+def _timing_key(test_name, case_name=None):
+    return f"{test_name}::{case_name}" if case_name is not None else test_name
+
+# Runner of the current suite worker process, set up once by _init_suite_worker
+_worker_runner = None
+
+def _init_suite_worker(xml_file, use_cache, streaming, cache_size, settings, model, checked_model):
+    """Give a suite worker process its own runner sharing the parent's parsed package."""
+    global _worker_runner
+    _worker_runner = TestRunner(xml_file, use_cache=use_cache, streaming=streaming,
+                                cache_size=cache_size, settings=settings)
+    _worker_runner.model = model
+    _worker_runner.checked_model = checked_model
+    # Cases scheduled on this process share one Lua worker until it exits
+    _worker_runner._start_pool(size=1)
+    multiprocessing.util.Finalize(_worker_runner, _worker_runner._stop_pool, exitpriority=10)
+
+def _run_suite_in_worker(test_name, test_class):
+    """Run one suite in a worker process, capturing everything it prints."""
+    runner = _worker_runner
+    cache = runner.result_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    
+    output = io.StringIO()
+    start = time.time()
+    with contextlib.redirect_stdout(output):
+        result = runner._run_test_suite(test_name, test_class)
+    
+    result['output'] = output.getvalue()
+    result['duration'] = time.time() - start
+    if cache is not None:
+        result['cache_hits'] = cache.hits - hits
+        result['cache_misses'] = cache.misses - misses
+    return result
+
+def _run_case_in_worker(test_name, test_class, case_name):
+    """Run one case of a runtime suite in a worker process.
+
+    Returns the lines the suite would print for the case, its pass/fail
+    counts and the tester's results, so the parent can rebuild the suite.
+    """
+    runner = _worker_runner
+    cache = runner.result_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    
+    start = time.time()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tester = runner._create_tester(test_class)
+            outcome = tester.run_case(case_name)
+        result = {
+            'success': outcome['failed'] == 0,
+            'passed': outcome['passed'],
+            'failed': outcome['failed'],
+            'skipped': outcome.get('skipped', 0),
+            'lines': outcome['lines'],
+            'results': tester.get_results(),
+            'errors': tester.errors,
+            'warnings': tester.warnings
+        }
+    except Exception as e:
+        result = {
+            'success': False,
+            'passed': 0,
+            'failed': 1,
+            'lines': [f"  ✗ {case_name}: {e}"],
+            'results': {},
+            'errors': [f"{case_name}: {e}"],
+            'warnings': []
+        }
+    
+    result['duration'] = time.time() - start
+    if cache is not None:
+        result['cache_hits'] = cache.hits - hits
+        result['cache_misses'] = cache.misses - misses
+    return result
+
 class TestRunner:
-    def __init__(self, xml_file="LuminariGUI.xml"):
+    def __init__(self, xml_file="LuminariGUI.xml", use_cache=True, streaming=False,
+                 cache_size=DEFAULT_MAX_BYTES, settings=None, reporter=None):
         self.xml_file = xml_file
+        self.use_cache = use_cache
+        self.streaming = streaming
+        self.cache_size = cache_size
+        self.settings = load_test_settings() if settings is None else settings
+        self.timings = {}
+        # Streams every finished case to the JSON lines / JUnit reports
+        self.reporter = reporter
+        # Suite class -> names of the only cases to run (see _select_affected)
+        self.case_filter = {}
+        self.model = None
+        # Scripts the syntax and quality suites check, when not the whole model (see _select_affected)
+        self.checked_model = None
+        self.pool = None
+        # --no-cache also disables result reuse, so every suite really runs
+        self.result_cache = ResultCache(max_bytes=cache_size) if use_cache else None
         self.results = {}
         self.start_time = None
         self.end_time = None
@@ -68,16 +227,137 @@ class TestRunner:
                 return full_path
         return None
     
+    def _load_model(self):
+        """Parse the package once so every suite shares the same model."""
+        if self.streaming:
+            # Suites stream scripts straight from the XML instead
+            return True
+        
+        errors = []
+        self.model = load_package_model(self.xml_file, errors, self.use_cache)
+        for error in errors:
+            print(f"Error: {error}")
+        return self.model is not None
+    
+    def _start_pool(self, size):
+        """Start the Lua worker pool shared by the runtime suites."""
+        available, _ = self._check_dependencies()
+        if 'lua' in available:
+            self.pool = LuaWorkerPool(self._find_executable(available['lua']), size=size)
+    
+    def _stop_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+    
+    def _suite_settings(self, test_class):
+        return self.settings.get(SUITE_SETTINGS.get(test_class), {})
+    
+    def _suite_enabled(self, test_class):
+        return self._suite_settings(test_class).get('enabled', True)
+    
+    def _suite_options(self, test_class):
+        """Translate test_settings.json into constructor options for a suite."""
+        suite_settings = self._suite_settings(test_class)
+        options = {}
+        if test_class in LUA_RUNTIME_SUITES:
+            # Per-case timeout: the suite's own setting, else the runner-wide one. Both bound
+            # each Lua case on its own; nothing bounds a whole suite or run, in either mode
+            timeout = suite_settings.get('timeout_per_test', self.settings.get('test_runner', {}).get('timeout_seconds'))
+            if timeout:
+                options['timeout'] = timeout
+        if test_class is PerformanceTester:
+            if 'benchmark_iterations' in suite_settings:
+                options['iterations'] = suite_settings['benchmark_iterations']
+            if 'performance_thresholds' in suite_settings:
+                options['thresholds'] = suite_settings['performance_thresholds']
+            if 'allocation_thresholds' in suite_settings:
+                options['allocation_thresholds'] = suite_settings['allocation_thresholds']
+            if 'session_frequencies' in suite_settings:
+                options['frequencies'] = suite_settings['session_frequencies']
+            if 'benchmark_handlers' in suite_settings:
+                options['handlers'] = suite_settings['benchmark_handlers']
+            if 'benchmark_warmup_seconds' in suite_settings:
+                options['warmup_time'] = suite_settings['benchmark_warmup_seconds']
+            if 'benchmark_target_seconds' in suite_settings:
+                options['target_time'] = suite_settings['benchmark_target_seconds']
+        return options
+    
+    def _worker_count(self, unit_count):
+        """Size the process pool from max_workers, or the CPU count when unset or "auto"."""
+        max_workers = self.settings.get('test_runner', {}).get('max_workers')
+        if not isinstance(max_workers, int) or max_workers < 1:
+            max_workers = os.cpu_count() or 1
+        return max(1, min(max_workers, unit_count))
+    
+    def _create_tester(self, test_class, args=None):
+        """Create a suite instance sharing the parsed package, pool and result cache."""
+        # Runtime suites load every script, whatever the static suites check
+        model = self.model
+        if test_class not in LUA_RUNTIME_SUITES and self.checked_model is not None:
+            model = self.checked_model
+        options = {
+            'model': model,
+            'use_cache': self.use_cache,
+            'streaming': self.streaming
+        }
+        if test_class in LUA_RUNTIME_SUITES and self.pool is not None:
+            options['pool'] = self.pool
+        if test_class in CACHED_SUITES and self.result_cache is not None:
+            options['result_cache'] = self.result_cache
+        if test_class in self.case_filter:
+            options['cases'] = self.case_filter[test_class]
+        options.update(self._suite_options(test_class))
+        if args:
+            options.update(args)
+        return test_class(self.xml_file, **options)
+    
+    def _record_timings(self, test_name, test_class, result):
+        """Remember how long a suite, or each case of a runtime suite, took."""
+        if test_class in LUA_RUNTIME_SUITES:
+            for case in result.get('results', {}).get('test_results', []):
+                if 'duration' in case:
+                    self.timings[_timing_key(test_name, case['name'])] = case['duration']
+        elif 'duration' in result:
+            self.timings[_timing_key(test_name)] = result['duration']
+    
+    def _report_suite(self, test_name, test_class, result):
+        """Report a suite without per-case results as a single case."""
+        if self.reporter is None:
+            return
+        results = result.get('results', {})
+        if test_class in LUA_RUNTIME_SUITES and results.get('test_results'):
+            return
+        messages = [str(error) for error in result['errors']]
+        # Quality analysis fails on critical and error issues rather than errors
+        for category in ('critical', 'errors'):
+            for issue in results.get('issues', {}).get(category, []):
+                messages.append(f"{issue['script']}:{issue['line']}: {issue['message']}")
+        self.reporter.case(test_name, {
+            'name': test_name,
+            'success': result['success'],
+            'duration': result.get('duration', 0.0),
+            'message': '\n'.join(messages)
+        })
+    
+    def _save_timings(self):
+        timings = load_test_timings()
+        timings.update(self.timings)
+        try:
+            save_test_timings(timings)
+        except OSError as e:
+            print(f"Warning: could not save test timings: {e}")
+    
     def _run_test_suite(self, test_name, test_class, args=None):
         """Run a single test suite."""
         print(f"Running {test_name}...")
         
+        if test_class in LUA_RUNTIME_SUITES and self.reporter is not None:
+            # Runtime cases are reported the moment each one finishes
+            args = dict(args or {}, on_case=lambda entry: self.reporter.case(test_name, entry))
+        
         try:
-            # Create test instance
-            if args:
-                tester = test_class(self.xml_file, **args)
-            else:
-                tester = test_class(self.xml_file)
+            tester = self._create_tester(test_class, args)
             
             # Run appropriate test method
             if hasattr(tester, 'run_tests'):
@@ -109,8 +389,54 @@ class TestRunner:
                 'warnings': []
             }
     
-    def run_all_tests(self, parallel=True, skip_optional=False):
-        """Run all test suites."""
+    def _select_affected(self, test_suites, base):
+        """Limit the suites to what changed since base (a git revision or XML file).
+
+        Syntax and quality only check the changed scripts; runtime suites
+        only run the cases whose functions or events those scripts define,
+        or every case when the suite's own module changed, still loading
+        the whole package as the watch mode does. Returns the
+        suites left to run, or None when the change cannot be computed.
+        """
+        try:
+            change = package_changes(self.xml_file, base, self.model)
+        except (OSError, RuntimeError, ET.ParseError) as e:
+            print(f"Error: cannot compare with {base}: {e}")
+            return None
+        
+        print(f"Changes since {base}: {len(change['changed'])} scripts changed or added, "
+              f"{len(change['previous']) - len(change['changed'])} removed")
+        for script in change['changed']:
+            print(f"  ~ {script['path']} ({script['container']})")
+        
+        index = ImpactIndex(self.model)
+        for test_name, test_class in test_suites:
+            if test_class in LUA_RUNTIME_SUITES:
+                index.add_suite(test_name, self._create_tester(test_class))
+        affected = index.affected_cases(change['changed'] + change['previous'], change['files'])
+        
+        selected = []
+        for test_name, test_class in test_suites:
+            if test_class in LUA_RUNTIME_SUITES:
+                cases = [entry['case'] for key, entry in index.cases.items()
+                         if entry['suite'] == test_name and key in affected]
+                if not cases:
+                    continue
+                self.case_filter[test_class] = cases
+            elif not change['changed']:
+                continue
+            selected.append((test_name, test_class))
+        
+        if change['changed']:
+            self.checked_model = self.model.subset(change['changed'])
+        print(f"Selected {len(affected)} of {len(index.cases)} runtime cases:")
+        for case_key, reasons in affected.items():
+            print(f"  {case_key} ({', '.join(reasons)})")
+        print("")
+        return selected
+    
+    def run_all_tests(self, parallel=True, skip_optional=False, changed_since=None):
+        """Run all test suites, or only those affected since changed_since."""
         print("LuminariGUI Test Runner")
         print("=" * 50)
         
@@ -133,6 +459,9 @@ class TestRunner:
         print(f"Testing XML file: {self.xml_file}")
         print("")
         
+        if not self._load_model():
+            return False
+        
         # Define test suites
         test_suites = [
             ('Lua Syntax', LuaSyntaxTester),
@@ -146,10 +475,14 @@ class TestRunner:
         # Filter based on available dependencies
         filtered_suites = []
         for name, test_class in test_suites:
-            if name == 'Lua Syntax' and 'luac' not in available:
+            if not self._suite_enabled(test_class):
                 if not skip_optional:
-                    print(f"Skipping {name} (luac not available)")
+                    print(f"Skipping {name} (disabled in test settings)")
                 continue
+            if name == 'Lua Syntax':
+                # Falls back to the built-in Lua parser without luac
+                if 'luac' not in available and not skip_optional:
+                    print(f"{name}: luac not available, using the built-in Lua 5.1 parser")
             elif name == 'Lua Quality' and 'luacheck' not in available:
                 if not skip_optional:
                     print(f"Skipping {name} (luacheck not available)")
@@ -165,15 +498,34 @@ class TestRunner:
             print("No test suites available to run")
             return False
         
+        if changed_since:
+            if self.model is None:
+                # Streaming mode has no shared model to diff; build it once here
+                self.streaming = False
+                if not self._load_model():
+                    return False
+            filtered_suites = self._select_affected(filtered_suites, changed_since)
+            if filtered_suites is None:
+                return False
+            if not filtered_suites:
+                print("Nothing affected by the changes; no tests to run")
+                return True
+        
         self.start_time = time.time()
         
-        # Run tests
-        if parallel and len(filtered_suites) > 1:
+        # Run tests; parallel runs schedule cases across processes with their own Lua worker
+        parallel = parallel and self._worker_count(len(filtered_suites)) > 1
+        if parallel:
             self._run_parallel_tests(filtered_suites)
         else:
-            self._run_sequential_tests(filtered_suites)
+            self._start_pool(size=1)
+            try:
+                self._run_sequential_tests(filtered_suites)
+            finally:
+                self._stop_pool()
         
         self.end_time = time.time()
+        self._save_timings()
         
         # Generate summary
         self._generate_summary()
@@ -183,7 +535,11 @@ class TestRunner:
     def _run_sequential_tests(self, test_suites):
         """Run tests sequentially."""
         for test_name, test_class in test_suites:
+            start = time.time()
             result = self._run_test_suite(test_name, test_class)
+            result['duration'] = time.time() - start
+            self._record_timings(test_name, test_class, result)
+            self._report_suite(test_name, test_class, result)
             self.results[test_name] = result
             
             if result['success']:
@@ -195,40 +551,175 @@ class TestRunner:
             self.errors.extend(result['errors'])
             self.warnings.extend(result['warnings'])
     
+    def _schedule_units(self, test_suites):
+        """Split the suites into work units ordered longest first.
+
+        Runtime suites are split into their individual cases; syntax and
+        quality run as one unit each. Units are ordered by the wall time
+        recorded on the previous run (longest-processing-time first), and
+        units never timed before are assumed to be as slow as the slowest
+        known unit so they cannot end up alone at the tail of the run.
+        """
+        units = []
+        suite_cases = {}
+        for test_name, test_class in test_suites:
+            if test_class in LUA_RUNTIME_SUITES:
+                suite_cases[test_name] = self._create_tester(test_class).list_cases()
+                units.extend((test_name, test_class, case) for case in suite_cases[test_name])
+            else:
+                units.append((test_name, test_class, None))
+        
+        timings = load_test_timings()
+        estimates = [timings.get(_timing_key(name, case)) for name, _, case in units]
+        default = max((t for t in estimates if isinstance(t, (int, float))), default=0.0)
+        order = sorted(range(len(units)),
+                       key=lambda i: -(estimates[i] if isinstance(estimates[i], (int, float)) else default))
+        estimated = sum(e if isinstance(e, (int, float)) else default for e in estimates)
+        return [units[i] for i in order], suite_cases, estimated
+    
+    def _finish_suite(self, test_name, result):
+        """Count a finished suite and print its status line."""
+        self.results[test_name] = result
+        if result['success']:
+            self.passed_tests += 1
+            print(f"✓ {test_name} completed successfully ({result['duration']:.2f}s)")
+        else:
+            self.failed_tests += 1
+            print(f"✗ {test_name} failed ({result['duration']:.2f}s)")
+        
+        self.total_tests += 1
+        self.errors.extend(result['errors'])
+        self.warnings.extend(result['warnings'])
+    
+    def _merge_cases(self, test_name, test_class, cases, case_results):
+        """Rebuild a runtime suite's result and output from its finished cases."""
+        lines = [f"Running {test_name}..."]
+        result = {'name': test_name, 'success': True, 'results': {}, 'errors': [], 'warnings': [], 'duration': 0.0}
+        passed = failed = skipped = 0
+        for case in cases:
+            case_result = case_results[case]
+            lines.extend(case_result['lines'])
+            passed += case_result['passed']
+            failed += case_result['failed']
+            skipped += case_result.get('skipped', 0)
+            result['success'] = result['success'] and case_result['success']
+            result['duration'] += case_result['duration']
+            result['errors'].extend(case_result['errors'])
+            # Cases of one suite often report the same warning (e.g. a package script that failed to load)
+            result['warnings'].extend(w for w in case_result['warnings'] if w not in result['warnings'])
+            for key, value in case_result['results'].items():
+                if key in ('errors', 'warnings'):
+                    continue
+                if isinstance(value, list):
+                    result['results'].setdefault(key, []).extend(value)
+                elif isinstance(value, dict):
+                    result['results'].setdefault(key, {}).update(value)
+                else:
+                    result['results'][key] = value
+        result['results']['errors'] = result['errors']
+        result['results']['warnings'] = result['warnings']
+        
+        hot_path_lines = self._rank_hot_paths(test_class, result['results'])
+        if hot_path_lines:
+            lines.append("")
+            lines.extend(hot_path_lines)
+        skipped_text = f", {skipped} skipped" if skipped else ""
+        lines.append(f"\n{test_name}: {passed} passed, {failed} failed{skipped_text} ({len(cases)} cases)")
+        for warning in result['warnings']:
+            lines.append(f"  {warning}")
+        return result, lines
+    
+    def _rank_hot_paths(self, test_class, results):
+        """Rank a merged performance suite's benchmarks by time per hour of play, as run_benchmarks does.
+
+        Each case ran in its own tester, so none of them saw the whole
+        suite; the ranking is redone here over the merged benchmark
+        results. Returns the report's display lines.
+        """
+        if test_class is not PerformanceTester or not results.get('benchmark_results'):
+            return []
+        tester = self._create_tester(test_class)
+        tester.benchmark_results = results['benchmark_results']
+        lines = tester.rank_hot_paths()
+        results['hot_paths'] = tester.hot_paths
+        return lines
+    
     def _run_parallel_tests(self, test_suites):
-        """Run tests in parallel."""
-        print("Running tests in parallel...")
-        
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            # Submit all test jobs
-            future_to_test = {
-                executor.submit(self._run_test_suite, test_name, test_class): test_name
-                for test_name, test_class in test_suites
-            }
+        """Run tests in parallel, scheduling individual cases across processes.
+
+        Every runtime case and every static suite is submitted, longest
+        first, to one shared queue; an idle process takes the next unit, so
+        a long case never leaves the other processes waiting on a fixed
+        share of the work. A suite's output is printed as one block when
+        its last unit finishes, so concurrent suites never interleave.
+        Only the Lua worker running a case enforces a timeout
+        (timeout_seconds or timeout_per_test, see _suite_options): a case
+        that hangs is stopped and fails, but a suite whose cases each
+        finish in time runs to the end however long it takes in total.
+        """
+        units, suite_cases, estimated = self._schedule_units(test_suites)
+        workers = self._worker_count(len(units))
+        print(f"Running tests in parallel ({workers} processes, {len(units)} units, "
+              f"~{estimated / workers:.2f}s estimated per process)...")
+        
+        case_results = {test_name: {} for test_name in suite_cases}
+        suite_classes = dict(test_suites)
+        for test_name, cases in suite_cases.items():
+            if not cases:
+                result, lines = self._merge_cases(test_name, suite_classes[test_name], cases, {})
+                print('\n'.join(lines))
+                self._finish_suite(test_name, result)
+        
+        initargs = (self.xml_file, self.use_cache, self.streaming, self.cache_size, self.settings,
+                    self.model, self.checked_model)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_suite_worker, initargs=initargs) as executor:
+            # Submit every unit, longest first; idle workers take the next one
+            future_to_unit = {}
+            for test_name, test_class, case in units:
+                if case is None:
+                    future = executor.submit(_run_suite_in_worker, test_name, test_class)
+                else:
+                    future = executor.submit(_run_case_in_worker, test_name, test_class, case)
+                future_to_unit[future] = (test_name, test_class, case)
             
             # Collect results as they complete
-            for future in as_completed(future_to_test):
-                test_name = future_to_test[future]
+            for future in as_completed(future_to_unit):
+                test_name, test_class, case = future_to_unit[future]
                 try:
                     result = future.result()
-                    self.results[test_name] = result
-                    
-                    if result['success']:
-                        self.passed_tests += 1
-                        print(f"✓ {test_name} completed successfully")
-                    else:
-                        self.failed_tests += 1
-                        print(f"✗ {test_name} failed")
-                    
-                    self.total_tests += 1
-                    self.errors.extend(result['errors'])
-                    self.warnings.extend(result['warnings'])
-                    
                 except Exception as e:
-                    print(f"✗ {test_name} crashed: {e}")
-                    self.failed_tests += 1
-                    self.total_tests += 1
-                    self.errors.append(f"{test_name}: {str(e)}")
+                    if case is None:
+                        print(f"✗ {test_name} crashed: {e}")
+                        self.failed_tests += 1
+                        self.total_tests += 1
+                        self.errors.append(f"{test_name}: {str(e)}")
+                        continue
+                    result = {'success': False, 'passed': 0, 'failed': 1, 'lines': [f"  ✗ {case}: crashed: {e}"],
+                              'results': {}, 'errors': [f"{test_name} {case}: {e}"], 'warnings': [], 'duration': 0.0}
+                
+                if self.result_cache is not None:
+                    self.result_cache.hits += result.pop('cache_hits', 0)
+                    self.result_cache.misses += result.pop('cache_misses', 0)
+                self.timings[_timing_key(test_name, case)] = result['duration']
+                
+                if case is None:
+                    sys.stdout.write(result.pop('output', ''))
+                    self._report_suite(test_name, test_class, result)
+                    self._finish_suite(test_name, result)
+                    continue
+                
+                if self.reporter is not None:
+                    entries = result['results'].get('test_results') or [
+                        {'name': case, 'success': False, 'duration': result['duration'],
+                         'message': '\n'.join(result['errors'])}]
+                    for entry in entries:
+                        self.reporter.case(test_name, entry)
+                case_results[test_name][case] = result
+                if len(case_results[test_name]) == len(suite_cases[test_name]):
+                    result, lines = self._merge_cases(test_name, test_class, suite_cases[test_name],
+                                                      case_results[test_name])
+                    print('\n'.join(lines))
+                    self._finish_suite(test_name, result)
     
     def _generate_summary(self):
         """Generate test summary."""
@@ -241,6 +732,9 @@ class TestRunner:
         print(f"Passed: {self.passed_tests}")
         print(f"Failed: {self.failed_tests}")
         print(f"Duration: {duration:.2f} seconds")
+        if self.result_cache is not None:
+            print(f"Cached results reused: {self.result_cache.hits} "
+                  f"(recomputed: {self.result_cache.misses})")
         print("")
         
         # Per-suite results
@@ -279,6 +773,70 @@ class TestRunner:
             print(f"TESTS FAILED ({self.failed_tests}/{self.total_tests}) ✗")
         print("=" * 50)
     
+    def record_history(self, history_file=DEFAULT_HISTORY_FILE):
+        """Append this run's per-case durations and benchmark stats to the history database."""
+        cases = []
+        for test_name, result in self.results.items():
+            results = result.get('results', {})
+            entries = results.get('test_results')
+            if not entries:
+                # Syntax and quality are timed as a whole
+                cases.append({'suite': test_name, 'name': test_name, 'success': result['success'],
+                              'duration': result.get('duration')})
+                continue
+            benchmarks = results.get('benchmark_results', {})
+            for entry in entries:
+                cases.append({'suite': test_name, 'name': entry['name'], 'success': entry['success'],
+                              'skipped': entry.get('skipped', False), 'duration': entry.get('duration'),
+                              'benchmark': benchmarks.get(entry['name'])})
+        if not cases:
+            return
+        
+        try:
+            with RunHistory(history_file) as history:
+                history.record_run(cases, started_at=self.start_time, duration=self.end_time - self.start_time,
+                                   xml_file=self.xml_file)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: could not record the run in {history_file}: {e}")
+    
+    def check_benchmarks(self, save_file=None, compare_file=None, max_regression=None, diff_file=DEFAULT_DIFF_FILE,
+                         baseline_runs=DEFAULT_BASELINE_RUNS):
+        """Gate the performance results against a baseline and/or save them as one.
+
+        max_regression defaults to the benchmark_max_regression_percent
+        setting. A saved baseline adds baseline_runs - 1 more runs of the
+        performance cases for its noise band. Returns False when the gate
+        fails or there are no performance results to use.
+        """
+        result = self.results.get('Performance')
+        if result is None:
+            print("No performance results to compare or save; run the performance suite")
+            return False
+        results = result.get('results', {})
+        benchmarks = results.get('benchmark_results', {})
+        mode = results.get('mode', 'synthetic')
+        if max_regression is None:
+            max_regression = self._suite_settings(PerformanceTester).get('benchmark_max_regression_percent',
+                                                                         DEFAULT_MAX_REGRESSION)
+        
+        success = True
+        if compare_file:
+            print("")
+            success = compare_with_baseline(benchmarks, mode, compare_file, max_regression, diff_file,
+                                            skipped=results.get('skipped'))
+        if save_file:
+            if not success or not result['success'] or not benchmarks:
+                print(f"Not saving the benchmark baseline to {save_file}: the performance run failed")
+                return False
+            benchmark_runs = [benchmarks]
+            if baseline_runs > 1:
+                print(f"Running the performance cases {baseline_runs - 1} more times for the baseline's noise band...")
+                tester = self._create_tester(PerformanceTester)
+                benchmark_runs += tester.rerun_benchmarks(baseline_runs - 1)
+            BenchmarkBaseline(save_file).save(benchmark_runs, mode)
+            print(f"Benchmark baseline saved to: {save_file} ({len(benchmarks)} benchmarks, {len(benchmark_runs)} runs)")
+        return success
+    
     def generate_report(self, format='text', output_file=None):
         """Generate detailed test report."""
         if format == 'json':
@@ -363,9 +921,18 @@ class TestRunner:
         
         name, test_class = test_map[test_name]
         
+        if not self._load_model():
+            return False
+        
         self.start_time = time.time()
-        result = self._run_test_suite(name, test_class)
+        self._start_pool(size=1)
+        try:
+            result = self._run_test_suite(name, test_class)
+        finally:
+            self._stop_pool()
         self.end_time = time.time()
+        result['duration'] = self.end_time - self.start_time
+        self._report_suite(name, test_class, result)
         
         self.results[name] = result
         self.total_tests = 1
@@ -384,15 +951,115 @@ class TestRunner:
         
         return result['success']
 
+    def watch(self, skip_optional=False, interval=DEFAULT_POLL_INTERVAL):
+        """Re-run the checks and runtime cases affected by each save.
+        
+        Syntax and quality checks read only the changed scripts; the
+        function, event, system and performance cases linked to them by
+        the impact index (see test_impact.py) run on the whole package,
+        as the handler benchmarks load every script.
+        """
+        available, missing = self._check_dependencies()
+        watch_suites = [('Lua Syntax', LuaSyntaxTester)]
+        if 'luacheck' in available:
+            watch_suites.append(('Lua Quality', LuaQualityAnalyzer))
+        elif not skip_optional:
+            print("Skipping Lua Quality (luacheck not available)")
+        runtime_suites = []
+        if 'lua' in available:
+            runtime_suites = [(name, test_class) for name, test_class in (
+                ('Function Tests', LuaFunctionTester),
+                ('Event System', EventSystemTester),
+                ('System Tests', SystemTester),
+                ('Performance', PerformanceTester)
+            ) if self._suite_enabled(test_class)]
+        elif not skip_optional:
+            print("Skipping the runtime cases (lua not available)")
+        
+        watcher = PackageWatcher(self.xml_file, interval=interval)
+        if watcher.snapshot() is None:
+            # Keep watching; the first good save is checked in full
+            for error in watcher.errors:
+                print(f"Error: {error}")
+        else:
+            print(f"Tracking {len(watcher.fingerprints)} scripts in {self.xml_file}")
+        
+        def on_change(change):
+            print_change(change)
+            if change['model'] is None or not change['changed']:
+                return
+            
+            start = time.time()
+            self.case_filter = {}
+            self.model = change['model']
+            index = ImpactIndex(self.model)
+            for name, test_class in runtime_suites:
+                index.add_suite(name, self._create_tester(test_class))
+            affected = index.affected_cases(change['changed'])
+            
+            self.checked_model = change['model'].subset(change['changed'])
+            for name, test_class in watch_suites:
+                result = self._run_test_suite(name, test_class)
+                status = "✓" if result['success'] else "✗"
+                print(f"{status} {name}: {'PASS' if result['success'] else 'FAIL'}")
+                for error in result['errors']:
+                    print(f"  {error}")
+            
+            # The runtime cases need every script, not just the changed ones
+            for name, test_class in runtime_suites:
+                cases = [entry['case'] for key, entry in index.cases.items()
+                         if entry['suite'] == name and key in affected]
+                if not cases:
+                    continue
+                self.case_filter[test_class] = cases
+                result = self._run_test_suite(name, test_class)
+                status = "✓" if result['success'] else "✗"
+                print(f"{status} {name}: {'PASS' if result['success'] else 'FAIL'} ({len(cases)} affected cases)")
+                for error in result['errors']:
+                    print(f"  {error}")
+            self.case_filter = {}
+            self.checked_model = None
+            print(f"Checked {len(change['changed'])} changed scripts and {len(affected)} affected runtime cases "
+                  f"in {time.time() - start:.2f} seconds")
+        
+        if runtime_suites:
+            self._start_pool(size=1)
+        try:
+            watcher.run(on_change)
+        finally:
+            self._stop_pool()
+        return True
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description='Run LuminariGUI tests')
     parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to test')
+    parser.add_argument('--settings', default=DEFAULT_SETTINGS_FILE, help='Test settings file (suite switches, workers, timeouts, iterations)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML and re-run every check instead of using cached indexes and results')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Size cap in MB for cached test results; least recently used entries are evicted (default: %(default)g)')
+    parser.add_argument('--stream', action='store_true', help='Stream scripts from the XML in each suite instead of building the shared index')
     parser.add_argument('--parallel', action='store_true', help='Run tests in parallel')
     parser.add_argument('--sequential', action='store_true', help='Run tests sequentially')
     parser.add_argument('--skip-optional', action='store_true', help='Skip tests with missing dependencies')
     parser.add_argument('--test', help='Run specific test suite (syntax, quality, functions, events, system, performance)')
+    parser.add_argument('--watch', action='store_true', help='Keep running and re-check only the scripts changed by each save')
+    parser.add_argument('--changed-since', metavar='REV',
+                        help='Only run the checks and cases affected since a git revision (or another copy of the XML file)')
     parser.add_argument('--report', help='Generate report file')
+    parser.add_argument('--case-log', metavar='FILE', help='Stream one JSON line per finished test case (suite, case, status, duration, stderr)')
+    parser.add_argument('--junit', metavar='FILE', help='Write a JUnit XML report with per-case times')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_FILE, help='SQLite database every run is appended to (default: %(default)s)')
+    parser.add_argument('--no-history', action='store_true', help='Do not record this run in the history database')
+    parser.add_argument('--save-baseline', metavar='FILE', help='Save the performance medians and confidence intervals as a baseline')
+    parser.add_argument('--baseline-runs', type=int, default=DEFAULT_BASELINE_RUNS,
+                        help='Runs of the performance cases --save-baseline measures the run-to-run noise from (default: %(default)s)')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='Compare the performance results with a baseline; fail when a median regressed beyond the noise')
+    parser.add_argument('--max-regression', type=float,
+                        help=f'Slowdown of a median, in percent, that fails --compare (default: benchmark_max_regression_percent or {DEFAULT_MAX_REGRESSION:g})')
+    parser.add_argument('--benchmark-diff', default=DEFAULT_DIFF_FILE,
+                        help='Where --compare writes its diff document (default: %(default)s)')
     parser.add_argument('--format', choices=['text', 'json'], default='text', help='Report format')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode')
@@ -400,14 +1067,31 @@ def main():
     args = parser.parse_args()
     
     # Create test runner
-    runner = TestRunner(args.xml)
+    settings = load_test_settings(args.settings)
+    reporter = CaseReporter(args.case_log, args.junit) if args.case_log or args.junit else None
+    runner = TestRunner(args.xml, use_cache=not args.no_cache, streaming=args.stream,
+                        cache_size=int(args.cache_size * 1024 * 1024), settings=settings, reporter=reporter)
     
     # Run tests
-    if args.test:
-        success = runner.run_single_test(args.test)
-    else:
-        parallel = args.parallel or (not args.sequential)
-        success = runner.run_all_tests(parallel=parallel, skip_optional=args.skip_optional)
+    if args.watch:
+        sys.exit(0 if runner.watch(skip_optional=args.skip_optional) else 1)
+    try:
+        if args.test:
+            success = runner.run_single_test(args.test)
+        else:
+            parallel = args.parallel or (not args.sequential and settings.get('test_runner', {}).get('parallel_execution', True))
+            success = runner.run_all_tests(parallel=parallel, skip_optional=args.skip_optional,
+                                           changed_since=args.changed_since)
+    finally:
+        if reporter is not None:
+            reporter.close()
+    
+    if not args.no_history and runner.end_time:
+        runner.record_history(args.history)
+    
+    if args.save_baseline or args.compare:
+        success = runner.check_benchmarks(args.save_baseline, args.compare, args.max_regression,
+                                          args.benchmark_diff, max(1, args.baseline_runs)) and success
     
     # Generate report if requested
     if args.report:
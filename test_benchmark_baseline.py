@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark Baseline Gate
+=======================
+Tests that the --compare gate tells a real slowdown from run-to-run noise.
+"""
+
+import sys
+
+from benchmark_baseline import BenchmarkBaseline, compare_summaries, noise_band
+
+
+def summary(median, half_width, run_medians=None):
+    """A benchmark summary with tight samples around median (milliseconds)."""
+    result = {
+        'samples': 200,
+        'median': median,
+        'median_ci': [median - half_width, median + half_width],
+        'resolution': 0.001
+    }
+    if run_medians is not None:
+        result['run_medians'] = run_medians
+    return result
+
+
+def test_tight_slowdown_regresses():
+    """A 20% slower median with tight samples fails the gate."""
+    # Widening the runs' range by their spread would put 1.2ms inside the band
+    baseline = summary(1.0, 0.01, [0.92, 0.96, 1.0, 1.04, 1.08])
+    entry = compare_summaries(baseline, summary(1.2, 0.01), max_regression=10.0)
+    assert entry['status'] == 'regressed', entry
+    assert round(entry['change_percent']) == 20
+
+    gate = BenchmarkBaseline('baseline.json')
+    gate.benchmarks = {'table_operations': baseline}
+    gate.mode = 'synthetic'
+    diff = gate.compare({'table_operations': summary(1.2, 0.01)}, 'synthetic', 10.0,
+                        commit='abc', platform_name='test')
+    assert not diff['passed']
+    assert diff['regressions'] == ['table_operations']
+
+
+def test_band_is_the_run_range():
+    """The band spans the baseline runs' medians and is not widened by their spread."""
+    baseline = summary(1.28, 0.02, [1.1, 1.2, 1.28, 1.3, 1.37])
+    assert noise_band(baseline) == (1.1, 1.37)
+    # A 40% slowdown clears the slowest baseline run
+    assert compare_summaries(baseline, summary(1.8, 0.02))['status'] == 'regressed'
+
+
+def test_slowdown_within_the_runs_is_noise():
+    """A median the baseline's own runs reached is noise, however far from its median."""
+    baseline = summary(1.0, 0.01, [0.9, 0.95, 1.0, 1.1, 1.2])
+    assert compare_summaries(baseline, summary(1.15, 0.01))['status'] == 'noise'
+
+
+if __name__ == "__main__":
+    test_tight_slowdown_regresses()
+    test_band_is_the_run_range()
+    test_slowdown_within_the_runs_is_noise()
+    print("✅ Benchmark baseline tests passed")
+    sys.exit(0)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""
+Changed-Since Runs
+==================
+Tests that run_tests.py --changed-since runs the handler cases a changed
+script affects against the whole package, so they pass just as they do
+in a full run.
+"""
+
+import copy
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+import run_tests
+from test_performance import PerformanceTester
+
+XML_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'LuminariGUI.xml')
+
+# The handler script to change, and the case benchmarking its entry point
+CHANGED_LINE = 'function GUI.updateHealthGauge()'
+AFFECTED_CASE = 'entry_gui_updatehealthgauge_msdp_health_max'
+
+
+def test_changed_handler_case_passes():
+    """Change one handler script and run what --changed-since selects."""
+    settings = copy.deepcopy(run_tests.load_test_settings())
+    settings['performance_tests']['benchmark_handlers'] = True
+    runner = run_tests.TestRunner(use_cache=False, settings=settings)
+    if 'lua' not in runner._check_dependencies()[0]:
+        pytest.skip("Lua interpreter not found")
+
+    directory = tempfile.mkdtemp()
+    try:
+        base = os.path.join(directory, 'base.xml')
+        shutil.copyfile(XML_FILE, base)
+        with open(XML_FILE, encoding='utf-8') as f:
+            content = f.read()
+        assert CHANGED_LINE in content
+        changed = os.path.join(directory, 'LuminariGUI.xml')
+        with open(changed, 'w', encoding='utf-8', newline='') as f:
+            f.write(content.replace(CHANGED_LINE, CHANGED_LINE + ' -- changed', 1))
+
+        runner.xml_file = changed
+        success = runner.run_all_tests(parallel=False, skip_optional=True, changed_since=base)
+    finally:
+        shutil.rmtree(directory)
+
+    selected = runner.case_filter[PerformanceTester]
+    assert AFFECTED_CASE in selected
+    performance = runner.results['Performance']
+    cases = {case['name']: case for case in performance['results']['test_results']}
+    # Every selected case ran with the scripts it depends on loaded
+    assert sorted(cases) == sorted(selected)
+    assert cases[AFFECTED_CASE]['success'] and not cases[AFFECTED_CASE]['skipped']
+    assert performance['success'], performance['errors']
+    assert success
+
+
+if __name__ == "__main__":
+    test_changed_handler_case_passes()
+    sys.exit(0)
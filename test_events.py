@@ -6,16 +6,30 @@ Tests event handlers and MSDP event processing with mocks.
 
 import os
 import sys
-import tempfile
-import subprocess
-import xml.etree.ElementTree as ET
 import json
 import re
+import time
 from pathlib import Path
 
+from package_model import load_package_model, stream_package_scripts
+from lua_worker import LuaWorkerPool, WORKER_SOURCE
+from result_cache import tool_version
+
 class EventSystemTester:
-    def __init__(self, xml_file="LuminariGUI.xml"):
+    def __init__(self, xml_file="LuminariGUI.xml", model=None, use_cache=True, streaming=False, pool=None,
+                 result_cache=None, timeout=15, cases=None, on_case=None):
         self.xml_file = xml_file
+        self.pool = pool
+        # Names of the only cases to run, or None for all of them
+        self.cases = None if cases is None else set(cases)
+        # Called with each case's test_results entry as soon as it finishes
+        self.on_case = on_case
+        self.timeout = timeout
+        self.result_cache = result_cache
+        self._owns_pool = False
+        self.model = model
+        self.use_cache = use_cache
+        self.streaming = streaming
         self.lua_path = self._find_lua()
         self.test_results = []
         self.errors = []
@@ -31,39 +45,27 @@ class EventSystemTester:
                     return full_path
         return None
     
+    def get_model(self):
+        """Return the shared package model, parsing the XML on first use."""
+        if self.model is None:
+            self.model = load_package_model(self.xml_file, self.errors, self.use_cache)
+        return self.model
+    
+    def _iter_scripts(self):
+        """Yield script records from the shared model, or stream them from the XML."""
+        if self.streaming and self.model is None:
+            return stream_package_scripts(self.xml_file, self.errors)
+        model = self.get_model()
+        return iter(model.scripts) if model is not None else iter(())
+    
     def _extract_event_handlers(self):
         """Extract event handlers from XML scripts."""
-        if not os.path.exists(self.xml_file):
-            self.errors.append(f"XML file not found: {self.xml_file}")
-            return []
-        
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            self.errors.append(f"XML parsing error: {e}")
-            return []
-        
         handlers = []
         
-        # Create a parent map for ElementTree compatibility
-        parent_map = {c: p for p in root.iter() for c in p}
-        
-        # Find all <script> elements
-        for script_elem in root.iter('script'):
-            script_text = script_elem.text
-            if script_text and script_text.strip():
-                # Get parent context
-                parent = parent_map.get(script_elem)
-                if parent is not None:
-                    name_elem = parent.find('name')
-                    script_name = name_elem.text if name_elem is not None else "unnamed"
-                else:
-                    script_name = "unnamed"
-                
-                # Find event handler registrations
-                event_handlers = self._parse_event_handlers(script_text, script_name)
-                handlers.extend(event_handlers)
+        for script in self._iter_scripts():
+            # Find event handler registrations
+            event_handlers = self._parse_event_handlers(script['content'], script['name'])
+            handlers.extend(event_handlers)
         
         return handlers
     
@@ -362,16 +364,28 @@ end
             }
         ]
     
+    def _get_pool(self):
+        """Return the Lua worker pool, starting a private one if none was shared."""
+        if self.pool is None:
+            self.pool = LuaWorkerPool(self.lua_path)
+            self._owns_pool = True
+        return self.pool
+    
+    def close_pool(self):
+        """Stop a private worker pool once the run is over."""
+        if self._owns_pool:
+            self.pool.close()
+            self.pool = None
+            self._owns_pool = False
+    
     def _run_event_test(self, test_case):
         """Run a single event test case."""
         if not self.lua_path:
             self.errors.append("lua interpreter not found in PATH")
             return False
         
-        # Create test Lua code
+        # Create test Lua code; the mocks are a prelude compiled once per worker
         lua_code = f'''
-{self._create_mudlet_mocks()}
-
 -- Test setup
 {test_case['setup']}
 
@@ -389,36 +403,80 @@ else
 end
 '''
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.lua', delete=False) as lua_file:
-            lua_file.write(lua_code)
-            lua_file_path = lua_file.name
+        pool = self._get_pool()
+        mocks = self._create_mudlet_mocks()
+        pool.add_prelude('events.mocks', mocks)
+        key = None
+        if self.result_cache is not None:
+            # Same interpreter, worker, mocks and case code always give the same outcome
+            key = self.result_cache.key('events', tool_version(pool.lua_path), WORKER_SOURCE, test_case['name'],
+                                        mocks, lua_code)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached
         
         try:
-            # Run lua interpreter
-            result = subprocess.run(
-                [self.lua_path, lua_file_path],
-                capture_output=True,
-                text=True,
-                timeout=15
-            )
-            
-            if result.returncode == 0:
-                output = result.stdout.strip()
-                return output == "PASS", output
-            else:
-                return False, result.stderr.strip()
-                
-        except subprocess.TimeoutExpired:
-            return False, "Timeout"
+            result = pool.run(lua_code, prelude='events.mocks', name=test_case['name'], timeout=self.timeout)
         except Exception as e:
             return False, str(e)
-        finally:
-            # Clean up
-            try:
-                os.unlink(lua_file_path)
-            except:
-                pass
+        
+        if result['timed_out']:
+            return False, "Timeout"
+        if result['restarted']:
+            return False, result['stderr'].strip()
+        if result['returncode'] == 0:
+            output = result['stdout'].strip()
+            outcome = (output == "PASS", output)
+        else:
+            outcome = (False, result['stderr'].strip())
+        if key is not None:
+            self.result_cache.put(key, outcome)
+        return outcome
+    
+    def selected_cases(self):
+        """Return the test cases to run, limited to self.cases when set."""
+        test_cases = self._create_event_test_cases()
+        if self.cases is None:
+            return test_cases
+        return [test_case for test_case in test_cases if test_case['name'] in self.cases]
+    
+    def list_cases(self):
+        """Return the names of the test cases, in the order run_tests runs them."""
+        return [test_case['name'] for test_case in self.selected_cases()]
+    
+    def get_case(self, test_name):
+        """Return the definition of one test case by name."""
+        for test_case in self._create_event_test_cases():
+            if test_case['name'] == test_name:
+                return test_case
+        raise KeyError(f"Unknown event test case: {test_name}")
+    
+    def run_case(self, test_name):
+        """Run one test case by name; see run_test_case."""
+        return self.run_test_case(self.get_case(test_name))
+    
+    def _record_case(self, entry):
+        self.test_results.append(entry)
+        if self.on_case is not None:
+            self.on_case(entry)
+    
+    def run_test_case(self, test_case):
+        """Run one event test case and return its pass/fail counts and output lines."""
+        test_name = test_case['name']
+        description = test_case['description']
+        
+        start = time.perf_counter()
+        success, output = self._run_event_test(test_case)
+        self._record_case({
+            'name': test_name,
+            'success': success,
+            'duration': time.perf_counter() - start,
+            'message': '' if success else str(output)
+        })
+        
+        if success:
+            return {'passed': 1, 'failed': 0, 'lines': [f"  ✓ {test_name}: {description}"]}
+        return {'passed': 0, 'failed': 1, 'lines': [f"  ✗ {test_name}: {description} - {output}"]}
     
     def run_tests(self):
         """Run all event system tests."""
@@ -441,7 +499,7 @@ end
                 print(f"  {handler['event']} -> {handler['handler']} ({handler['script']})")
         
         # Run test cases
-        test_cases = self._create_event_test_cases()
+        test_cases = self.selected_cases()
         
         total_tests = len(test_cases)
         passed_tests = 0
@@ -450,17 +508,13 @@ end
         print(f"\nRunning {total_tests} event system tests...")
         
         for test_case in test_cases:
-            test_name = test_case['name']
-            description = test_case['description']
-            
-            success, output = self._run_event_test(test_case)
-            
-            if success:
-                passed_tests += 1
-                print(f"  ✓ {test_name}: {description}")
-            else:
-                failed_tests += 1
-                print(f"  ✗ {test_name}: {description} - {output}")
+            outcome = self.run_test_case(test_case)
+            for line in outcome['lines']:
+                print(line)
+            passed_tests += outcome['passed']
+            failed_tests += outcome['failed']
+        
+        self.close_pool()
         
         # Summary
         print(f"\nEvent system test results:")
@@ -492,13 +546,15 @@ def main():
     
     parser = argparse.ArgumentParser(description='Test event system in LuminariGUI')
     parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to test')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--stream', action='store_true', help='Stream scripts from the XML instead of building the full index (bounded memory)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode')
     parser.add_argument('--list-handlers', action='store_true', help='List event handlers only')
     
     args = parser.parse_args()
     
-    tester = EventSystemTester(args.xml)
+    tester = EventSystemTester(args.xml, use_cache=not args.no_cache, streaming=args.stream)
     
     if args.list_handlers:
         handlers = tester._extract_event_handlers()
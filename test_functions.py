@@ -6,16 +6,30 @@ Tests core Lua functions with known inputs and expected outputs.
 
 import os
 import sys
-import tempfile
-import subprocess
-import xml.etree.ElementTree as ET
 import json
 import re
+import time
 from pathlib import Path
 
+from package_model import load_package_model, stream_package_scripts
+from lua_worker import LuaWorkerPool, WORKER_SOURCE
+from result_cache import tool_version
+
 class LuaFunctionTester:
-    def __init__(self, xml_file="LuminariGUI.xml"):
+    def __init__(self, xml_file="LuminariGUI.xml", model=None, use_cache=True, streaming=False, pool=None,
+                 result_cache=None, timeout=10, cases=None, on_case=None):
         self.xml_file = xml_file
+        self.pool = pool
+        # Names of the only cases to run, or None for all of them
+        self.cases = None if cases is None else set(cases)
+        # Called with each case's test_results entry as soon as it finishes
+        self.on_case = on_case
+        self.timeout = timeout
+        self.result_cache = result_cache
+        self._owns_pool = False
+        self.model = model
+        self.use_cache = use_cache
+        self.streaming = streaming
         self.lua_path = self._find_lua()
         self.test_results = []
         self.errors = []
@@ -30,36 +44,27 @@ class LuaFunctionTester:
                     return full_path
         return None
     
+    def get_model(self):
+        """Return the shared package model, parsing the XML on first use."""
+        if self.model is None:
+            self.model = load_package_model(self.xml_file, self.errors, self.use_cache)
+        return self.model
+    
+    def _iter_scripts(self):
+        """Yield script records from the shared model, or stream them from the XML."""
+        if self.streaming and self.model is None:
+            return stream_package_scripts(self.xml_file, self.errors)
+        model = self.get_model()
+        return iter(model.scripts) if model is not None else iter(())
+    
     def _extract_functions(self):
         """Extract testable functions from XML scripts."""
-        if not os.path.exists(self.xml_file):
-            self.errors.append(f"XML file not found: {self.xml_file}")
-            return []
-        
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            self.errors.append(f"XML parsing error: {e}")
-            return []
-        
         functions = []
         
-        # Find all <script> elements
-        for script_elem in root.iter('script'):
-            script_text = script_elem.text
-            if script_text and script_text.strip():
-                # Get parent context
-                parent = script_elem.getparent()
-                if parent is not None:
-                    name_elem = parent.find('name')
-                    script_name = name_elem.text if name_elem is not None else "unnamed"
-                else:
-                    script_name = "unnamed"
-                
-                # Extract function definitions
-                extracted_functions = self._parse_functions(script_text, script_name)
-                functions.extend(extracted_functions)
+        for script in self._iter_scripts():
+            # Extract function definitions
+            extracted_functions = self._parse_functions(script['content'], script['name'])
+            functions.extend(extracted_functions)
         
         return functions
     
@@ -249,45 +254,55 @@ class LuaFunctionTester:
         
         return test_cases
     
-    def _run_lua_test(self, test_name, lua_code):
-        """Run a single Lua test."""
+    def _get_pool(self):
+        """Return the Lua worker pool, starting a private one if none was shared."""
+        if self.pool is None:
+            self.pool = LuaWorkerPool(self.lua_path)
+            self._owns_pool = True
+        return self.pool
+    
+    def close_pool(self):
+        """Stop a private worker pool once the run is over."""
+        if self._owns_pool:
+            self.pool.close()
+            self.pool = None
+            self._owns_pool = False
+    
+    def _run_lua_test(self, test_name, lua_code, prelude=None):
+        """Run a single Lua test on a persistent worker."""
         if not self.lua_path:
             self.errors.append("lua interpreter not found in PATH")
             return False
         
-        # Create temporary file with test code
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.lua', delete=False) as lua_file:
-            lua_file.write(lua_code)
-            lua_file_path = lua_file.name
+        pool = self._get_pool()
+        key = None
+        if self.result_cache is not None:
+            # Same interpreter, worker, setup and case code always give the same outcome
+            key = self.result_cache.key('functions', tool_version(pool.lua_path), WORKER_SOURCE, test_name,
+                                        pool.preludes.get(prelude, ''), lua_code)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached
         
         try:
-            # Run lua interpreter
-            result = subprocess.run(
-                [self.lua_path, lua_file_path],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                return True, result.stdout.strip()
-            else:
-                return False, result.stderr.strip()
-                
-        except subprocess.TimeoutExpired:
-            return False, "Timeout"
+            result = pool.run(lua_code, prelude=prelude, name=test_name, timeout=self.timeout)
         except Exception as e:
             return False, str(e)
-        finally:
-            # Clean up
-            try:
-                os.unlink(lua_file_path)
-            except:
-                pass
+        
+        if result['timed_out']:
+            return False, "Timeout"
+        if result['restarted']:
+            return False, result['stderr'].strip()
+        if result['returncode'] == 0:
+            outcome = (True, result['stdout'].strip())
+        else:
+            outcome = (False, result['stderr'].strip())
+        if key is not None:
+            self.result_cache.put(key, outcome)
+        return outcome
     
     def _create_test_lua_code(self, test_case, test_item):
-        """Create Lua code for a test case."""
-        setup = test_case.get('setup', '')
+        """Create Lua code for a test case; its setup runs first as a worker prelude."""
         function_name = test_item.get('function', test_case['name'])
         input_args = test_item['input']
         expected = test_item.get('expected', '')
@@ -297,8 +312,6 @@ class LuaFunctionTester:
         # Check if this is a table result test
         if expected_table:
             lua_code = f'''
-{setup}
-
 -- Table serialization function
 function table_to_string(t)
     if type(t) ~= "table" then
@@ -328,8 +341,6 @@ end
 '''
         else:
             lua_code = f'''
-{setup}
-
 -- Test function
 local function run_test()
     local result = {function_name}({input_args})
@@ -357,6 +368,82 @@ end
         else:
             return True  # No validation specified
     
+    def selected_cases(self):
+        """Return the test cases to run, limited to self.cases when set."""
+        test_cases = self._create_test_cases()
+        if self.cases is None:
+            return test_cases
+        return [test_case for test_case in test_cases if test_case['name'] in self.cases]
+    
+    def list_cases(self):
+        """Return the names of the test cases, in the order run_tests runs them."""
+        return [test_case['name'] for test_case in self.selected_cases()]
+    
+    def get_case(self, test_name):
+        """Return the definition of one test case by name."""
+        for test_case in self._create_test_cases():
+            if test_case['name'] == test_name:
+                return test_case
+        raise KeyError(f"Unknown function test case: {test_name}")
+    
+    def run_case(self, test_name):
+        """Run one test case by name; see run_test_case."""
+        return self.run_test_case(self.get_case(test_name))
+    
+    def _record_case(self, entry):
+        self.test_results.append(entry)
+        if self.on_case is not None:
+            self.on_case(entry)
+    
+    def run_test_case(self, test_case):
+        """Run every input of one function's test case.
+
+        Returns the passed and failed input counts and the lines to print
+        for the case; its wall time is recorded in self.test_results.
+        """
+        test_name = test_case['name']
+        start = time.perf_counter()
+        lines = [f"\nTesting {test_name}:"]
+        passed = 0
+        failed = 0
+        
+        # The setup is compiled once per worker and re-run for each case
+        prelude = f"functions.{test_name}"
+        self._get_pool().add_prelude(prelude, test_case.get('setup', ''))
+        
+        for i, test_item in enumerate(test_case['tests']):
+            test_id = f"{test_name}_{i+1}"
+            
+            # Create and run test
+            lua_code = self._create_test_lua_code(test_case, test_item)
+            success, result = self._run_lua_test(test_id, lua_code, prelude)
+            
+            if success:
+                # Validate result
+                expected = test_item.get('expected', '')
+                expected_pattern = test_item.get('expected_pattern', '')
+                expected_table = test_item.get('expected_table', '')
+                
+                if self._validate_result(result, expected, expected_pattern, expected_table):
+                    passed += 1
+                    lines.append(f"  ✓ Test {i+1}: {test_item['input']} -> {result}")
+                else:
+                    failed += 1
+                    expected_display = expected_table or expected or expected_pattern
+                    lines.append(f"  ✗ Test {i+1}: {test_item['input']} -> {result} (expected: {expected_display})")
+            else:
+                failed += 1
+                lines.append(f"  ✗ Test {i+1}: {test_item['input']} -> ERROR: {result}")
+        
+        failures = [line.strip() for line in lines[1:] if line.lstrip().startswith('✗')]
+        self._record_case({
+            'name': test_name,
+            'success': failed == 0,
+            'duration': time.perf_counter() - start,
+            'message': '\n'.join(failures)
+        })
+        return {'passed': passed, 'failed': failed, 'lines': lines}
+    
     def run_tests(self):
         """Run all function tests."""
         print("Running Lua function unit tests...")
@@ -368,40 +455,21 @@ end
             return False
         
         # Get test cases
-        test_cases = self._create_test_cases()
+        test_cases = self.selected_cases()
         
         total_tests = 0
         passed_tests = 0
         failed_tests = 0
         
         for test_case in test_cases:
-            test_name = test_case['name']
-            print(f"\nTesting {test_name}:")
-            
-            for i, test_item in enumerate(test_case['tests']):
-                total_tests += 1
-                test_id = f"{test_name}_{i+1}"
-                
-                # Create and run test
-                lua_code = self._create_test_lua_code(test_case, test_item)
-                success, result = self._run_lua_test(test_id, lua_code)
-                
-                if success:
-                    # Validate result
-                    expected = test_item.get('expected', '')
-                    expected_pattern = test_item.get('expected_pattern', '')
-                    expected_table = test_item.get('expected_table', '')
-                    
-                    if self._validate_result(result, expected, expected_pattern, expected_table):
-                        passed_tests += 1
-                        print(f"  ✓ Test {i+1}: {test_item['input']} -> {result}")
-                    else:
-                        failed_tests += 1
-                        expected_display = expected_table or expected or expected_pattern
-                        print(f"  ✗ Test {i+1}: {test_item['input']} -> {result} (expected: {expected_display})")
-                else:
-                    failed_tests += 1
-                    print(f"  ✗ Test {i+1}: {test_item['input']} -> ERROR: {result}")
+            outcome = self.run_test_case(test_case)
+            for line in outcome['lines']:
+                print(line)
+            total_tests += outcome['passed'] + outcome['failed']
+            passed_tests += outcome['passed']
+            failed_tests += outcome['failed']
+        
+        self.close_pool()
         
         # Summary
         print(f"\nFunction test results:")
@@ -431,12 +499,14 @@ def main():
     
     parser = argparse.ArgumentParser(description='Run Lua function unit tests for LuminariGUI')
     parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to test')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--stream', action='store_true', help='Stream scripts from the XML instead of building the full index (bounded memory)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode')
     
     args = parser.parse_args()
     
-    tester = LuaFunctionTester(args.xml)
+    tester = LuaFunctionTester(args.xml, use_cache=not args.no_cache, streaming=args.stream)
     
     if args.quiet:
         # Suppress print statements
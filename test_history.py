@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Test History for LuminariGUI
+Appends every test run (commit, time, per-case durations and benchmark stats)
+to a local SQLite database and flags cases whose latest timing regressed.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import statistics
+import subprocess
+
+from disk_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_HISTORY_FILE = os.path.join(DEFAULT_CACHE_DIR, "history.sqlite")
+
+# Stored as the database's user_version
+SCHEMA_VERSION = 1
+
+# Columns a case can be judged on, preferred first
+METRICS = (('bench_median', 'median'), ('bench_avg', 'average'), ('duration', 'duration'))
+
+# Regression check defaults: previous runs compared against, the fewest runs
+# needed to judge, the robust z-score that counts as significant, and the
+# smallest slowdown worth reporting however steady the history is
+DEFAULT_WINDOW = 10
+MIN_SAMPLES = 5
+DEFAULT_THRESHOLD = 3.5
+MIN_SLOWDOWN = 0.10
+
+# Wall times below this (seconds) are mostly scheduler noise and are not judged
+MIN_TIMED_DURATION = 0.01
+
+# Scale that makes the median absolute deviation comparable to a standard deviation
+MAD_SCALE = 1.4826
+
+
+def current_commit(directory=None):
+    """Return (HEAD commit, whether the tree has uncommitted changes), or (None, None) outside git."""
+    try:
+        head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=directory, capture_output=True,
+                              text=True, timeout=10)
+        if head.returncode != 0:
+            return None, None
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--'], cwd=directory,
+                               capture_output=True, timeout=30)
+        return head.stdout.strip(), dirty.returncode != 0
+    except (OSError, subprocess.TimeoutExpired):
+        return None, None
+
+
+def robust_z(value, samples):
+    """Return how many robust standard deviations value lies above the samples' median."""
+    median = statistics.median(samples)
+    mad = statistics.median(abs(sample - median) for sample in samples) * MAD_SCALE
+    if mad == 0:
+        return float('inf') if value > median else 0.0
+    return (value - median) / mad
+
+
+class RunHistory:
+    def __init__(self, history_file=DEFAULT_HISTORY_FILE):
+        self.history_file = history_file
+        directory = os.path.dirname(history_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(history_file, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.db:
+            self.db.executescript('''
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    started_at TEXT NOT NULL,
+                    commit_id TEXT,
+                    dirty INTEGER,
+                    xml_file TEXT,
+                    duration REAL,
+                    passed INTEGER,
+                    failed INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS cases (
+                    run_id INTEGER NOT NULL REFERENCES runs(id),
+                    suite TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    duration REAL,
+                    bench_avg REAL,
+                    bench_min REAL,
+                    bench_max REAL,
+                    bench_count INTEGER,
+                    bench_median REAL,
+                    bench_p95 REAL,
+                    bench_mad REAL,
+                    bench_ci_low REAL,
+                    bench_ci_high REAL
+                );
+                CREATE INDEX IF NOT EXISTS cases_by_case ON cases (suite, name, run_id);
+            ''')
+            self.db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def record_run(self, cases, started_at=None, duration=None, xml_file=None, commit=None, dirty=None):
+        """Append one run; cases are dicts with suite, name, success, duration and optional skipped and benchmark.
+
+        benchmark is the summary a PerformanceTester reports for the case
+        (see benchmark_stats.summarize). Returns the run id.
+        """
+        cases = list(cases)
+        if commit is None:
+            commit, dirty = current_commit(os.path.dirname(os.path.abspath(xml_file or '.')))
+        started_at = started_at or time.time()
+        statuses = ['skipped' if case.get('skipped') else 'passed' if case['success'] else 'failed'
+                    for case in cases]
+        with self.db:
+            cursor = self.db.execute(
+                'INSERT INTO runs (started_at, commit_id, dirty, xml_file, duration, passed, failed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started_at)), commit,
+                 None if dirty is None else int(dirty), xml_file, duration, statuses.count('passed'),
+                 statuses.count('failed')))
+            run_id = cursor.lastrowid
+            rows = []
+            for case, status in zip(cases, statuses):
+                benchmark = case.get('benchmark') or {}
+                ci_low, ci_high = benchmark.get('median_ci') or (None, None)
+                rows.append((run_id, case['suite'], case['name'], status,
+                             case.get('duration'), benchmark.get('mean'), benchmark.get('min'), benchmark.get('max'),
+                             benchmark.get('samples'), benchmark.get('median'), benchmark.get('p95'),
+                             benchmark.get('mad'), ci_low, ci_high))
+            self.db.executemany(
+                'INSERT INTO cases (run_id, suite, name, status, duration, bench_avg, bench_min, bench_max, '
+                'bench_count, bench_median, bench_p95, bench_mad, bench_ci_low, bench_ci_high) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return run_id
+
+    def runs(self, limit=20):
+        """Return the latest runs, newest first."""
+        return self.db.execute('SELECT * FROM runs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+
+    def trend(self, suite, name, limit=20):
+        """Return the latest results of one case, oldest first."""
+        rows = self.db.execute(
+            'SELECT runs.id AS run_id, runs.started_at, runs.commit_id, runs.dirty, cases.* '
+            'FROM cases JOIN runs ON runs.id = cases.run_id '
+            'WHERE cases.suite = ? AND cases.name = ? ORDER BY runs.id DESC LIMIT ?',
+            (suite, name, limit)).fetchall()
+        return rows[::-1]
+
+    def regressions(self, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD, min_slowdown=MIN_SLOWDOWN):
+        """Flag cases whose latest run failed or was significantly slower than before.
+
+        A case whose newest row failed is flagged with its status (its
+        metric is None); a skipped one has no timing and is left out.
+        Otherwise each case is judged on its benchmark median when it has one (the
+        average for runs recorded before medians were), its wall time
+        otherwise. The latest value is compared with the same metric of
+        the previous window passing runs of the same case: it is a
+        regression when its robust z-score (distance from the median in
+        median-absolute-deviation units, which one noisy run in the window
+        cannot skew) exceeds threshold and it is at least min_slowdown
+        slower than the median. Cases with fewer than MIN_SAMPLES earlier
+        runs, and wall times that are usually under MIN_TIMED_DURATION,
+        are skipped.
+        """
+        flagged = []
+        keys = self.db.execute('SELECT DISTINCT suite, name FROM cases ORDER BY suite, name').fetchall()
+        for key in keys:
+            latest = self.db.execute(
+                'SELECT * FROM cases WHERE suite = ? AND name = ? ORDER BY run_id DESC LIMIT 1',
+                (key['suite'], key['name'])).fetchone()
+            if latest is None or latest['status'] == 'skipped':
+                continue
+            if latest['status'] != 'passed':
+                flagged.append({
+                    'suite': key['suite'],
+                    'name': key['name'],
+                    'run_id': latest['run_id'],
+                    'status': latest['status'],
+                    'metric': None
+                })
+                continue
+            column, metric = next(((column, metric) for column, metric in METRICS if latest[column] is not None),
+                                  (None, None))
+            if column is None:
+                continue
+            rows = self.db.execute(
+                f'SELECT run_id, {column} AS value FROM cases WHERE suite = ? AND name = ? AND status = ? '
+                f'AND {column} IS NOT NULL ORDER BY run_id DESC LIMIT ?',
+                (key['suite'], key['name'], 'passed', window + 1)).fetchall()
+            if len(rows) < MIN_SAMPLES + 1:
+                continue
+            samples = [row['value'] for row in rows[1:]]
+            median = statistics.median(samples)
+            if metric == 'duration' and median < MIN_TIMED_DURATION:
+                continue
+            z = robust_z(rows[0]['value'], samples)
+            if z > threshold and rows[0]['value'] > median * (1 + min_slowdown):
+                flagged.append({
+                    'suite': key['suite'],
+                    'name': key['name'],
+                    'run_id': latest['run_id'],
+                    'status': latest['status'],
+                    'metric': metric,
+                    'latest': rows[0]['value'],
+                    'median': median,
+                    'z': z,
+                    'samples': len(samples)
+                })
+        return flagged
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _format_value(value, is_benchmark):
+    if value is None:
+        return '-'
+    # Benchmark stats are already milliseconds; durations are seconds
+    return f"{value:.4f}ms" if is_benchmark else f"{value * 1000:.1f}ms"
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Query the local history of LuminariGUI test runs')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_FILE, help='History database (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=10, help='Number of recent runs to list (default: %(default)s)')
+    parser.add_argument('--trend', metavar='SUITE::CASE', help='Show the timings of one case across runs')
+    parser.add_argument('--regressions', action='store_true',
+                        help='Flag cases whose latest run failed or regressed significantly; exit 1 if any')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help='Earlier runs each case is compared with (default: %(default)s)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Robust z-score that counts as a regression (default: %(default)s)')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.history):
+        print(f"No history at {args.history}; run python3 run_tests.py to start one")
+        sys.exit(1)
+
+    with RunHistory(args.history) as history:
+        if args.trend:
+            suite, _, name = args.trend.partition('::')
+            rows = history.trend(suite, name, args.runs)
+            if not rows:
+                print(f"No runs of {args.trend} in {args.history}")
+                sys.exit(1)
+            print(f"{args.trend} (last {len(rows)} runs):")
+            for row in rows:
+                commit = (row['commit_id'] or 'no git')[:10] + ('+' if row['dirty'] else '')
+                line = f"  #{row['run_id']:<5} {row['started_at']}  {commit:<11} {row['status']:<6} " \
+                       f"{_format_value(row['duration'], False):>9}"
+                if row['bench_median'] is not None:
+                    line += f"  median {_format_value(row['bench_median'], True)}" \
+                            f" (CI {_format_value(row['bench_ci_low'], True)}-{_format_value(row['bench_ci_high'], True)})" \
+                            f"  p95 {_format_value(row['bench_p95'], True)}  MAD {_format_value(row['bench_mad'], True)}"
+                elif row['bench_avg'] is not None:
+                    line += f"  avg {_format_value(row['bench_avg'], True)}" \
+                            f"  min {_format_value(row['bench_min'], True)}" \
+                            f"  max {_format_value(row['bench_max'], True)}"
+                print(line)
+            return
+
+        if args.regressions:
+            flagged = history.regressions(args.window, args.threshold)
+            if not flagged:
+                print(f"No significant regressions (window {args.window}, z > {args.threshold})")
+                return
+            print(f"Regressions in the latest results ({len(flagged)}):")
+            for entry in flagged:
+                if entry['metric'] is None:
+                    print(f"  {entry['suite']}::{entry['name']} (run #{entry['run_id']}): {entry['status']}")
+                    continue
+                is_benchmark = entry['metric'] != 'duration'
+                slowdown = entry['latest'] / entry['median'] - 1 if entry['median'] else float('inf')
+                print(f"  {entry['suite']}::{entry['name']} (run #{entry['run_id']}): {entry['metric']} "
+                      f"{_format_value(entry['latest'], is_benchmark)} vs median "
+                      f"{_format_value(entry['median'], is_benchmark)} of {entry['samples']} runs "
+                      f"(+{slowdown:.0%}, z={entry['z']:.1f})")
+            sys.exit(1)
+
+        print(f"Recent runs in {args.history}:")
+        for row in history.runs(args.runs):
+            commit = (row['commit_id'] or 'no git')[:10] + ('+' if row['dirty'] else '')
+            print(f"  #{row['id']:<5} {row['started_at']}  {commit:<11} "
+                  f"{row['passed']} passed, {row['failed']} failed in {row['duration'] or 0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
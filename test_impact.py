@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Test Impact Analysis for LuminariGUI
+Indexes the package scripts, global functions and events every runtime test
+case exercises, so a run can be limited to the cases affected by a change.
+"""
+
+import os
+import sys
+import subprocess
+import xml.etree.ElementTree as ET
+
+import lua_parser
+from package_model import PackageModel, load_package_model
+from package_watch import script_key, script_fingerprints, diff_fingerprints
+
+# Calls whose first argument names an event
+EVENT_CALLS = frozenset(('registerAnonymousEventHandler', 'raiseEvent'))
+
+# Case fields that are prose rather than Lua
+DESCRIPTION_FIELDS = frozenset(('description',))
+
+# Case fields naming the package code a case runs rather than holding Lua:
+# 'script' (a script path) and 'entry_points' ((event, handler) pairs and
+# trigger/alias paths, see PerformanceTester._handler_case)
+ENTRY_FIELDS = frozenset(('script', 'entry_points'))
+
+# Harness modules every runtime case goes through (the performance cases also
+# through the catalog, statistics and profiler); changing one selects them all
+SHARED_MODULES = frozenset((
+    'lua_worker.py', 'mudlet_standin.py', 'result_cache.py', 'run_tests.py', 'test_impact.py',
+    'package_model.py', 'lua_parser.py', 'hot_paths.py', 'benchmark_stats.py', 'lua_profile.py',
+    'disk_cache.py', 'package_watch.py'
+))
+
+# Test inputs outside the package, relative to this directory: the MSDP
+# fixtures (read through mudlet_standin.load_fixture) and the runner
+# settings (thresholds, timeouts); changing one selects every case
+SHARED_INPUTS = (
+    os.path.join('tests', 'mock_data') + os.sep,
+    os.path.join('tests', 'test_configs', 'test_settings.json')
+)
+TOOLS_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def shared_input(path):
+    """Return a changed file's path relative to the tools when it is a shared test input, else None."""
+    relative = os.path.relpath(os.path.realpath(path), TOOLS_DIR)
+    if any(relative == name or relative.startswith(name) for name in SHARED_INPUTS):
+        return relative.replace(os.sep, '/')
+    return None
+
+
+def lua_symbols(source):
+    """Return the global functions, names and events a piece of Lua touches.
+
+    The result has 'defines' (functions assigned to global or dotted
+    names), 'references' (every name or dotted name it mentions, with
+    ':' written as '.') and 'events' (string literals passed to
+    registerAnonymousEventHandler or raiseEvent). Source that does not
+    tokenize yields empty sets.
+    """
+    symbols = {'defines': set(), 'references': set(), 'events': set()}
+    try:
+        tokens = lua_parser.tokenize(source)
+    except lua_parser.LuaSyntaxError:
+        return symbols
+
+    count = len(tokens)
+    i = 0
+    while i < count:
+        if tokens[i][0] != '<name>':
+            i += 1
+            continue
+
+        parts = [tokens[i][1]]
+        j = i + 1
+        while j + 1 < count and tokens[j][0] in ('.', ':') and tokens[j + 1][0] == '<name>':
+            parts.append(tokens[j + 1][1])
+            j += 2
+
+        prev = tokens[i - 1][0] if i > 0 else None
+        if prev not in ('.', ':'):
+            name = '.'.join(parts)
+            symbols['references'].add(name)
+            if prev == 'function' and (i < 2 or tokens[i - 2][0] != 'local'):
+                symbols['defines'].add(name)
+            elif (prev not in ('local', '{', ',') and j + 1 < count
+                  and tokens[j][0] == '=' and tokens[j + 1][0] == 'function'):
+                symbols['defines'].add(name)
+            elif (name in EVENT_CALLS and j + 1 < count
+                  and tokens[j][0] == '(' and tokens[j + 1][0] == '<string>'):
+                symbols['events'].add(lua_parser.string_value(tokens[j + 1][1]))
+        i = j
+
+    return symbols
+
+
+def case_symbols(test_case):
+    """Collect the symbols of every Lua snippet in a test case definition.
+
+    Besides the Lua, the package code a case names in its script and
+    entry_points fields counts: handler names as references, events,
+    and script paths under 'scripts', as the generic entry-point cases
+    name their handlers only inside Lua strings.
+    """
+    symbols = {'defines': set(), 'references': set(), 'events': set(), 'scripts': set()}
+    if test_case.get('script'):
+        symbols['scripts'].add(test_case['script'])
+    for point in test_case.get('entry_points', ()):
+        if isinstance(point, str):
+            symbols['scripts'].add(point)
+            continue
+        event, handler = point
+        if event:
+            symbols['events'].add(event)
+        if handler:
+            symbols['references'].add(handler)
+    stack = [test_case]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(item for key, item in value.items()
+                         if key not in DESCRIPTION_FIELDS and key not in ENTRY_FIELDS)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, str):
+            for kind, names in lua_symbols(value).items():
+                symbols[kind] |= names
+    return symbols
+
+
+def script_links(script_symbols, test_symbols, path=None):
+    """Return the functions and events shared by a script and a test case.
+
+    path is the script's folder path; a case naming it (see case_symbols)
+    is linked to the whole script, listed under functions by its path.
+    """
+    functions = script_symbols['defines'] & test_symbols['references']
+    if path is not None and path in test_symbols.get('scripts', ()):
+        functions.add(path)
+    events = script_symbols['events'] & test_symbols['events']
+    return functions, events
+
+
+class ImpactIndex:
+    def __init__(self, model=None):
+        self.model = model
+        # "<suite>::<case>" -> {'suite', 'case', 'module', 'symbols'}
+        self.cases = {}
+        self._script_symbols = {}
+
+    def add_suite(self, test_name, tester):
+        """Index every case of a runtime suite (an object with list_cases/get_case)."""
+        module = sys.modules[type(tester).__module__].__file__
+        for case in tester.list_cases():
+            self.cases[f"{test_name}::{case}"] = {
+                'suite': test_name,
+                'case': case,
+                'module': os.path.realpath(module),
+                'symbols': case_symbols(tester.get_case(case))
+            }
+
+    def symbols_of(self, script):
+        """Return the symbols of a script record, computed once per script text."""
+        content = script['content']
+        if content not in self._script_symbols:
+            self._script_symbols[content] = lua_symbols(content)
+        return self._script_symbols[content]
+
+    def dependencies(self, case_key):
+        """Return {script key: (functions, events)} for the scripts a case exercises."""
+        found = {}
+        if self.model is None:
+            return found
+        symbols = self.cases[case_key]['symbols']
+        for key, (_, script) in script_fingerprints(self.model).items():
+            functions, events = script_links(self.symbols_of(script), symbols, script['path'])
+            if functions or events:
+                found[key] = (functions, events)
+        return found
+
+    def affected_cases(self, scripts, files=()):
+        """Return {case key: reasons} for the cases touched by a change.
+
+        scripts are the records that changed, in either version of the
+        package; files are changed file paths, and a change to the module
+        defining a suite selects all of its cases, as does a change to a
+        shared harness module or test input.
+        """
+        files = {os.path.realpath(path) for path in files}
+        shared = sorted(os.path.basename(path) for path in files if os.path.basename(path) in SHARED_MODULES)
+        shared.extend(sorted(filter(None, (shared_input(path) for path in files))))
+        affected = {}
+        for case_key, entry in self.cases.items():
+            reasons = list(shared)
+            if entry['module'] in files:
+                reasons.append(os.path.basename(entry['module']))
+            for script in scripts:
+                functions, events = script_links(self.symbols_of(script), entry['symbols'], script['path'])
+                reasons.extend(sorted(functions))
+                reasons.extend(f"event {event}" for event in sorted(events))
+            if reasons:
+                affected[case_key] = sorted(set(reasons), key=reasons.index)
+        return affected
+
+
+def _git(args, directory):
+    result = subprocess.run(['git'] + args, cwd=directory or None, capture_output=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def package_changes(xml_file, base, model):
+    """Compare the package with another version of it.
+
+    base is either the path of another copy of the XML file or a git
+    revision, in which case the files changed since that revision are
+    listed too. Returns a dict with 'changed' (current records of
+    changed or added scripts), 'previous' (the old records of changed or
+    removed scripts) and 'files' (absolute paths, empty for an XML file
+    base). Raises RuntimeError when git cannot provide the old version
+    and ET.ParseError when it is not valid XML.
+    """
+    directory = os.path.dirname(os.path.abspath(xml_file))
+    files = set()
+    if os.path.isfile(base):
+        with open(base, 'rb') as f:
+            data = f.read()
+    else:
+        data = _git(['show', f"{base}:./{os.path.basename(xml_file)}"], directory)
+        names = _git(['diff', '--name-only', '--relative', base, '--'], directory)
+        files = {os.path.join(directory, name) for name in names.decode('utf-8').splitlines() if name}
+
+    old_model = PackageModel(xml_file).load(data)
+    old = script_fingerprints(old_model)
+    new = script_fingerprints(model)
+    changed, removed = diff_fingerprints(old, new)
+    previous = [old[key][1] for key in old if key in new and old[key][0] != new[key][0]]
+    previous.extend(old[key][1] for key in removed)
+    return {'changed': changed, 'previous': previous, 'files': files}
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+    from test_functions import LuaFunctionTester
+    from test_events import EventSystemTester
+    from test_system import SystemTester
+    from test_performance import PerformanceTester
+
+    parser = argparse.ArgumentParser(description='Show which package scripts each runtime test case exercises')
+    parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to index')
+    parser.add_argument('--changed-since', metavar='REV',
+                        help='Only list the cases affected since a git revision (or another copy of the XML file)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+
+    args = parser.parse_args()
+
+    errors = []
+    model = load_package_model(args.xml, errors, use_cache=not args.no_cache)
+    if model is None:
+        for error in errors:
+            print(f"Error: {error}")
+        sys.exit(1)
+
+    index = ImpactIndex(model)
+    for test_name, test_class in [('Function Tests', LuaFunctionTester), ('Event System', EventSystemTester),
+                                  ('System Tests', SystemTester), ('Performance', PerformanceTester)]:
+        index.add_suite(test_name, test_class(args.xml, model=model))
+
+    if args.changed_since:
+        try:
+            change = package_changes(args.xml, args.changed_since, model)
+        except (OSError, RuntimeError, ET.ParseError) as e:
+            print(f"Error: cannot compare with {args.changed_since}: {e}")
+            sys.exit(1)
+        for script in change['changed']:
+            print(f"  ~ {script_key(script)}")
+        affected = index.affected_cases(change['changed'] + change['previous'], change['files'])
+        print(f"\n{len(affected)} of {len(index.cases)} cases affected:")
+        for case_key, reasons in affected.items():
+            print(f"  {case_key} ({', '.join(reasons)})")
+        return
+
+    for case_key in index.cases:
+        dependencies = index.dependencies(case_key)
+        print(f"{case_key}:")
+        if not dependencies:
+            print("  (no package scripts)")
+        for key, (functions, events) in sorted(dependencies.items()):
+            links = sorted(functions) + [f"event {event}" for event in sorted(events)]
+            print(f"  {key}: {', '.join(links)}")
+
+
+if __name__ == "__main__":
+    main()
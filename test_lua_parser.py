@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+"""
+Lua Parser
+==========
+Tests that lua_parser.check_syntax accepts what Lua 5.1 accepts and reports
+its errors with the same line and message as `luac -p`. The expected
+results below are those of luac 5.1; with a Lua 5.1 luac installed, every
+source is also checked against it directly.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from lua_parser import check_syntax, string_value
+
+# (source, expected) where expected is None for valid Lua 5.1, else (line, message)
+LONG_BRACKETS = [
+    ('local s = [==[ a ]] ]=] ]==]\nreturn s', None),
+    ('local s = [[\nline]]\nreturn s', None),
+    ('local s = [==[\nabc ]=]\n\nx = 1', (4, "unfinished long string near '<eof>'")),
+    ('local s = [=[ abc ]]', (1, "unfinished long string near '<eof>'")),
+    ('--[==[ comment ]] still\n]==] x = 1', None),
+    ('--[[ a ]==]\n]]\nx = 1', None),
+    ('--[==[\nunfinished ]]\n', (3, "unfinished long comment near '<eof>'")),
+    ('--[= not long\nx = 1', None),
+]
+
+NUMERIC_ESCAPES = [
+    ('local s = "\\65\\066\\0067\\255"', None),
+    ('local s = "\\\\256"', None),
+    ('local s = "\\256"', (1, "escape sequence too large near '\"'")),
+    ('local s = "a\\65\\300"', (1, "escape sequence too large near '\"aA'")),
+    ('local s = "\\300', (1, "escape sequence too large near '\"'")),
+]
+
+VARARGS = [
+    ('return ...', None),
+    ('local t = {...}', None),
+    ('function f(...) return ... end', None),
+    ('function f() return ... end', (1, "cannot use '...' outside a vararg function near '...'")),
+    ('function f(...) return function() return ... end end',
+     (1, "cannot use '...' outside a vararg function near '...'")),
+]
+
+METHOD_CALLS = [
+    ('a.b:c()', None),
+    ('a.b:c "x"', None),
+    ('a.b:c {1}', None),
+    ('a.b:c', (1, "function arguments expected near '<eof>'")),
+    ('a.b:c() = 1', (1, "unexpected symbol near '='")),
+    ('a.b.c', (1, "'=' expected near '<eof>'")),
+]
+
+# goto is not a keyword before Lua 5.2
+GOTO = [
+    ('local goto = 1\ngoto = goto + 1\nreturn goto', None),
+    ('goto continue', (1, "'=' expected near 'continue'")),
+]
+
+ERROR_LINES = [
+    ('x = 1\ny = 2\nz = = 3', (3, "unexpected symbol near '='")),
+    ('if x then\n  y = 1\n\nelse', (4, "'end' expected (to close 'if' at line 1) near '<eof>'")),
+    ('local s = "abc\nx = 1', (1, "unfinished string near '\"abc'")),
+    ('f\n(g)', (2, "ambiguous syntax (function call x new statement) near '('")),
+    ('x = 1 +\n\n\n', (4, "unexpected symbol near '<eof>'")),
+    ('local function f() end\nreturn\nx = 1', (3, "'<eof>' expected near '='")),
+    ('x = 1\ny = "a\\\nb\\999"', (3, "escape sequence too large near '\"a\nb'")),
+]
+
+ALL_CASES = LONG_BRACKETS + NUMERIC_ESCAPES + VARARGS + METHOD_CALLS + GOTO + ERROR_LINES
+
+
+def result(source):
+    """Return None if source parses, else the (line, message) of its error."""
+    error = check_syntax(source)
+    return None if error is None else (error.line, error.message)
+
+
+def assert_cases(cases):
+    for source, expected in cases:
+        assert result(source) == expected, source
+
+
+def test_long_strings_and_comments():
+    assert_cases(LONG_BRACKETS)
+
+
+def test_numeric_escapes():
+    assert_cases(NUMERIC_ESCAPES)
+    assert string_value('"\\65\\066\\0067\\255"') == 'AB\x067\xff'
+
+
+def test_varargs_only_in_vararg_functions():
+    assert_cases(VARARGS)
+
+
+def test_method_call_statements():
+    assert_cases(METHOD_CALLS)
+
+
+def test_goto_is_a_name():
+    assert_cases(GOTO)
+
+
+def test_error_lines():
+    assert_cases(ERROR_LINES)
+
+
+def find_luac51():
+    """Return a luac that reports Lua 5.1, or None."""
+    for executable in ('luac5.1', 'luac'):
+        path = shutil.which(executable)
+        if not path:
+            continue
+        version = subprocess.run([path, '-v'], capture_output=True, text=True, timeout=10)
+        if 'Lua 5.1' in version.stdout + version.stderr:
+            return path
+    return None
+
+
+def luac_result(luac, source):
+    """Return None if `luac -p` accepts source, else the (line, message) it reports."""
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'chunk.lua')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(source)
+        check = subprocess.run([luac, '-p', path], capture_output=True, text=True, timeout=10)
+    finally:
+        shutil.rmtree(directory)
+    if check.returncode == 0:
+        return None
+    line, message = re.search(r'chunk\.lua:(\d+): (.*)', check.stderr.strip(), re.DOTALL).groups()
+    return int(line), message
+
+
+def test_matches_luac():
+    luac = find_luac51()
+    if luac is None:
+        pytest.skip("luac 5.1 not found")
+    for source, _ in ALL_CASES:
+        assert result(source) == luac_result(luac, source), source
+
+
+if __name__ == "__main__":
+    test_long_strings_and_comments()
+    test_numeric_escapes()
+    test_varargs_only_in_vararg_functions()
+    test_method_call_statements()
+    test_goto_is_a_name()
+    test_error_lines()
+    if find_luac51():
+        test_matches_luac()
+    print("✅ Lua parser tests passed")
+    sys.exit(0)
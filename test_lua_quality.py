@@ -8,18 +8,71 @@ import os
 import sys
 import tempfile
 import subprocess
-import xml.etree.ElementTree as ET
 import json
 import re
 from pathlib import Path
 
+from package_model import load_package_model, stream_package_scripts, xml_line
+from disk_cache import DEFAULT_CACHE_DIR
+from quality_baseline import QualityBaseline, DEFAULT_BASELINE_FILE, issue_fingerprint
+from result_cache import tool_version, content_digest
+
+# Batch mode exports every script under this directory; unchanged files keep
+# their mtime, so luacheck's --cache can reuse its results on the next run
+LUACHECK_DIR = os.path.join(DEFAULT_CACHE_DIR, 'luacheck')
+
+# Upper bound for the single luacheck run over the whole package
+BATCH_TIMEOUT = 300
+
+# One issue in 'luacheck --formatter plain --codes --ranges' output, e.g.
+# scripts/ScriptPackage/GUI/Init.lua:12:7-9: (W211) unused variable 'x'
+LUACHECK_ISSUE_PATTERN = re.compile(
+    r'^(?P<file>.+?):(?P<line>\d+):(?P<column>\d+)(?:-\d+)?: '
+    r'\((?P<kind>[EW])(?P<code>\d+)\) (?P<message>.*)$'
+)
+
+# Characters not kept when a script path becomes a file name
+UNSAFE_PATH_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+
+FALLBACK_CONFIG = """
+-- Fallback Mudlet/LuminariGUI configuration
+std = "luajit"
+globals = {
+    "cecho", "decho", "echo", "send",
+    "raiseEvent", "registerAnonymousEventHandler",
+    "msdp", "gmcp", "mud", "matches",
+    "Geyser", "geyser",
+    "GUI", "LUM", "map", "demonnic"
+}
+ignore = {
+    "212", "213", "311", "411", "412", "421", "422", "542", "614"
+}
+"""
+
 class LuaQualityAnalyzer:
-    def __init__(self, xml_file="LuminariGUI.xml"):
+    def __init__(self, xml_file="LuminariGUI.xml", model=None, use_cache=True, streaming=False,
+                 batch=True, jobs=None, baseline_file=DEFAULT_BASELINE_FILE, result_cache=None):
         self.xml_file = xml_file
+        self.model = model
+        self.use_cache = use_cache
+        self.streaming = streaming
+        self.batch = batch
+        self.jobs = jobs or os.cpu_count() or 1
+        self.result_cache = result_cache
         self.luacheck_path = self._find_luacheck()
+        self.config_path = None
         self.errors = []
         self.warnings = []
         self.issues = []
+        # Set once run_analysis has checked at least one script
+        self.analyzed = False
+        # Known issues are hidden when a baseline exists; pass baseline_file=None to report everything
+        self.baseline = None
+        if baseline_file:
+            baseline = QualityBaseline(baseline_file)
+            if baseline.load():
+                self.baseline = baseline
+            self.warnings.extend(baseline.errors)
         
     def _find_luacheck(self):
         """Find luacheck executable in system PATH."""
@@ -29,75 +82,71 @@ class LuaQualityAnalyzer:
                 return luacheck_path
         return None
     
+    def get_model(self):
+        """Return the shared package model, parsing the XML on first use."""
+        if self.model is None:
+            self.model = load_package_model(self.xml_file, self.errors, self.use_cache)
+        return self.model
+    
+    def _iter_scripts(self):
+        """Yield script records from the shared model, or stream them from the XML."""
+        if self.streaming and self.model is None:
+            return stream_package_scripts(self.xml_file, self.errors)
+        model = self.get_model()
+        return iter(model.scripts) if model is not None else iter(())
+    
     def _extract_lua_scripts(self):
-        """Extract all Lua script blocks from XML."""
-        if not os.path.exists(self.xml_file):
-            self.errors.append(f"XML file not found: {self.xml_file}")
-            return []
-        
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            self.errors.append(f"XML parsing error: {e}")
-            return []
-        
-        scripts = []
-        
-        # Create a parent map for ElementTree compatibility
-        parent_map = {c: p for p in root.iter() for c in p}
-        
-        # Find all <script> elements
-        for script_elem in root.iter('script'):
-            script_text = script_elem.text
-            if script_text and script_text.strip():
-                # Get parent context for better error reporting
-                parent = parent_map.get(script_elem)
-                if parent is not None:
-                    name_elem = parent.find('name')
-                    script_name = name_elem.text if name_elem is not None else "unnamed"
-                else:
-                    script_name = "unnamed"
-                
-                scripts.append({
-                    'name': script_name,
-                    'content': script_text,
-                    'line': script_elem.sourceline if hasattr(script_elem, 'sourceline') else 0
-                })
-        
-        return scripts
+        """Extract all Lua script blocks from XML as a stream of records."""
+        return self._iter_scripts()
     
     def _get_luacheck_config(self):
         """Get the path to the luacheck configuration file."""
+        if self.config_path is not None:
+            return self.config_path
+        
         # Check if custom config exists
         config_path = os.path.join("tests", "test_configs", "luacheck_config.lua")
-        if os.path.exists(config_path):
-            return config_path
-        
-        # Fallback to creating a temporary config
-        self.warnings.append("Using fallback luacheck configuration. Consider using tests/test_configs/luacheck_config.lua")
-        config_content = """
--- Fallback Mudlet/LuminariGUI configuration
-std = "luajit"
-globals = {
-    "cecho", "decho", "echo", "send",
-    "raiseEvent", "registerAnonymousEventHandler",
-    "msdp", "gmcp", "mud", "matches",
-    "Geyser", "geyser",
-    "GUI", "LUM", "map", "demonnic"
-}
-ignore = {
-    "212", "213", "311", "411", "412", "421", "422", "542", "614"
-}
-"""
+        if not os.path.exists(config_path):
+            # Fallback to a generated config, written once and kept between runs
+            self.warnings.append("Using fallback luacheck configuration. Consider using tests/test_configs/luacheck_config.lua")
+            config_path = os.path.join(LUACHECK_DIR, 'fallback.luacheckrc')
+            os.makedirs(LUACHECK_DIR, exist_ok=True)
+            _write_if_changed(config_path, FALLBACK_CONFIG.encode('utf-8'))
         
-        config_file = tempfile.NamedTemporaryFile(mode='w', suffix='.luacheckrc', delete=False)
-        config_file.write(config_content)
-        config_file.close()
-        return config_file.name
+        self.config_path = config_path
+        return config_path
+    
+    def _luacheck_command(self, paths, extra=()):
+        """Build a luacheck command line with machine-readable output."""
+        return ([self.luacheck_path, '--config', self._get_luacheck_config(),
+                 '--formatter', 'plain', '--codes', '--ranges'] + list(extra) + list(paths))
     
-    def _analyze_script(self, script_name, script_content):
-        """Analyze a single Lua script with luacheck."""
+    def _record_issue(self, match, script_name, script=None, lines=None):
+        """Build one parsed luacheck issue, keyed by its real warning code.
+
+        lines holds the script text split into lines; the offending line
+        goes into the issue's baseline fingerprint.
+        """
+        line_num = int(match.group('line'))
+        source_line = lines[line_num - 1] if lines and line_num <= len(lines) else ''
+        script_path = script['path'] if script is not None else script_name
+        return {
+            'script': script_name,
+            'line': line_num,
+            'xml_line': xml_line(script, line_num) if script is not None else None,
+            'column': int(match.group('column')),
+            'code': match.group('code'),
+            'message': match.group('message').strip(),
+            'severity': 'error' if match.group('kind') == 'E' else 'warning',
+            'fingerprint': issue_fingerprint(script_path, match.group('code'), match.group('message'), source_line)
+        }
+    
+    def _analyze_script(self, script_name, script_content, script=None):
+        """Analyze a single Lua script with luacheck.
+
+        When the script record is given, each issue also records the
+        matching line of the XML file.
+        """
         if not self.luacheck_path:
             self.errors.append("luacheck not found in PATH. Please install luacheck.")
             return False
@@ -107,51 +156,25 @@ ignore = {
             script_file.write(script_content)
             script_file_path = script_file.name
         
-        config_file_path = self._get_luacheck_config()
-        
         try:
-            # Run luacheck without JSON formatter (use default output)
             result = subprocess.run(
-                [self.luacheck_path, '--config', config_file_path, script_file_path],
+                self._luacheck_command([script_file_path]),
                 capture_output=True,
                 text=True,
                 timeout=30
             )
             
-            if result.returncode == 0:
-                # No issues found
-                return True
-            elif result.returncode == 1:
-                # Issues found, parse default output
-                # Default luacheck output format:
-                # filename:line:column: message
-                for line in result.stdout.strip().split('\n'):
-                    if line and ':' in line and not line.startswith('Checking') and not line.startswith('Total:'):
-                        # Parse line like: test.lua:3:5: setting non-standard global variable 'unused_global'
-                        match = re.match(r'^\s*([^:]+):(\d+):(\d+):\s*(.+)$', line)
-                        if match:
-                            _, line_num, col_num, message = match.groups()
-                            # Determine severity based on message content
-                            if 'error' in message.lower():
-                                severity = 'error'
-                                code = 'E'
-                            else:
-                                severity = 'warning'
-                                code = 'W'
-                            
-                            self.issues.append({
-                                'script': script_name,
-                                'line': int(line_num),
-                                'column': int(col_num),
-                                'code': code,
-                                'message': message.strip(),
-                                'severity': severity
-                            })
-                return False
-            else:
-                # luacheck error
-                self.errors.append(f"luacheck error for '{script_name}': {result.stderr}")
+            # 0 = clean, 1 = warnings, 2 = syntax errors; anything else is a luacheck failure
+            if result.returncode > 2:
+                self.errors.append(f"luacheck error for '{script_name}': {result.stderr or result.stdout}")
                 return False
+            
+            lines = script_content.split('\n')
+            for line in result.stdout.splitlines():
+                match = LUACHECK_ISSUE_PATTERN.match(line)
+                if match:
+                    self.issues.append(self._record_issue(match, script_name, script, lines))
+            return result.returncode == 0
                 
         except subprocess.TimeoutExpired:
             self.errors.append(f"Timeout analyzing script '{script_name}'")
@@ -163,13 +186,150 @@ ignore = {
             # Clean up temporary files
             try:
                 os.unlink(script_file_path)
-                # Only delete config if it's a temporary file
-                if config_file_path and not config_file_path.endswith("luacheck_config.lua"):
-                    os.unlink(config_file_path)
-            except:
+            except OSError:
                 pass
     
-    def _categorize_issues(self):
+    def _export_scripts(self, scripts):
+        """Write every script to a stable file under LUACHECK_DIR.
+
+        Each script gets a file named after its container and folder path,
+        and a file is only rewritten when its text changed, so luacheck's
+        cache stays valid for untouched scripts. Files left over from
+        scripts that no longer exist are removed. Returns a list of
+        (script record without its text, path) pairs.
+        """
+        root = os.path.join(LUACHECK_DIR, 'scripts')
+        exported = []
+        used = set()
+        for script in scripts:
+            parts = [script['container']] + script['path'].split('/')
+            relative = os.path.join(*[UNSAFE_PATH_CHARS.sub('_', part).strip('.') or '_' for part in parts])
+            # Sibling items may share a name; number the repeats in document order
+            path = os.path.join(root, relative + '.lua')
+            count = 1
+            while path in used:
+                count += 1
+                path = os.path.join(root, f"{relative}-{count}.lua")
+            used.add(path)
+            
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_if_changed(path, script['content'].encode('utf-8'))
+            # Only the location fields are needed once the text is on disk
+            exported.append(({key: value for key, value in script.items() if key != 'content'}, path))
+        
+        for dirpath, _, filenames in os.walk(root, topdown=False):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if path not in used:
+                    os.unlink(path)
+            if dirpath != root and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+        
+        return exported
+    
+    def _analyze_batch(self, scripts):
+        """Analyze every script with a single luacheck run; return (script, passed, issues) per script.
+
+        Scripts are exported to a stable file tree and checked by one
+        luacheck process using its result cache and one job per CPU.
+        Issues are mapped back to the script and XML line they came from.
+        """
+        if not self.luacheck_path:
+            self.errors.append("luacheck not found in PATH. Please install luacheck.")
+            return []
+        
+        exported = self._export_scripts(scripts)
+        if not exported:
+            return []
+        
+        by_path = {}
+        for script, path in exported:
+            by_path[path] = (script, path)
+            by_path[os.path.normpath(path)] = (script, path)
+        # Exported text, read back only for scripts that have issues
+        lines_by_path = {}
+        
+        command = self._luacheck_command(
+            [path for _, path in exported],
+            ['--cache', os.path.join(LUACHECK_DIR, 'luacheck.cache'), '-j', str(self.jobs)]
+        )
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=BATCH_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.errors.append(f"Timeout running luacheck on {len(exported)} scripts")
+            return [(script, False, []) for script, _ in exported]
+        except OSError as e:
+            self.errors.append(f"Error running luacheck: {e}")
+            return [(script, False, []) for script, _ in exported]
+        
+        failed = set()
+        issues = {}
+        for line in result.stdout.splitlines():
+            match = LUACHECK_ISSUE_PATTERN.match(line)
+            if match:
+                entry = by_path.get(match.group('file')) or by_path.get(os.path.normpath(match.group('file')))
+                if entry is not None:
+                    script, path = entry
+                    if path not in lines_by_path:
+                        with open(path, 'r', encoding='utf-8', newline='') as f:
+                            lines_by_path[path] = f.read().split('\n')
+                    issue = self._record_issue(match, script['name'], script, lines_by_path[path])
+                    issues.setdefault(id(script), []).append(issue)
+                    failed.add(id(script))
+                continue
+            
+            # Fatal errors (unreadable file, broken config) are 'path: message'
+            path, _, message = line.partition(': ')
+            if path in by_path:
+                script = by_path[path][0]
+                self.errors.append(f"luacheck error for '{script['name']}': {message}")
+                failed.add(id(script))
+        
+        if result.returncode > 2 and not failed:
+            self.errors.append(f"luacheck error: {result.stderr.strip() or result.stdout.strip()}")
+            return [(script, False, []) for script, _ in exported]
+        
+        return [(script, id(script) not in failed, issues.get(id(script), [])) for script, _ in exported]
+    
+    def _analyze_one(self, script):
+        """Analyze one script on its own and return (passed, issues found in it)."""
+        before = len(self.issues)
+        passed = self._analyze_script(script['name'], script['content'], script)
+        issues = self.issues[before:]
+        del self.issues[before:]
+        return passed, issues
+    
+    def _result_key(self, script):
+        """Key a script's issues by its text, the luacheck version and the config."""
+        with open(self._get_luacheck_config(), 'rb') as f:
+            config = f.read()
+        return self.result_cache.key('luacheck', tool_version(self.luacheck_path, '--version'),
+                                     content_digest(config), script['content'])
+    
+    def _cached_outcome(self, script):
+        """Return a cached (passed, issues) for script with fresh XML lines, or None."""
+        if self.result_cache is None:
+            return None
+        cached = self.result_cache.get(self._result_key(script))
+        if cached is None:
+            return None
+        passed, issues = cached
+        return passed, [dict(issue, script=script['name'], xml_line=xml_line(script, issue['line']))
+                        for issue in issues]
+    
+    def _store_outcome(self, script, passed, issues):
+        # A failure without issues means luacheck itself failed, which is worth retrying
+        if self.result_cache is None or not (passed or issues):
+            return
+        self.result_cache.put(self._result_key(script), (passed, [dict(issue, xml_line=None) for issue in issues]))
+    
+    def _reported_issues(self):
+        """Return every issue, or only the ones not in the baseline when one is loaded."""
+        if self.baseline is None:
+            return self.issues
+        return self.baseline.new_issues(self.issues)
+    
+    def _categorize_issues(self, issues=None):
         """Categorize issues by severity and type."""
         categorized = {
             'critical': [],
@@ -178,12 +338,12 @@ ignore = {
             'style': []
         }
         
-        for issue in self.issues:
+        for issue in self._reported_issues() if issues is None else issues:
             code = issue['code']
             severity = issue['severity']
             
-            # Critical issues (undefined access)
-            if code in ['111', '112', '113', '142', '143', '321']:
+            # Critical issues (syntax errors, undefined access)
+            if severity == 'error' or code in ['111', '112', '113', '142', '143', '321']:
                 categorized['critical'].append(issue)
             # Errors (logic problems)
             elif code in ['511', '512', '521', '531', '541']:
@@ -209,44 +369,79 @@ ignore = {
             print("  Ubuntu/Debian: sudo apt-get install luacheck")
             print("  macOS: brew install luacheck")
             print("  Other: luarocks install luacheck")
+            self.errors.append("luacheck not found in PATH. Please install luacheck.")
             return False
         
-        # Extract scripts from XML
-        scripts = self._extract_lua_scripts()
-        if not scripts:
-            if not self.errors:
-                self.warnings.append("No Lua scripts found in XML file")
-            return False
-        
-        print(f"Found {len(scripts)} Lua scripts to analyze")
-        
-        # Analyze each script
         passed = 0
         failed = 0
         
-        for script in scripts:
-            if self._analyze_script(script['name'], script['content']):
+        # Scripts already checked with this luacheck and config are not re-run
+        scripts = self._extract_lua_scripts()
+        outcomes = {}
+        if self.batch:
+            # One luacheck run over the exported script tree
+            if self.result_cache is None:
+                results = self._analyze_batch(scripts)
+                scripts = [script for script, _, _ in results]
+                pending = range(len(scripts))
+            else:
+                scripts = list(scripts)
+                for index, script in enumerate(scripts):
+                    cached = self._cached_outcome(script)
+                    if cached is not None:
+                        outcomes[index] = cached
+                pending = [index for index in range(len(scripts)) if index not in outcomes]
+                results = self._analyze_batch([scripts[index] for index in pending])
+            for index, (_, ok, issues) in zip(pending, results):
+                outcomes[index] = (ok, issues)
+                self._store_outcome(scripts[index], ok, issues)
+        
+        # Without batching each script is analyzed as it is extracted from the XML
+        for index, script in enumerate(scripts):
+            outcome = outcomes.pop(index, None) or self._cached_outcome(script)
+            if outcome is not None:
+                ok, issues = outcome
+            else:
+                ok, issues = self._analyze_one(script)
+                self._store_outcome(script, ok, issues)
+            self.issues.extend(issues)
+            
+            if ok:
                 passed += 1
                 print(f"✓ {script['name']}")
             else:
                 failed += 1
                 print(f"⚠ {script['name']}")
         
+        if passed + failed == 0:
+            if not self.errors:
+                self.warnings.append("No Lua scripts found in XML file")
+            return False
+        self.analyzed = True
+        
         # Categorize and display results
-        categorized = self._categorize_issues()
+        reported = self._reported_issues()
+        categorized = self._categorize_issues(reported)
         
         print(f"\nQuality analysis results:")
-        print(f"  Scripts analyzed: {len(scripts)}")
+        print(f"  Scripts analyzed: {passed + failed}")
         print(f"  Clean scripts: {passed}")
         print(f"  Scripts with issues: {failed}")
         print(f"  Total issues: {len(self.issues)}")
+        if self.baseline is not None:
+            print(f"  Known issues (baseline): {len(self.issues) - len(reported)}")
+            print(f"  New issues: {len(reported)}")
         
         # Display issues by category
         for category, issues in categorized.items():
             if issues:
                 print(f"\n{category.upper()} ({len(issues)} issues):")
+                xml_name = os.path.basename(self.xml_file)
                 for issue in issues:
-                    print(f"  {issue['script']}:{issue['line']}:{issue['column']} - {issue['message']}")
+                    location = f"{issue['script']}:{issue['line']}:{issue['column']}"
+                    if issue.get('xml_line'):
+                        location += f" ({xml_name}:{issue['xml_line']})"
+                    print(f"  {location} - {issue['message']}")
         
         # Display errors
         if self.errors:
@@ -256,23 +451,58 @@ ignore = {
         
         return len(categorized['critical']) == 0 and len(categorized['errors']) == 0
     
+    def update_baseline(self, baseline_file=DEFAULT_BASELINE_FILE):
+        """Accept every issue found by the last analysis as the new baseline."""
+        if not self.analyzed:
+            print("Baseline not updated: no scripts were analyzed")
+            return False
+        if self.errors:
+            print("Baseline not updated: luacheck did not run cleanly")
+            return False
+        baseline = QualityBaseline(baseline_file)
+        baseline.save(self.issues)
+        self.baseline = baseline
+        print(f"Baseline updated: {len(self.issues)} issues accepted in {baseline_file}")
+        return True
+    
     def get_results(self):
         """Get analysis results for integration with other tools."""
-        categorized = self._categorize_issues()
+        reported = self._reported_issues()
+        categorized = self._categorize_issues(reported)
         return {
             'passed': len(categorized['critical']) == 0 and len(categorized['errors']) == 0,
             'issues': categorized,
-            'total_issues': len(self.issues),
+            'total_issues': len(reported),
+            'baselined_issues': len(self.issues) - len(reported),
             'errors': self.errors,
             'warnings': self.warnings
         }
 
+def _write_if_changed(path, data):
+    """Write data to path unless the file already holds exactly that data."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
 def main():
     """Main entry point for command-line usage."""
     import argparse
     
     parser = argparse.ArgumentParser(description='Analyze Lua code quality in LuminariGUI XML')
     parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to analyze')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--stream', action='store_true', help='Stream scripts from the XML instead of building the full index (bounded memory)')
+    parser.add_argument('--no-batch', action='store_true', help='Run one luacheck process per script instead of one for the whole package')
+    parser.add_argument('--jobs', '-j', type=int, help='Number of luacheck jobs in batch mode (default: CPU count)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_FILE, help='Baseline of known issues; only issues missing from it are reported')
+    parser.add_argument('--no-baseline', action='store_true', help='Report every issue, ignoring the baseline')
+    parser.add_argument('--update-baseline', action='store_true', help='Accept all current issues as the new baseline')
     parser.add_argument('--strict', action='store_true', help='Fail on warnings too')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode - only errors')
@@ -280,7 +510,9 @@ def main():
     
     args = parser.parse_args()
     
-    analyzer = LuaQualityAnalyzer(args.xml)
+    analyzer = LuaQualityAnalyzer(args.xml, use_cache=not args.no_cache, streaming=args.stream,
+                                  batch=not args.no_batch, jobs=args.jobs,
+                                  baseline_file=None if args.no_baseline or args.update_baseline else args.baseline)
     
     if args.quiet:
         # Suppress print statements
@@ -293,6 +525,11 @@ def main():
     else:
         success = analyzer.run_analysis()
     
+    if args.update_baseline:
+        if analyzer.update_baseline(args.baseline):
+            sys.exit(0)
+        sys.exit(1)
+    
     if args.json:
         results = analyzer.get_results()
         print(json.dumps(results, indent=2))
@@ -8,13 +8,37 @@ import os
 import sys
 import tempfile
 import subprocess
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from package_model import load_package_model, stream_package_scripts, remap_lua_error, strip_xml_lines
+from result_cache import tool_version, file_signature
+import lua_parser
+
+# Upper bound for one luac process checking a whole chunk of scripts
+BATCH_TIMEOUT = 30
+
+def _scratch_dir():
+    """Return a tmpfs directory for batch temp files if one is writable, else None."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return None
+
 class LuaSyntaxTester:
-    def __init__(self, xml_file="LuminariGUI.xml"):
+    def __init__(self, xml_file="LuminariGUI.xml", model=None, use_cache=True, streaming=False,
+                 batch=True, jobs=None, engine='auto', result_cache=None):
         self.xml_file = xml_file
+        self.model = model
+        self.use_cache = use_cache
+        self.streaming = streaming
+        self.batch = batch
+        self.jobs = jobs or os.cpu_count() or 1
         self.luac_path = self._find_luac()
+        # 'auto' prefers luac and falls back to the built-in parser without it
+        if engine == 'auto':
+            engine = 'luac' if self.luac_path else 'builtin'
+        self.engine = engine
+        self.result_cache = result_cache
         self.errors = []
         self.warnings = []
         
@@ -27,46 +51,29 @@ class LuaSyntaxTester:
                     return full_path
         return None
     
+    def get_model(self):
+        """Return the shared package model, parsing the XML on first use."""
+        if self.model is None:
+            self.model = load_package_model(self.xml_file, self.errors, self.use_cache)
+        return self.model
+    
+    def _iter_scripts(self):
+        """Yield script records from the shared model, or stream them from the XML."""
+        if self.streaming and self.model is None:
+            return stream_package_scripts(self.xml_file, self.errors)
+        model = self.get_model()
+        return iter(model.scripts) if model is not None else iter(())
+    
     def _extract_lua_scripts(self):
-        """Extract all Lua script blocks from XML."""
-        if not os.path.exists(self.xml_file):
-            self.errors.append(f"XML file not found: {self.xml_file}")
-            return []
-        
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            self.errors.append(f"XML parsing error: {e}")
-            return []
-        
-        scripts = []
-        
-        # Create a parent map for ElementTree compatibility
-        parent_map = {c: p for p in root.iter() for c in p}
-        
-        # Find all <script> elements
-        for script_elem in root.iter('script'):
-            script_text = script_elem.text
-            if script_text and script_text.strip():
-                # Get parent context for better error reporting
-                parent = parent_map.get(script_elem)
-                if parent is not None:
-                    name_elem = parent.find('name')
-                    script_name = name_elem.text if name_elem is not None else "unnamed"
-                else:
-                    script_name = "unnamed"
-                
-                scripts.append({
-                    'name': script_name,
-                    'content': script_text,
-                    'line': script_elem.sourceline if hasattr(script_elem, 'sourceline') else 0
-                })
-        
-        return scripts
+        """Extract all Lua script blocks from XML as a stream of records."""
+        return self._iter_scripts()
     
-    def _validate_script_syntax(self, script_name, script_content):
-        """Validate syntax of a single Lua script."""
+    def _validate_script_syntax(self, script_name, script_content, script=None):
+        """Validate syntax of a single Lua script.
+
+        When the script record is given, error lines are also reported as
+        lines of the XML file.
+        """
         if not self.luac_path:
             self.errors.append(f"luac not found in PATH. Please install Lua compiler.")
             return False
@@ -92,6 +99,8 @@ class LuaSyntaxTester:
                 error_msg = result.stderr.strip()
                 # Remove temporary file path from error message
                 error_msg = error_msg.replace(tmp_file_path, f"<{script_name}>")
+                if script is not None:
+                    error_msg = remap_lua_error(error_msg, f"<{script_name}>", script, self.xml_file)
                 self.errors.append(f"Syntax error in '{script_name}': {error_msg}")
                 return False
                 
@@ -108,6 +117,136 @@ class LuaSyntaxTester:
             except:
                 pass
     
+    def _validate_builtin(self, script_name, script_content, script=None):
+        """Validate syntax of a single Lua script with the in-process parser."""
+        error = lua_parser.check_syntax(script_content)
+        if error is None:
+            return True
+        
+        label = f"<{script_name}>"
+        error_msg = f"{label}:{error}"
+        if script is not None:
+            error_msg = remap_lua_error(error_msg, label, script, self.xml_file)
+        self.errors.append(f"Syntax error in '{script_name}': {error_msg}")
+        return False
+    
+    def _run_luac_batch(self, paths):
+        """Run luac -p over many files and return {path: error} for failures.
+
+        luac stops at the first file that does not compile, so the files
+        after it are checked again by a new invocation. An error of None
+        means the failure could not be attributed to a single file.
+        """
+        failures = {}
+        remaining = list(paths)
+        while remaining:
+            try:
+                result = subprocess.run(
+                    [self.luac_path, '-p'] + remaining,
+                    capture_output=True,
+                    text=True,
+                    timeout=BATCH_TIMEOUT
+                )
+            except (subprocess.TimeoutExpired, OSError):
+                failures.update((path, None) for path in remaining)
+                break
+            
+            if result.returncode == 0:
+                break
+            
+            error_msg = result.stderr.strip()
+            failed = next((i for i, path in enumerate(remaining) if path in error_msg), None)
+            if failed is None:
+                failures.update((path, None) for path in remaining)
+                break
+            failures[remaining[failed]] = error_msg
+            remaining = remaining[failed + 1:]
+        
+        return failures
+    
+    def _validate_batch(self, scripts):
+        """Validate many scripts with a few luac processes.
+
+        Every script is written to one temp directory (on tmpfs when
+        available) and the files are split into one chunk per CPU, each
+        checked by a single luac process. Returns (success, errors) per
+        script, with errors mapped back to the script name and XML line
+        like _validate_script_syntax does but not yet added to self.errors.
+        """
+        if not self.luac_path:
+            self.errors.append(f"luac not found in PATH. Please install Lua compiler.")
+            return [(False, [])] * len(scripts)
+        if not scripts:
+            return []
+        
+        with tempfile.TemporaryDirectory(prefix='luminari-syntax-', dir=_scratch_dir()) as tmp_dir:
+            paths = []
+            for index, script in enumerate(scripts):
+                # Fixed-width names so no path is a substring of another
+                path = os.path.join(tmp_dir, f"{index:05d}.lua")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(script['content'])
+                paths.append(path)
+            
+            workers = min(self.jobs, len(paths))
+            chunks = [paths[i::workers] for i in range(workers)]
+            failures = {}
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for chunk_failures in executor.map(self._run_luac_batch, chunks):
+                    failures.update(chunk_failures)
+        
+        results = []
+        for script, path in zip(scripts, paths):
+            if path not in failures:
+                results.append((True, []))
+                continue
+            
+            error_msg = failures[path]
+            if error_msg is None:
+                # Unattributed failure - check this script on its own
+                results.append(self._validate_one(self._validate_script_syntax, script))
+                continue
+            
+            label = f"<{script['name']}>"
+            error_msg = remap_lua_error(error_msg.replace(path, label), label, script, self.xml_file)
+            results.append((False, [f"Syntax error in '{script['name']}': {error_msg}"]))
+        
+        return results
+    
+    def _validate_one(self, validate, script):
+        """Run a single-script validator and return (success, errors it reported)."""
+        before = len(self.errors)
+        success = validate(script['name'], script['content'], script)
+        errors = self.errors[before:]
+        del self.errors[before:]
+        return success, errors
+    
+    def _result_key(self, script):
+        """Key a script's outcome by its text and the exact checker that judged it."""
+        if self.engine == 'luac':
+            version = tool_version(self.luac_path)
+        else:
+            version = file_signature(lua_parser.__file__)
+        return self.result_cache.key('syntax', self.engine, version, script['content'])
+    
+    def _cached_outcome(self, script):
+        """Return a cached (success, errors) for script with fresh XML lines, or None."""
+        if self.result_cache is None:
+            return None
+        cached = self.result_cache.get(self._result_key(script))
+        if cached is None:
+            return None
+        success, errors = cached
+        label = f"<{script['name']}>"
+        return success, [remap_lua_error(error, label, script, self.xml_file) for error in errors]
+    
+    def _store_outcome(self, script, success, errors):
+        # Only verdicts from the checker are stored; timeouts and tool failures are retried
+        if self.result_cache is None or not all(error.startswith("Syntax error in ") for error in errors):
+            return
+        stripped = [strip_xml_lines(error, self.xml_file) for error in errors]
+        self.result_cache.put(self._result_key(script), (success, stripped))
+    
     def _check_common_issues(self, scripts):
         """Check for common Lua issues in the codebase."""
         issues_found = []
@@ -136,35 +275,59 @@ class LuaSyntaxTester:
     
     def run_tests(self):
         """Run all syntax tests and return results."""
-        print("Running Lua syntax validation...")
-        
-        # Extract scripts from XML
-        scripts = self._extract_lua_scripts()
-        if not scripts:
-            if not self.errors:
-                self.warnings.append("No Lua scripts found in XML file")
-            return False
+        engine_name = "luac" if self.engine == 'luac' else "built-in Lua 5.1 parser"
+        print(f"Running Lua syntax validation ({engine_name})...")
         
-        print(f"Found {len(scripts)} Lua scripts to validate")
-        
-        # Check syntax of each script
+        # Batched luac checks every script up front; otherwise each script
+        # is checked as it is extracted from the XML. Scripts whose text was
+        # already checked by this checker are not re-run.
         passed = 0
         failed = 0
+        common_issues = []
         
-        for script in scripts:
-            if self._validate_script_syntax(script['name'], script['content']):
+        scripts = self._extract_lua_scripts()
+        outcomes = {}
+        if self.engine == 'luac' and self.batch:
+            scripts = list(scripts)
+            for index, script in enumerate(scripts):
+                cached = self._cached_outcome(script)
+                if cached is not None:
+                    outcomes[index] = cached
+            pending = [index for index in range(len(scripts)) if index not in outcomes]
+            for index, outcome in zip(pending, self._validate_batch([scripts[index] for index in pending])):
+                outcomes[index] = outcome
+                self._store_outcome(scripts[index], *outcome)
+        validate = self._validate_builtin if self.engine == 'builtin' else self._validate_script_syntax
+        
+        for index, script in enumerate(scripts):
+            outcome = outcomes.pop(index, None) or self._cached_outcome(script)
+            if outcome is not None:
+                success, errors = outcome
+            else:
+                success, errors = self._validate_one(validate, script)
+                self._store_outcome(script, success, errors)
+            self.errors.extend(errors)
+            
+            if success:
                 passed += 1
                 print(f"✓ {script['name']}")
             else:
                 failed += 1
                 print(f"✗ {script['name']}")
+            
+            # Check for common issues
+            common_issues.extend(self._check_common_issues([script]))
+        
+        if passed + failed == 0:
+            if not self.errors:
+                self.warnings.append("No Lua scripts found in XML file")
+            return False
         
-        # Check for common issues
-        common_issues = self._check_common_issues(scripts)
         self.warnings.extend(common_issues)
         
         # Print summary
         print(f"\nSyntax validation results:")
+        print(f"  Scripts checked: {passed + failed}")
         print(f"  Passed: {passed}")
         print(f"  Failed: {failed}")
         print(f"  Warnings: {len(self.warnings)}")
@@ -197,12 +360,19 @@ def main():
     
     parser = argparse.ArgumentParser(description='Validate Lua syntax in LuminariGUI XML')
     parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to validate')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--stream', action='store_true', help='Stream scripts from the XML instead of building the full index (bounded memory)')
+    parser.add_argument('--engine', choices=['auto', 'luac', 'builtin'], default='auto',
+                        help='Syntax checker: luac, the built-in Lua 5.1 parser, or luac when installed (default)')
+    parser.add_argument('--no-batch', action='store_true', help='Run one luac process per script instead of batching')
+    parser.add_argument('--jobs', '-j', type=int, help='Number of parallel luac processes in batch mode (default: CPU count)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode - only errors')
     
     args = parser.parse_args()
     
-    tester = LuaSyntaxTester(args.xml)
+    tester = LuaSyntaxTester(args.xml, use_cache=not args.no_cache, streaming=args.stream,
+                             batch=not args.no_batch, jobs=args.jobs, engine=args.engine)
     
     if args.quiet:
         # Suppress print statements
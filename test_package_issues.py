@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+"""
+Package Issue Scanner
+=====================
+Tests that the raw markup rule only reports '<', '>' and '&' that are
+neither entity-escaped nor inside a CDATA section.
+"""
+
+import sys
+
+from package_model import PackageModel
+from package_issues import IssueScanner, check_raw_markup
+
+PACKAGE = b'''<?xml version="1.0" encoding="UTF-8"?>
+<MudletPackage version="1.001">
+\t<ScriptPackage>
+\t\t<Script isActive="yes" isFolder="no">
+\t\t\t<name>Escaped</name>
+\t\t\t<script>if a &lt; b and c &amp; d then return a &gt; 0 end</script>
+\t\t</Script>
+\t\t<Script isActive="yes" isFolder="no">
+\t\t\t<name>Cdata</name>
+\t\t\t<script><![CDATA[if a < b and c & d then return a > 0 end]]></script>
+\t\t</Script>
+\t\t<Script isActive="yes" isFolder="no">
+\t\t\t<name>Mixed</name>
+\t\t\t<script>local x = 1
+<![CDATA[if x < 2 then x = x & 1 end]]>
+return x > 0</script>
+\t\t</Script>
+\t</ScriptPackage>
+</MudletPackage>
+'''
+
+
+def scan_raw_markup(data):
+    model = PackageModel('package.xml').load(data)
+    return IssueScanner(model, {'raw_markup': check_raw_markup}, {}).scan()
+
+
+def test_cdata_and_escaped_bodies_are_clean():
+    """Entity-escaped bodies and CDATA sections are what the rule asks for."""
+    issues = scan_raw_markup(PACKAGE)
+    assert [issue['script'] for issue in issues] == ['Mixed'], issues
+    # Only the '>' after the CDATA section is raw
+    assert issues[0]['message'].startswith("Raw '>'")
+    assert issues[0]['line'] == 16
+
+
+def test_cdata_spans_are_indexed():
+    model = PackageModel('package.xml').load(PACKAGE)
+    spans = {script['name']: script['cdata_spans'] for script in model.scripts}
+    assert spans['Escaped'] == []
+    for name in ('Cdata', 'Mixed'):
+        (start, end), = spans[name]
+        assert PACKAGE[start:].startswith(b'<![CDATA[') and PACKAGE[:end].endswith(b']]>')
+
+
+if __name__ == "__main__":
+    test_cdata_and_escaped_bodies_are_clean()
+    test_cdata_spans_are_indexed()
+    print("✅ Package issue tests passed")
+    sys.exit(0)
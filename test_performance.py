@@ -6,109 +6,201 @@ Benchmarks critical functions and identifies performance bottlenecks.
 
 import os
 import sys
-import tempfile
-import subprocess
-import xml.etree.ElementTree as ET
 import json
-import re
 import time
 import statistics
 from pathlib import Path
 
+from package_model import load_package_model, stream_package_scripts, remap_lua_error
+from lua_worker import LuaWorkerPool
+from mudlet_standin import package_source, lua_literal, lua_string, load_fixture
+from benchmark_stats import summarize, format_summary
+from hot_paths import HotPathCatalog, entry_case_name, entry_label, weighted_costs, format_weighted_costs
+from lua_profile import StackProfile, PROFILER_SOURCE, DEFAULT_FOLDED_FILE, DEFAULT_TOP, DEFAULT_INTERVAL
+from benchmark_baseline import (BenchmarkBaseline, compare_with_baseline, DEFAULT_MAX_REGRESSION,
+                                DEFAULT_DIFF_FILE, DEFAULT_BASELINE_RUNS)
+
+# Interpreter names looked for on PATH, in order of preference
+LUA_INTERPRETERS = ("lua", "lua5.1", "lua5.2", "lua5.3", "lua5.4", "luajit")
+
+# Median time per sample, in milliseconds, above which a warning is shown once
+# the whole confidence interval of the median lies above it
+DEFAULT_THRESHOLDS = {
+    'string_operations': 10.0,
+    'table_operations': 20.0,
+    'room_creation_simulation': 50.0,
+    'affect_processing': 15.0,
+    'group_data_processing': 10.0,
+    'font_calculation_simulation': 25.0,
+    'regex_pattern_matching': 30.0,
+    # Real package handlers (see handlers=True), per call
+    'handler_make_room': 5.0,
+    'handler_handle_move': 2.0,
+    'handler_update_affect_icons': 5.0,
+    'handler_update_group': 5.0,
+    'handler_update_player': 2.0,
+    'handler_update_room': 2.0,
+    'handler_adjust_minimap_font_size': 2.0
+}
+
+# Seconds each benchmark is warmed up for, and the measuring time its run
+# count is calibrated to
+DEFAULT_WARMUP_TIME = 0.05
+DEFAULT_TARGET_TIME = 0.25
+
+# Bounds on the calibrated run count; the lower bound is the iterations setting
+MIN_RUNS = 20
+DEFAULT_MAX_RUNS = 5000
+
+# Handler calls per timed sample; os.clock() ticks in microseconds, so single
+# calls are timed in batches and each sample is the batch's time per call
+HANDLER_CALLS = 100
+
+# Arguments after the event name that the cataloged entry points are called with,
+# as Mudlet raises those events
+ENTRY_EVENT_ARGUMENTS = {
+    'sysProtocolEnabled': ('MSDP',),
+    'shiftRoom': ('north',)
+}
+
+# Events Mudlet raises once per session; their entry points build state meant
+# to be built once, so they are cataloged but not timed
+LIFECYCLE_EVENTS = ('sysInstall', 'sysLoadEvent', 'sysExitEvent')
+
+# Cataloged entry points that raise because of known package bugs (case name ->
+# why); they are skipped when they raise, and any other entry point that raises fails
+ENTRY_KNOWN_FAILURES = {
+    'entry_map_eventhandler_shiftroom': "package bug: shift_room adds move_vectors[dir], a table, to the room's coordinates",
+    'alias_reset_chasing': "package bug: the package never defines demonnic.chaser",
+    'alias_fixchat': "package bug: the package never defines demonnic.chat:showAllTabs"
+}
+
+# Handler benchmarks listed in the report of time per hour of play
+HOT_PATHS_SHOWN = 10
+
+# First vnum of the rooms walked by the mapper benchmarks, clear of the fixture's
+HANDLER_WALK_VNUM = 900000
+
+# Handler events measured one at a time for the allocation profile, and
+# events run with the collector enabled to count GC cycles
+ALLOCATION_EVENTS = 100
+GC_EVENTS = 1000
+
+# Allocation profile limits per handler event; a handler above one fails its
+# benchmark, as allocation, unlike time, does not vary between runs
+DEFAULT_ALLOCATION_THRESHOLDS = {
+    'handler_make_room': {'kb_per_event': 6.0, 'retained_bytes_per_event': 2048},
+    'handler_handle_move': {'kb_per_event': 3.0, 'retained_bytes_per_event': 64},
+    'handler_update_affect_icons': {'kb_per_event': 3.0, 'retained_bytes_per_event': 64},
+    'handler_update_group': {'kb_per_event': 8.0, 'retained_bytes_per_event': 64},
+    'handler_update_player': {'kb_per_event': 40.0, 'retained_bytes_per_event': 64},
+    'handler_update_room': {'kb_per_event': 12.0, 'retained_bytes_per_event': 64},
+    'handler_adjust_minimap_font_size': {'kb_per_event': 1.0, 'retained_bytes_per_event': 64}
+}
+
+# Seconds of events each handler case is replayed for under the profiler
+DEFAULT_PROFILE_TIME = 1.0
+
+# Allocation profile fields, as reported and as named in the thresholds
+ALLOCATION_METRICS = (
+    ('kb_per_event', 'KB allocated/event', '{:.2f}'),
+    ('gc_cycles_per_event', 'GC cycles/event', '{:.4f}'),
+    ('retained_bytes_per_event', 'bytes retained/event', '{:.0f}')
+)
+
 class PerformanceTester:
-    def __init__(self, xml_file="LuminariGUI.xml"):
+    def __init__(self, xml_file="LuminariGUI.xml", model=None, use_cache=True, streaming=False, pool=None,
+                 timeout=30, iterations=MIN_RUNS, thresholds=None, cases=None, on_case=None, handlers=False,
+                 warmup_time=DEFAULT_WARMUP_TIME, target_time=DEFAULT_TARGET_TIME, max_runs=DEFAULT_MAX_RUNS,
+                 allocation_thresholds=None, lua_path=None, frequencies=None):
         self.xml_file = xml_file
-        self.lua_path = self._find_lua()
+        self.pool = pool
+        # Benchmark the package's own handlers in the Mudlet stand-in instead of the synthetic loops
+        self.handlers = handlers
+        self._handler_scripts = None
+        self._handler_prelude = None
+        # Entry points of the package, and overrides of their runs per hour of play
+        self._catalog = None
+        self.frequencies = frequencies
+        # Names of the only cases to run, or None for all of them
+        self.cases = None if cases is None else set(cases)
+        # Called with each case's test_results entry as soon as it finishes
+        self.on_case = on_case
+        self.timeout = timeout
+        # Each benchmark body is warmed up for warmup_time seconds, then run
+        # often enough to fill target_time, at least iterations and at most max_runs times
+        self.iterations = max(1, iterations)
+        self.warmup_time = warmup_time
+        self.target_time = target_time
+        self.max_runs = max_runs
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        # Per-case limits on the handler allocation profile (see ALLOCATION_METRICS)
+        self.allocation_thresholds = {name: dict(limits) for name, limits in DEFAULT_ALLOCATION_THRESHOLDS.items()}
+        for name, limits in (allocation_thresholds or {}).items():
+            self.allocation_thresholds.setdefault(name, {}).update(limits)
+        self._owns_pool = False
+        self.model = model
+        self.use_cache = use_cache
+        self.streaming = streaming
+        # The interpreter to benchmark; the first one on PATH unless given
+        self.lua_path = lua_path or self._find_lua()
         self.benchmark_results = {}
+        # Benchmarks that could not run on this package (name -> reason)
+        self.skipped = {}
+        # Cases the worker timed out on or crashed in (name -> message), unlike Lua errors
+        self.aborted = {}
+        # Lifecycle entry points cataloged but not timed (name -> label, see LIFECYCLE_EVENTS)
+        self.untimed = {}
+        # StackProfile of the last run_profile
+        self.profile = None
+        # Handler benchmarks ranked by time per hour of play (see hot_paths.weighted_costs)
+        self.hot_paths = []
+        self.test_results = []
         self.errors = []
         self.warnings = []
         
     def _find_lua(self):
         """Find lua executable in system PATH."""
         for path in os.environ["PATH"].split(os.pathsep):
-            for executable in ["lua", "lua5.1", "lua5.2", "lua5.3", "lua5.4", "luajit"]:
+            for executable in LUA_INTERPRETERS:
                 full_path = os.path.join(path, executable)
                 if os.path.isfile(full_path) and os.access(full_path, os.X_OK):
                     return full_path
         return None
     
-    def _extract_performance_critical_functions(self):
-        """Extract functions that are performance-critical."""
-        if not os.path.exists(self.xml_file):
-            self.errors.append(f"XML file not found: {self.xml_file}")
-            return []
-        
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            self.errors.append(f"XML parsing error: {e}")
-            return []
-        
-        critical_functions = []
-        
-        # Functions that are likely performance-critical based on patterns
-        critical_patterns = [
-            r'function.*make_room',
-            r'function.*handle_move',
-            r'function.*calcMinimapPadding',
-            r'function.*calcAsciimapPadding',
-            r'function.*adjustMinimapFontSize',
-            r'function.*adjustAsciimapFontSize',
-            r'function.*updateAffectIcons',
-            r'function.*updateGroup',
-            r'function.*shift_room'
-        ]
-        
-        # Find all script elements
-        for script_elem in root.iter('script'):
-            script_text = script_elem.text
-            if script_text and script_text.strip():
-                parent = script_elem.getparent()
-                if parent is not None:
-                    name_elem = parent.find('name')
-                    script_name = name_elem.text if name_elem is not None else "unnamed"
-                else:
-                    script_name = "unnamed"
-                
-                for pattern in critical_patterns:
-                    matches = re.finditer(pattern, script_text, re.IGNORECASE)
-                    for match in matches:
-                        line_num = script_text[:match.start()].count('\n') + 1
-                        func_body = self._extract_function_body(script_text, match.start())
-                        
-                        critical_functions.append({
-                            'name': match.group(0),
-                            'script': script_name,
-                            'line': line_num,
-                            'body': func_body
-                        })
-        
-        return critical_functions
+    def get_model(self):
+        """Return the shared package model, parsing the XML on first use."""
+        if self.model is None:
+            self.model = load_package_model(self.xml_file, self.errors, self.use_cache)
+        return self.model
     
-    def _extract_function_body(self, content, start_pos):
-        """Extract function body from content starting at position."""
-        lines = content[start_pos:].split('\n')
-        function_lines = []
-        depth = 0
-        
-        for line in lines:
-            function_lines.append(line)
-            
-            if re.search(r'\bfunction\b', line):
-                depth += 1
-            if re.search(r'\bend\b', line):
-                depth -= 1
-                if depth == 0:
-                    break
-        
-        return '\n'.join(function_lines)
+    def _iter_scripts(self):
+        """Yield script records from the shared model, or stream them from the XML."""
+        if self.streaming and self.model is None:
+            return stream_package_scripts(self.xml_file, self.errors)
+        model = self.get_model()
+        return iter(model.scripts) if model is not None else iter(())
     
-    def _create_performance_mocks(self):
-        """Create performance testing mocks."""
+    def _get_handler_scripts(self):
+        """Return the package script records the stand-in loads, read once per tester."""
+        if self._handler_scripts is None:
+            self._handler_scripts = list(self._iter_scripts())
+        return self._handler_scripts
+    
+    def hot_path_catalog(self):
+        """Return the entry points Mudlet calls into the package (see hot_paths.py), most frequent first."""
+        if self._catalog is None:
+            self._catalog = HotPathCatalog(self._get_handler_scripts(), self.frequencies)
+            self._catalog.build()
+            self.warnings.extend(f"Hot-path catalog: {warning}" for warning in self._catalog.warnings)
+        return self._catalog.entries
+    
+    def _create_performance_timer(self):
+        """Create the timer the benchmark bodies record their measurements with."""
         return '''
--- Performance testing mocks and utilities
-local performance = {
+-- Performance testing utilities
+-- (global so test cases, which run as a separate chunk, can record timings)
+performance = {
     start_time = 0,
     measurements = {}
 }
@@ -118,13 +210,93 @@ function performance.start_timer()
     performance.start_time = os.clock()
 end
 
-function performance.end_timer(name)
-    local elapsed = (os.clock() - performance.start_time) * 1000 -- Convert to milliseconds
+-- calls: how many operations the timed span covered; the sample is the time per call
+function performance.end_timer(name, calls)
+    local elapsed = (os.clock() - performance.start_time) * 1000 / (calls or 1) -- Convert to milliseconds
     performance.measurements[name] = performance.measurements[name] or {}
     table.insert(performance.measurements[name], elapsed)
     return elapsed
 end
 
+-- Run body for at least warmup_time seconds (and at least once) to settle
+-- caches and the JIT, then, calibrated from the warmup's pace, enough times
+-- to fill target_time, bounded by min_runs and max_runs. Only the
+-- measurements of the calibrated runs are kept.
+function performance.run(name, body, warmup_time, target_time, min_runs, max_runs)
+    local warmup_runs = 0
+    local started = os.clock()
+    repeat
+        body()
+        warmup_runs = warmup_runs + 1
+    until os.clock() - started >= warmup_time
+    local per_run = (os.clock() - started) / warmup_runs
+    local runs = max_runs
+    if per_run > 0 then runs = math.ceil(target_time / per_run) end
+    runs = math.max(min_runs, math.min(max_runs, runs))
+    performance.measurements[name] = {}
+    for run = 1, runs do body() end
+    return warmup_runs, runs
+end
+
+-- Abandon a case that cannot run here; it is reported as skipped, not passed
+function performance.skip(reason)
+    error({skipped = reason}, 0)
+end
+
+-- Allocation profile of a handler driven one event at a time: prepare(event)
+-- builds an event's input outside the measurements and fire(event) handles
+-- it. Each of the first events runs from a freshly collected heap with the
+-- collector stopped, so the count grows by exactly what it allocates, even
+-- strings an earlier event already built; the next gc_events then run with
+-- the collector on, counting the cycles that complete inside fire with a
+-- finalizer that re-arms itself, and a forced collection shows what they
+-- left reachable.
+-- Returns KB allocated, GC cycles and bytes retained per event.
+function performance.profile_allocations(prepare, fire, first, events, gc_events)
+    local allocated = 0
+    for event = first, first + events - 1 do
+        prepare(event)
+        collectgarbage("collect")
+        collectgarbage("stop")
+        local before = collectgarbage("count")
+        fire(event)
+        allocated = allocated + collectgarbage("count") - before
+        collectgarbage("restart")
+    end
+    first = first + events
+    
+    local cycles, counting, firing = 0, true, false
+    local function arm()
+        local function collected()
+            if counting then
+                if firing then cycles = cycles + 1 end
+                arm()
+            end
+        end
+        if newproxy then
+            getmetatable(newproxy(true)).__gc = collected
+        else
+            setmetatable({}, {__gc = collected})
+        end
+    end
+    collectgarbage("collect")
+    collectgarbage("collect")
+    local baseline = collectgarbage("count")
+    arm()
+    for event = first, first + gc_events - 1 do
+        prepare(event)
+        firing = true
+        fire(event)
+        firing = false
+    end
+    counting = false
+    -- The second pass frees what the first one's finalizers released
+    collectgarbage("collect")
+    collectgarbage("collect")
+    local retained = collectgarbage("count") - baseline
+    return allocated / events, cycles / gc_events, math.max(0, retained * 1024 / gc_events)
+end
+
 function performance.get_stats(name)
     local measurements = performance.measurements[name]
     if not measurements or #measurements == 0 then
@@ -149,7 +321,11 @@ function performance.get_stats(name)
         total = sum
     }
 end
-
+'''
+    
+    def _create_performance_mocks(self):
+        """Create performance testing mocks."""
+        return self._create_performance_timer() + '''
 -- Mock Mudlet functions
 function getMudletHomeDir() return "/tmp" end
 function cecho(text) end
@@ -326,7 +502,7 @@ end
                         }
                         create_room(room_data.vnum, room_data.name, room_data.exits, room_data.coords)
                     end
-                    performance.end_timer("room_creation")
+                    performance.end_timer("room_creation_simulation")
                 '''
             },
             {
@@ -373,7 +549,7 @@ end
                     local group = generate_group_data(10)
                     performance.start_timer()
                     local processed_group = process_group_data(group)
-                    performance.end_timer("group_processing")
+                    performance.end_timer("group_data_processing")
                 '''
             },
             {
@@ -399,7 +575,7 @@ end
                         local text_len = math.random(10, 100)
                         calculate_font_size(width, text_len)
                     end
-                    performance.end_timer("font_calculation")
+                    performance.end_timer("font_calculation_simulation")
                 '''
             },
             {
@@ -430,23 +606,530 @@ end
                             end
                         end
                     end
-                    performance.end_timer("regex_matching")
+                    performance.end_timer("regex_pattern_matching")
                 '''
             }
         ]
     
+    def _room_walk_source(self):
+        """Lua defining walk_room(step): the fixture room moved one step north per step."""
+        return f'''
+                    local room_fixture = {lua_literal(load_fixture('room'), ' ' * 20)}
+                    local function walk_room(step)
+                        local room = table.update({{}}, room_fixture)
+                        room.VNUM = {HANDLER_WALK_VNUM} + step
+                        room.NAME = room_fixture.NAME .. " " .. step
+                        room.ENVIRONMENT = "Room"
+                        room.EXITS = {{north = room.VNUM + 1, south = room.VNUM - 1}}
+                        room.DOORS = {{}}
+                        return room
+                    end
+                    msdp = msdp or {{}}
+                    map.start_mapping()
+                    -- make_room links the new room to map.prev_info.EXITS, which the
+                    -- first move of a session does not have yet; start one room back
+                    map.room_info = walk_room(0)
+'''
+    
+    def _handler_case(self, name, description, script, setup, fire, prepare='', check='', entry_points=()):
+        """Return a handler benchmark defined by one event.
+
+        fire is the Lua statements handling event number `event` (numbers
+        are never reused within a case, so inputs can differ per event),
+        prepare builds that event's input outside every measurement and
+        check asserts on the outcome after each timed batch. The timed
+        body runs HANDLER_CALLS events; the allocation profile (see
+        performance.profile_allocations) calls them one at a time.
+        entry_points are the (event, handler) registrations the case
+        stands for, event None matching any event of the handler.
+        """
+        return {
+            'name': name,
+            'description': description,
+            'script': script,
+            'entry_points': list(entry_points),
+            'setup': setup,
+            'prepare': prepare,
+            'fire': fire,
+            'test': f'''
+                    local first = next_event
+                    next_event = next_event + {HANDLER_CALLS}
+                    for event = first, next_event - 1 do prepare(event) end
+                    performance.start_timer()
+                    for event = first, next_event - 1 do fire(event) end
+                    performance.end_timer("{name}", {HANDLER_CALLS})
+                    {check}
+                '''
+        }
+    
+    def _create_handler_test_cases(self):
+        """Create benchmarks that drive the package's real handlers with MSDP fixtures.
+
+        They run on the 'performance.handlers' prelude, which loads every
+        package script into the Mudlet stand-in (see mudlet_standin.py).
+        Each sample is the time per call over HANDLER_CALLS calls, and each
+        case also reports its allocation profile. The tailored cases below
+        are followed by one per remaining entry point of the package.
+        """
+        mapper = 'LuminariGUI/MSDPMapper/MSDPMapper'
+        cast_triggers = 'LuminariGUI/GUI/Cast Console/'
+        test_cases = [
+            self._handler_case(
+                'handler_make_room',
+                'map.eventHandler("msdp.ROOM") entering unmapped rooms (make_room)',
+                mapper,
+                self._room_walk_source() + '''
+                    local rooms = {}
+                ''',
+                prepare='''
+                    rooms[event] = walk_room(event)
+                ''',
+                fire='''
+                    msdp.ROOM, rooms[event] = rooms[event], nil
+                    map.eventHandler("msdp.ROOM")
+                ''',
+                check='''
+                    assert(getRoomName(msdp.ROOM.VNUM) == msdp.ROOM.NAME, "make_room did not map the last room")
+                ''',
+                entry_points=[('msdp.ROOM', 'map.eventHandler')]
+            ),
+            self._handler_case(
+                'handler_handle_move',
+                'map.eventHandler("msdp.ROOM") moving between mapped rooms (handle_move)',
+                mapper,
+                self._room_walk_source() + '''
+                    local known = {walk_room(1), walk_room(2)}
+                    for _, room in ipairs(known) do
+                        msdp.ROOM = room
+                        map.eventHandler("msdp.ROOM")
+                    end
+                ''',
+                fire='''
+                    msdp.ROOM = known[event % 2 + 1]
+                    map.eventHandler("msdp.ROOM")
+                ''',
+                check='''
+                    assert(map.room_info.VNUM == msdp.ROOM.VNUM, "handle_move did not follow the player")
+                ''',
+                entry_points=[('msdp.ROOM', 'map.eventHandler')]
+            ),
+            self._handler_case(
+                'handler_update_affect_icons',
+                'GUI.updateAffectIcons() for the msdp.AFFECTS fixture',
+                'LuminariGUI/GUI/GUI/Affects',
+                f'''
+                    -- The widgets GUI.init creates for the affects display
+                    GUI.init_background()
+                    GUI.set_borders()
+                    GUI.init_boxes()
+                    GUI.init_gauges()
+                    GUI.tabbedInfoWindow.init()
+                    GUI.Affects.init()
+                    local affects = {lua_literal(load_fixture('affects'), ' ' * 20)}
+                    -- The server sends AFFECTED_BY entries as records with a NAME
+                    for i, affect in ipairs(affects.AFFECTED_BY) do
+                        if type(affect) == "string" then affects.AFFECTED_BY[i] = {{NAME = affect}} end
+                    end
+                    msdp = msdp or {{}}
+                    msdp.AFFECTS = affects
+                ''',
+                fire='''
+                    GUI.updateAffectIcons()
+                ''',
+                check='''
+                    local shown = 0
+                    for _, row in ipairs(GUI.Affects.Rows) do
+                        for _, label in ipairs(row.Labels) do
+                            if rawget(label, "hidden") == false then shown = shown + 1 end
+                        end
+                    end
+                    for _, label in ipairs(GUI.Affects.Modes.Labels) do
+                        if rawget(label, "hidden") == false then shown = shown + 1 end
+                    end
+                    assert(shown > 0, "GUI.updateAffectIcons showed no icons")
+                ''',
+                entry_points=[('msdp.AFFECTS', 'GUI.updateAffectIcons')]
+            ),
+            self._handler_case(
+                'handler_update_group',
+                'GUI.updateGroup() for the msdp.GROUP fixture, the leader taking damage',
+                'LuminariGUI/GUI/GUI/Group',
+                f'''
+                    -- The widgets GUI.init creates for the group tab
+                    GUI.init_background()
+                    GUI.set_borders()
+                    GUI.init_boxes()
+                    GUI.tabbedInfoWindow.init()
+                    GUI.init_group()
+                    msdp = msdp or {{}}
+                    msdp.GROUP = {lua_literal(load_fixture('group'), ' ' * 20)}
+                    msdp.CHARACTER_NAME = msdp.GROUP[1].NAME
+                ''',
+                fire='''
+                    msdp.GROUP[1].HEALTH = event % msdp.GROUP[1].HEALTH_MAX + 1
+                    GUI.updateGroup()
+                ''',
+                check='''
+                    assert(#(standin.windows["GUI.GroupConsole"] or {}) > 0, "GUI.updateGroup wrote nothing")
+                ''',
+                entry_points=[('msdp.GROUP', 'GUI.updateGroup')]
+            ),
+            self._handler_case(
+                'handler_update_player',
+                'GUI.updatePlayer() for the character fixture, the gold changing',
+                'LuminariGUI/GUI/GUI/Player',
+                f'''
+                    -- The widgets GUI.init creates for the player tab
+                    GUI.init_background()
+                    GUI.set_borders()
+                    GUI.init_boxes()
+                    GUI.tabbedInfoWindow.init()
+                    GUI.init_player()
+                    msdp = msdp or {{}}
+                    local character = {lua_literal(load_fixture('character'), ' ' * 20)}
+                    for key, value in pairs(character) do msdp[key] = value end
+                ''',
+                fire='''
+                    msdp.MONEY = 1000 + event
+                    GUI.updatePlayer()
+                ''',
+                entry_points=[(None, 'GUI.updatePlayer')]
+            ),
+            self._handler_case(
+                'handler_update_room',
+                'GUI.updateRoom() for rooms walked from the msdp.ROOM fixture',
+                'LuminariGUI/GUI/GUI/Room Info/Legend',
+                self._room_walk_source() + '''
+                    -- The widgets GUI.init creates for the room info panel
+                    GUI.init_background()
+                    GUI.set_borders()
+                    GUI.init_boxes()
+                    GUI.buttonWindow.init()
+                    local rooms = {}
+                ''',
+                prepare='''
+                    rooms[event] = walk_room(event)
+                ''',
+                fire='''
+                    msdp.ROOM, rooms[event] = rooms[event], nil
+                    GUI.updateRoom()
+                ''',
+                entry_points=[('msdp.ROOM', 'GUI.updateRoom')]
+            ),
+            self._handler_case(
+                'handler_cast_console',
+                'The Cast Console triggers for spells being cast and their outcomes, in turn',
+                'LuminariGUI/GUI/GUI/Cast Console',
+                f'''
+                    -- The widgets GUI.init creates for the cast console
+                    GUI.init_background()
+                    GUI.set_borders()
+                    GUI.init_boxes()
+                    GUI.init_castConsole()
+                    local triggers = {{}}
+                    for _, name in ipairs({{"Started Cast", "Cast Complete", "Cast Aborted", "Cast Canceled"}}) do
+                        triggers[name] = assert(standin.bodies[{lua_string(cast_triggers)} .. name], name .. " did not compile")
+                    end
+                    -- Most casts complete
+                    local outcomes = {{"Cast Complete", "Cast Complete", "Cast Complete", "Cast Complete", "Cast Complete",
+                                      "Cast Complete", "Cast Complete", "Cast Complete", "Cast Aborted", "Cast Canceled"}}
+                    local trigger
+                    -- An outcome can be replayed first; it reports on the spell being cast
+                    GUI.castConsole_startCast("fireball", "***")
+                ''',
+                prepare='''
+                    -- Even events start a cast, odd ones end it
+                    if event % 2 == 0 then
+                        trigger = triggers["Started Cast"]
+                        matches = {"Casting: fireball ***", "fireball", "***"}
+                    else
+                        trigger = triggers[outcomes[math.floor(event / 2) % #outcomes + 1]]
+                        matches = {"You complete your spell."}
+                    end
+                    line = matches[1]
+                ''',
+                fire='''
+                    trigger()
+                ''',
+                check='''
+                    assert(#(standin.windows["GUI.castConsole"] or {}) > 0, "the cast console shows nothing")
+                ''',
+                entry_points=[cast_triggers + name for name in ('Started Cast', 'Cast Complete', 'Cast Aborted',
+                                                               'Cast Canceled')]
+            ),
+            self._handler_case(
+                'handler_adjust_minimap_font_size',
+                'map.adjustMinimapFontSize() for the ASCII minimap',
+                mapper,
+                '''
+                    -- map.minimap is created when the profile connects (see STARTUP_EVENTS)
+                    assert(map.minimap, "the mapper did not create map.minimap")
+                ''',
+                fire='''
+                    map.adjustMinimapFontSize()
+                '''
+            )
+        ]
+        return test_cases + self._create_entry_point_cases(test_cases)
+    
+    def _create_entry_point_cases(self, test_cases):
+        """Weight the handler benchmarks by session frequency and cover the remaining entry points.
+
+        Every cataloged entry point (see hot_paths.py) covered by one of
+        test_cases adds its runs per hour to that case's 'frequency',
+        split evenly when several cases stand for it. Each entry point no
+        case covers gets a generic benchmark of its own, except entry
+        points of LIFECYCLE_EVENTS, which are only listed in self.untimed.
+        """
+        entry_cases = []
+        for entry in self.hot_path_catalog():
+            covering = [test_case for test_case in test_cases
+                        if any(self._covers(point, entry) for point in test_case.get('entry_points', ()))]
+            for test_case in covering:
+                test_case['frequency'] = test_case.get('frequency', 0) + entry['frequency'] / len(covering)
+            if not covering and entry['kind'] == 'event' and entry['event'] in LIFECYCLE_EVENTS:
+                self.untimed[entry_case_name(entry)] = entry_label(entry)
+            elif not covering:
+                entry_case = self._entry_case(entry)
+                entry_case['frequency'] = entry['frequency']
+                entry_cases.append(entry_case)
+        return entry_cases
+    
+    @staticmethod
+    def _covers(point, entry):
+        """Whether an entry point of a case, (event, handler) or a trigger/alias path, is a cataloged entry."""
+        if isinstance(point, str):
+            return entry['kind'] != 'event' and entry['script'] == point
+        event, handler = point
+        return entry['kind'] == 'event' and handler == entry['handler'] and event in (None, entry['event'])
+    
+    def entry_setup_source(self):
+        """Lua building the widgets GUI.init creates, the MSDP state of a character in a fight and its mapped room."""
+        return f'''
+                    GUI.init_background()
+                    GUI.set_borders()
+                    GUI.init_boxes()
+                    GUI.init_gauges()
+                    GUI.init_action_icons()
+                    GUI.tabbedInfoWindow.init()
+                    GUI.init_player()
+                    GUI.init_group()
+                    GUI.Affects.init()
+                    GUI.buttonWindow.init()
+                    GUI.init_castConsole()
+                    demonnic.chat:create()
+                    msdp = msdp or {{}}
+                    for _, fixture in ipairs({{{lua_literal(load_fixture('character'), ' ' * 20)},
+                                              {lua_literal(load_fixture('vitals'), ' ' * 20)}}}) do
+                        for key, value in pairs(fixture) do msdp[key] = value end
+                    end
+                    msdp.ROOM = {lua_literal(load_fixture('room'), ' ' * 20)}
+                    msdp.GROUP = {lua_literal(load_fixture('group'), ' ' * 20)}
+                    msdp.AFFECTS = {lua_literal(load_fixture('affects'), ' ' * 20)}
+                    for i, affect in ipairs(msdp.AFFECTS.AFFECTED_BY) do
+                        if type(affect) == "string" then msdp.AFFECTS.AFFECTED_BY[i] = {{NAME = affect}} end
+                    end
+                    -- The mapper has mapped the fixture room and the player stands in it
+                    addRoom(msdp.ROOM.VNUM)
+                    setRoomName(msdp.ROOM.VNUM, msdp.ROOM.NAME)
+                    map.room_info = table.update({{}}, msdp.ROOM)
+'''
+    
+    def _entry_case(self, entry):
+        """Return a generic benchmark of one cataloged entry point.
+
+        Event handlers are called as Mudlet calls them, with the event
+        name (and ENTRY_EVENT_ARGUMENTS), the MSDP variable the event
+        announces changing per event. Trigger and alias bodies run with
+        `line` and `matches` set to a chat line. An entry point the package
+        registers but never defines, or that raises with these generic
+        inputs, fails, unless it is in ENTRY_KNOWN_FAILURES and raises: that
+        case is skipped with its reason. The case's entry_points name the
+        entry point, so test impact analysis links it to the package code
+        it runs.
+        """
+        if entry['kind'] == 'event':
+            event = entry['event']
+            args = ', '.join(lua_string(arg) for arg in (event,) + ENTRY_EVENT_ARGUMENTS.get(event, ()))
+            if entry['handler']:
+                resolve = f"standin.resolve({lua_string(entry['handler'])})"
+                missing = f"{entry['handler']} is registered for {event} but never defined"
+            else:
+                resolve = f"standin.registered({lua_string(event)}, {lua_string(entry['script'])}, {entry['line']})"
+                missing = f"the function at {entry['script']}:{entry['line']} was not registered in the stand-in"
+            variable = event[len('msdp.'):] if event.startswith('msdp.') else None
+            setup = self.entry_setup_source() + f'''
+                    local handler = {resolve}
+                    local variable = {lua_string(variable) if variable else 'nil'}
+                    local base = variable and msdp[variable]
+                    local function call() handler({args}) end
+                '''
+            prepare = '''
+                    -- The variable the event announces changes, as it does in play
+                    if type(base) == "number" then msdp[variable] = base - event % 10 end
+                '''
+        else:
+            missing = f"{entry['script']} did not compile in the stand-in"
+            setup = self.entry_setup_source() + f'''
+                    local handler = standin.bodies[{lua_string(entry['script'])}]
+                    local function call() handler() end
+                '''
+            prepare = '''
+                    line = "Someone tells you, 'message " .. event .. "'"
+                    matches = {line, "Someone", "message " .. event}
+                '''
+        # One trial call decides whether the entry point runs at all
+        setup += f'''
+                    local failure = type(handler) ~= "function" and {lua_string(missing)} or nil
+                    if not failure then
+                        local event = 0
+                        {prepare.strip()}
+                        local ok, err = pcall(call)
+                        if not ok then failure = "raised " .. tostring(err) end
+                    end
+                '''
+        known = ENTRY_KNOWN_FAILURES.get(entry_case_name(entry))
+        # Only a known failure that raises is skipped; a missing entry point still fails
+        skip = f'if failure and type(handler) == "function" then performance.skip({lua_string(known)}) end' if known else ''
+        prepare = f'''
+                    {skip}
+                    if failure then error(failure, 0) end
+                    {prepare.strip()}
+                '''
+        fire = '''
+                    call()
+                '''
+        point = (entry['event'], entry['handler']) if entry['kind'] == 'event' else entry['script']
+        return self._handler_case(entry_case_name(entry), f"{entry_label(entry)} (cataloged entry point)", None,
+                                  setup, fire, prepare=prepare, entry_points=[point])
+    
+    def _create_test_cases(self):
+        """Return the benchmarks of the current mode."""
+        if self.handlers:
+            return self._create_handler_test_cases()
+        return self._create_performance_test_cases()
+    
+    def _get_handler_prelude(self):
+        """Build the stand-in prelude from the package scripts, once per tester."""
+        if self._handler_prelude is None:
+            self._handler_prelude = (self._create_performance_timer() + PROFILER_SOURCE +
+                                     package_source(self._get_handler_scripts()))
+        return self._handler_prelude
+    
+    def remap_standin_error(self, message):
+        """Point 'script path:N:' locations in a stand-in error at the XML lines."""
+        for script in self._handler_scripts or ():
+            if script['path'] + ':' in message:
+                message = remap_lua_error(message, script['path'], script, self.xml_file)
+        return message
+    
+    def _get_pool(self):
+        """Return the Lua worker pool, starting a private one if none was shared."""
+        if self.pool is None:
+            self.pool = LuaWorkerPool(self.lua_path)
+            self._owns_pool = True
+        return self.pool
+    
+    def close_pool(self):
+        """Stop a private worker pool once the run is over."""
+        if self._owns_pool:
+            self.pool.close()
+            self.pool = None
+            self._owns_pool = False
+    
+    def _case_setup(self, test_case):
+        """Return the Lua setup of a case; handler cases also define prepare and fire."""
+        setup = test_case['setup']
+        if test_case.get('script'):
+            setup = f"standin.require({lua_literal(test_case['script'])})\n{setup}"
+        if 'fire' in test_case:
+            # Handler cases are defined by one event (see _handler_case)
+            setup += f'''
+local next_event = 1
+local function prepare(event)
+{test_case['prepare']}
+end
+local function fire(event)
+{test_case['fire']}
+end
+'''
+        return setup
+    
+    def execute(self, test_case, lua_code):
+        """Run a case's Lua code on its prelude; return (True, output lines after PASS) or (False, error).
+
+        The code prints "PASS" or "FAIL: <error>" first. Errors the
+        stand-in recorded (package scripts that did not load, startup
+        handlers that raised) are collected as warnings, and a package
+        script that did not load fails the case, as none of the package
+        then runs as it does in Mudlet. A timeout or worker crash is also
+        recorded in self.aborted.
+        """
+        lua_code += '''
+if standin then
+    for _, message in ipairs(standin.errors) do print("WARNING: " .. message) end
+    for name, loaded in pairs(standin.loaded) do
+        if not loaded then print("NOT LOADED: " .. name) end
+    end
+end
+'''
+        pool = self._get_pool()
+        if self.handlers:
+            prelude = 'performance.handlers'
+            pool.add_prelude(prelude, self._get_handler_prelude())
+        else:
+            prelude = 'performance.mocks'
+            pool.add_prelude(prelude, self._create_performance_mocks())
+        try:
+            result = pool.run(lua_code, prelude=prelude, name=test_case['name'], timeout=self.timeout)
+        except Exception as e:
+            self.aborted[test_case['name']] = str(e)
+            return False, str(e)
+        
+        if result['timed_out']:
+            self.aborted[test_case['name']] = "Timeout"
+            return False, "Timeout"
+        if result['restarted']:
+            self.aborted[test_case['name']] = result['stderr'].strip()
+            return False, result['stderr'].strip()
+        if result['returncode'] != 0:
+            return False, self.remap_standin_error(result['stderr'].strip())
+        lines = result['stdout'].strip().split('\n')
+        if lines[0] != "PASS":
+            return False, self.remap_standin_error(lines[0] if lines else "Unknown error")
+        output = []
+        not_loaded = []
+        for line in lines[1:]:
+            if line.startswith('WARNING: '):
+                warning = f"Mudlet stand-in: {self.remap_standin_error(line[len('WARNING: '):])}"
+                if warning not in self.warnings:
+                    self.warnings.append(warning)
+            elif line.startswith('NOT LOADED: '):
+                not_loaded.append(line[len('NOT LOADED: '):])
+            else:
+                output.append(line)
+        if not_loaded:
+            return False, f"package scripts did not load in the Mudlet stand-in: {', '.join(sorted(not_loaded))}"
+        return True, output
+    
     def _run_performance_test(self, test_case):
         """Run a single performance test case."""
         if not self.lua_path:
             self.errors.append("lua interpreter not found in PATH")
-            return False
+            return False, "lua interpreter not found in PATH"
+        
+        profile = ''
+        if 'fire' in test_case:
+            profile = f'''
+    allocation = {{performance.profile_allocations(prepare, fire, next_event, {ALLOCATION_EVENTS}, {GC_EVENTS})}}'''
         
-        # Create test Lua code
+        # Create test Lua code; the mocks are a prelude compiled once per worker
         lua_code = f'''
-{self._create_performance_mocks()}
+-- Handler benchmarks send the package's output to the stand-in's windows
+local print = standin and standin.report or print
 
 -- Test setup
-{test_case['setup']}
+{self._case_setup(test_case)}
 
 -- Test execution
 local function run_test()
@@ -454,65 +1137,234 @@ local function run_test()
 end
 
 -- Run test with error handling
-local success, err = pcall(run_test)
+local warmup_runs, runs, allocation
+local success, err = pcall(function()
+    warmup_runs, runs = performance.run("{test_case['name']}", run_test, {self.warmup_time}, {self.target_time},
+                                        {self.iterations}, {max(self.iterations, self.max_runs)}){profile}
+end)
 if success then
-    local stats = performance.get_stats("{test_case['name']}")
-    if stats then
-        print("PASS")
-        print("Average: " .. string.format("%.2f", stats.average) .. "ms")
-        print("Min: " .. string.format("%.2f", stats.min) .. "ms")
-        print("Max: " .. string.format("%.2f", stats.max) .. "ms")
-        print("Count: " .. stats.count)
-    else
-        print("PASS")
+    print("PASS")
+    print("Warmup: " .. warmup_runs)
+    print("Runs: " .. runs)
+    if allocation then
+        print(string.format("Allocation: %.9g %.9g %.9g", allocation[1], allocation[2], allocation[3]))
     end
+    -- Raw samples in milliseconds; the statistics are computed in Python
+    local samples = {{}}
+    for i, value in ipairs(performance.measurements["{test_case['name']}"] or {{}}) do
+        samples[i] = string.format("%.9g", value)
+    end
+    print("Samples: " .. table.concat(samples, " "))
+elseif type(err) == "table" and err.skipped then
+    print("PASS")
+    print("Skipped: " .. err.skipped)
 else
     print("FAIL: " .. tostring(err))
 end
 '''
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.lua', delete=False) as lua_file:
-            lua_file.write(lua_code)
-            lua_file_path = lua_file.name
+        success, output = self.execute(test_case, lua_code)
+        if not success:
+            return False, output
         
-        try:
-            # Run lua interpreter
-            result = subprocess.run(
-                [self.lua_path, lua_file_path],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                output = result.stdout.strip()
-                lines = output.split('\n')
-                
-                if lines[0] == "PASS":
-                    # Parse performance data
-                    perf_data = {}
-                    for line in lines[1:]:
-                        if ':' in line:
-                            key, value = line.split(':', 1)
-                            perf_data[key.strip()] = value.strip()
-                    
-                    return True, perf_data
-                else:
-                    return False, lines[0] if lines else "Unknown error"
+        # Parse performance data
+        runs = {}
+        samples = []
+        for line in output:
+            if line.startswith('Skipped: '):
+                reason = self.remap_standin_error(line[len('Skipped: '):])
+                self.warnings.append(f"{test_case['name']}: not benchmarked, {reason}")
+                return True, f"skipped: {reason}"
+            if line.startswith('Samples:'):
+                samples = [float(value) for value in line[len('Samples:'):].split()]
+            elif line.startswith('Warmup:'):
+                runs['warmup_runs'] = int(line.split(':', 1)[1])
+            elif line.startswith('Runs:'):
+                runs['runs'] = int(line.split(':', 1)[1])
+            elif line.startswith('Allocation:'):
+                values = [float(value) for value in line[len('Allocation:'):].split()]
+                runs['allocation'] = {metric: value for (metric, _, _), value in zip(ALLOCATION_METRICS, values)}
+        
+        perf_data = summarize(samples)
+        if perf_data is None:
+            return True, "no timings recorded"
+        perf_data.update(runs)
+        return True, perf_data
+    
+    def _run_profile_case(self, test_case, profile, hook, interval, seconds):
+        """Sample one handler case's stacks into profile; return (success, events or error)."""
+        lua_code = f'''
+local print = standin and standin.report or print
+
+{self._case_setup(test_case)}
+
+local stacks, events, outside
+local success, err = pcall(function()
+    -- One warm batch first, so one-off work (first map entries, caches) is not profiled
+    for event = next_event, next_event + {HANDLER_CALLS} - 1 do
+        prepare(event)
+        fire(event)
+    end
+    next_event = next_event + {HANDLER_CALLS}
+    stacks, events, outside = profiler.run(prepare, fire, next_event, {seconds}, "{'l' if hook == 'line' else ''}", {interval})
+end)
+-- A handler that failed under the hook leaves it installed
+debug.sethook()
+if success then
+    print("PASS")
+    print("Events: " .. events)
+    print("Outside: " .. outside)
+    for stack, count in pairs(stacks) do print("Stack: " .. count .. " " .. stack) end
+elseif type(err) == "table" and err.skipped then
+    print("PASS")
+    print("Skipped: " .. err.skipped)
+else
+    print("FAIL: " .. tostring(err))
+end
+'''
+        success, output = self.execute(test_case, lua_code)
+        if not success:
+            return False, output
+        events = 0
+        for line in output:
+            if line.startswith('Skipped: '):
+                return True, f"skipped: {line[len('Skipped: '):]}"
+            if line.startswith('Stack: '):
+                count, stack = line[len('Stack: '):].split(' ', 1)
+                profile.add(test_case['name'], int(count), stack)
+            elif line.startswith('Events: '):
+                events = int(line.split(':', 1)[1])
+            elif line.startswith('Outside: '):
+                profile.outside += int(line.split(':', 1)[1])
+        profile.events[test_case['name']] = events
+        return True, events
+    
+    def run_profile(self, folded_file=DEFAULT_FOLDED_FILE, top=DEFAULT_TOP, hook='count', interval=DEFAULT_INTERVAL,
+                    seconds=DEFAULT_PROFILE_TIME):
+        """Replay each handler case's events under the stack sampler.
+
+        hook is 'count' (a sample every interval VM instructions, so
+        samples follow where time goes) or 'line' (every line executed
+        counts). Writes the folded stacks to folded_file and prints the
+        hottest package lines.
+        """
+        print("Profiling package handlers...")
+        
+        if not self.lua_path:
+            print("lua interpreter not found. Please install Lua.")
+            return False
+        if not self.handlers:
+            print("Profiling replays the handler benchmarks; create the tester with handlers=True")
+            return False
+        
+        self._get_handler_prelude()
+        profile = StackProfile(self._handler_scripts, self.xml_file, {'performance.handlers': 'Mudlet stand-in'})
+        failed = 0
+        for test_case in self.selected_cases():
+            success, result = self._run_profile_case(test_case, profile, hook, interval, seconds)
+            if success and isinstance(result, str):
+                print(f"  - {test_case['name']}: {result}")
+            elif success:
+                samples = sum(count for stack, count in profile.stacks.items()
+                              if stack.split(';', 1)[0] == test_case['name'])
+                print(f"  ✓ {test_case['name']}: {result} events, {samples} samples")
             else:
-                return False, result.stderr.strip()
-                
-        except subprocess.TimeoutExpired:
-            return False, "Timeout"
-        except Exception as e:
-            return False, str(e)
-        finally:
-            # Clean up
-            try:
-                os.unlink(lua_file_path)
-            except:
-                pass
+                failed += 1
+                print(f"  ✗ {test_case['name']}: {result}")
+        self.close_pool()
+        
+        self.profile = profile
+        try:
+            profile.write_folded(folded_file)
+            print(f"\nFolded stacks saved to: {folded_file} (render with flamegraph.pl, inferno or speedscope)")
+        except OSError as e:
+            print(f"\nWarning: could not write {folded_file}: {e}")
+        print("")
+        for line in profile.format_hot_lines(top):
+            print(line)
+        
+        if self.warnings:
+            print("\nPerformance warnings:")
+            for warning in self.warnings:
+                print(f"  {warning}")
+        return failed == 0
+    
+    def selected_cases(self):
+        """Return the benchmarks to run, limited to self.cases when set."""
+        test_cases = self._create_test_cases()
+        if self.cases is None:
+            return test_cases
+        return [test_case for test_case in test_cases if test_case['name'] in self.cases]
+    
+    def list_cases(self):
+        """Return the names of the benchmarks, in the order run_benchmarks runs them."""
+        return [test_case['name'] for test_case in self.selected_cases()]
+    
+    def get_case(self, test_name):
+        """Return the definition of one benchmark by name."""
+        for test_case in self._create_test_cases():
+            if test_case['name'] == test_name:
+                return test_case
+        raise KeyError(f"Unknown performance test case: {test_name}")
+    
+    def run_case(self, test_name):
+        """Run one benchmark by name; see run_test_case."""
+        return self.run_test_case(self.get_case(test_name))
+    
+    def _record_case(self, entry):
+        self.test_results.append(entry)
+        if self.on_case is not None:
+            self.on_case(entry)
+    
+    def run_test_case(self, test_case):
+        """Run one benchmark, record its stats and return pass/fail/skip counts and output lines.
+
+        A case that calls performance.skip is skipped: neither passed nor
+        failed, and it has no benchmark results.
+        """
+        test_name = test_case['name']
+        description = test_case['description']
+        
+        start = time.perf_counter()
+        success, result = self._run_performance_test(test_case)
+        duration = time.perf_counter() - start
+        over = self._check_allocation(test_name, result) if success and isinstance(result, dict) else []
+        skipped = success and isinstance(result, str) and result.startswith('skipped: ')
+        if skipped:
+            self.skipped[test_name] = result[len('skipped: '):]
+        self._record_case({
+            'name': test_name,
+            'success': success and not over,
+            'skipped': skipped,
+            'duration': duration,
+            'message': self.skipped[test_name] if skipped else '; '.join(over) if success else str(result)
+        })
+        
+        if skipped:
+            return {'passed': 0, 'failed': 0, 'skipped': 1,
+                    'lines': [f"  - {test_name}: {description} - skipped, {self.skipped[test_name]}"]}
+        if not success:
+            return {'passed': 0, 'failed': 1, 'lines': [f"  ✗ {test_name}: {description} - {result}"]}
+        
+        if over:
+            lines = [f"  ✗ {test_name}: {description} - {'; '.join(over)}"]
+        else:
+            lines = [f"  ✓ {test_name}: {description}"]
+        # Display performance data
+        if isinstance(result, dict):
+            self.benchmark_results[test_name] = result
+            self._check_threshold(test_name, result)
+            lines.extend(f"    {line}" for line in format_summary(result))
+            lines[-1] += f" from {result['runs']} runs after {result['warmup_runs']} warmup runs"
+            if 'allocation' in result:
+                lines.append("    Allocation: " + ", ".join(
+                    f"{template.format(result['allocation'][metric])} {label}"
+                    for metric, label, template in ALLOCATION_METRICS))
+        else:
+            lines.append(f"    {result}")
+        if over:
+            return {'passed': 0, 'failed': 1, 'lines': lines}
+        return {'passed': 1, 'failed': 0, 'lines': lines}
     
     def run_benchmarks(self):
         """Run all performance benchmarks."""
@@ -525,41 +1377,41 @@ end
             return False
         
         # Run benchmark tests
-        test_cases = self._create_performance_test_cases()
+        test_cases = self.selected_cases()
         
         total_tests = len(test_cases)
         passed_tests = 0
         failed_tests = 0
+        skipped_tests = 0
         
         print(f"Running {total_tests} performance benchmarks...")
         
         for test_case in test_cases:
-            test_name = test_case['name']
-            description = test_case['description']
-            
-            success, result = self._run_performance_test(test_case)
-            
-            if success:
-                passed_tests += 1
-                print(f"  ✓ {test_name}: {description}")
-                
-                # Display performance data
-                if isinstance(result, dict):
-                    self.benchmark_results[test_name] = result
-                    for key, value in result.items():
-                        print(f"    {key}: {value}")
-            else:
-                failed_tests += 1
-                print(f"  ✗ {test_name}: {description} - {result}")
+            outcome = self.run_test_case(test_case)
+            for line in outcome['lines']:
+                print(line)
+            passed_tests += outcome['passed']
+            failed_tests += outcome['failed']
+            skipped_tests += outcome.get('skipped', 0)
+        
+        self.close_pool()
+        
+        # Handler benchmarks weighted by how often their entry points run in a session
+        hot_path_lines = self.rank_hot_paths(test_cases)
+        if hot_path_lines:
+            print("")
+            for line in hot_path_lines:
+                print(line)
         
         # Summary
         print(f"\nPerformance benchmark results:")
         print(f"  Tests run: {total_tests}")
         print(f"  Passed: {passed_tests}")
         print(f"  Failed: {failed_tests}")
-        
-        # Performance warnings
-        self._analyze_performance_results()
+        if skipped_tests:
+            print(f"  Skipped: {skipped_tests} (not benchmarked: {', '.join(self.skipped)})")
+        if self.untimed:
+            print(f"  Not timed, run once per session: {', '.join(self.untimed)}")
         
         # Display errors
         if self.errors:
@@ -574,31 +1426,93 @@ end
         
         return failed_tests == 0
     
-    def _analyze_performance_results(self):
-        """Analyze performance results for warnings."""
-        # Define performance thresholds (in milliseconds)
-        thresholds = {
-            'string_operations': 10.0,
-            'table_operations': 20.0,
-            'room_creation': 50.0,
-            'affect_processing': 15.0,
-            'group_processing': 10.0,
-            'font_calculation': 25.0,
-            'regex_matching': 30.0
-        }
-        
-        for test_name, result in self.benchmark_results.items():
-            if 'Average' in result:
-                avg_time = float(result['Average'].replace('ms', ''))
-                threshold = thresholds.get(test_name, 50.0)
-                
-                if avg_time > threshold:
-                    self.warnings.append(f"{test_name}: Average time {avg_time:.2f}ms exceeds threshold {threshold}ms")
+    def rank_hot_paths(self, test_cases=None):
+        """Rank self.benchmark_results by time per hour of play into self.hot_paths.
+
+        test_cases default to the selected ones; only those with a session
+        frequency (the handler cases) are ranked. Returns the report's
+        display lines, none when no case has a frequency.
+        """
+        if test_cases is None:
+            test_cases = self.selected_cases()
+        frequencies = {test_case['name']: test_case['frequency'] for test_case in test_cases
+                       if test_case.get('frequency')}
+        if not frequencies:
+            return []
+        self.hot_paths = weighted_costs(self.benchmark_results, frequencies)
+        return format_weighted_costs(self.hot_paths, HOT_PATHS_SHOWN)
+    
+    @property
+    def mode(self):
+        """Which benchmarks run: 'handlers' or 'synthetic'; baselines only compare within a mode."""
+        return 'handlers' if self.handlers else 'synthetic'
+    
+    def rerun_benchmarks(self, runs):
+        """Run the selected benchmarks `runs` more times; return each run's summaries (name -> summary).
+
+        The extra runs only measure the run-to-run spread of a baseline:
+        they are not recorded in test_results and add no warnings.
+        """
+        warnings = list(self.warnings)
+        benchmark_runs = []
+        for _ in range(runs):
+            results = {}
+            for test_case in self.selected_cases():
+                success, result = self._run_performance_test(test_case)
+                if success and isinstance(result, dict):
+                    results[test_case['name']] = result
+            benchmark_runs.append(results)
+        self.close_pool()
+        self.warnings = warnings
+        return benchmark_runs
+    
+    def save_baseline(self, baseline_file, runs=DEFAULT_BASELINE_RUNS):
+        """Save the last run, plus runs - 1 more for the run-to-run noise, as a baseline."""
+        if not self.benchmark_results:
+            print("No benchmark results to save as a baseline")
+            return False
+        if runs > 1:
+            print(f"Running the benchmarks {runs - 1} more times for the baseline's noise band...")
+        benchmark_runs = [self.benchmark_results] + self.rerun_benchmarks(runs - 1)
+        BenchmarkBaseline(baseline_file).save(benchmark_runs, self.mode)
+        print(f"Benchmark baseline saved to: {baseline_file} ({len(self.benchmark_results)} benchmarks, {runs} runs)")
+        return True
+    
+    def _check_threshold(self, test_name, result):
+        """Warn when a benchmark's median is above its threshold beyond the noise.
+
+        A median whose confidence interval still reaches down to the
+        threshold could be a noisy run, so only an interval lying wholly
+        above it counts.
+        """
+        threshold = self.thresholds.get(test_name, 50.0)
+        low, high = result['median_ci']
+        if low > threshold:
+            self.warnings.append(f"{test_name}: median {result['median']:.3f}ms ({result['confidence']:.0%} CI "
+                                 f"{low:.3f}-{high:.3f}ms) exceeds threshold {threshold}ms")
+    
+    def _check_allocation(self, test_name, result):
+        """Return a message for each allocation metric of a benchmark above its threshold."""
+        allocation = result.get('allocation')
+        if allocation is None:
+            return []
+        over = []
+        for metric, label, template in ALLOCATION_METRICS:
+            limit = self.allocation_thresholds.get(test_name, {}).get(metric)
+            if limit is not None and allocation[metric] > limit:
+                over.append(f"{template.format(allocation[metric])} {label} exceeds the threshold of {limit:g}")
+        return over
     
     def get_results(self):
         """Get benchmark results for integration."""
         return {
+            'mode': self.mode,
             'benchmark_results': self.benchmark_results,
+            'test_results': self.test_results,
+            'skipped': self.skipped,
+            'aborted': self.aborted,
+            'untimed': self.untimed,
+            'hot_paths': self.hot_paths,
             'errors': self.errors,
             'warnings': self.warnings
         }
@@ -609,13 +1523,67 @@ def main():
     
     parser = argparse.ArgumentParser(description='Run performance benchmarks for LuminariGUI')
     parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to benchmark')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--stream', action='store_true', help='Stream scripts from the XML instead of building the full index (bounded memory)')
+    parser.add_argument('--iterations', type=int, default=MIN_RUNS,
+                        help='Minimum measured runs of each benchmark body (default: %(default)s)')
+    parser.add_argument('--warmup', type=float, default=DEFAULT_WARMUP_TIME,
+                        help='Seconds to warm up each benchmark before measuring (default: %(default)s)')
+    parser.add_argument('--target-time', type=float, default=DEFAULT_TARGET_TIME,
+                        help='Seconds of measured runs each benchmark is calibrated to (default: %(default)s)')
+    parser.add_argument('--handlers', action='store_true',
+                        help="Benchmark the package's real handlers in the Mudlet stand-in instead of the synthetic loops")
+    parser.add_argument('--save-baseline', metavar='FILE', help='Save the benchmark medians and confidence intervals as a baseline')
+    parser.add_argument('--baseline-runs', type=int, default=DEFAULT_BASELINE_RUNS,
+                        help='Runs --save-baseline measures the run-to-run noise from (default: %(default)s)')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='Compare with a baseline; fail when a median regressed beyond --max-regression and the noise')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                        help='Slowdown of a median, in percent, that fails --compare (default: %(default)s)')
+    parser.add_argument('--diff', default=DEFAULT_DIFF_FILE, help='Where --compare writes its diff document (default: %(default)s)')
+    parser.add_argument('--matrix', action='store_true',
+                        help='Run the benchmarks on every Lua interpreter found (5.1-5.4, LuaJIT) and compare them')
+    parser.add_argument('--profile', action='store_true',
+                        help='Sample the Lua stacks of the handler benchmarks instead of timing them (implies --handlers)')
+    parser.add_argument('--profile-out', default=DEFAULT_FOLDED_FILE,
+                        help='Where --profile writes the folded stacks (default: %(default)s)')
+    parser.add_argument('--profile-hook', choices=['count', 'line'], default='count',
+                        help='Sample every --profile-interval VM instructions or on every line (default: %(default)s)')
+    parser.add_argument('--profile-interval', type=int, default=DEFAULT_INTERVAL,
+                        help='VM instructions between samples in count mode (default: %(default)s)')
+    parser.add_argument('--profile-time', type=float, default=DEFAULT_PROFILE_TIME,
+                        help='Seconds each handler case is profiled for (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Hot lines listed by --profile (default: %(default)s)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode')
     parser.add_argument('--json', action='store_true', help='Output results in JSON format')
     
     args = parser.parse_args()
     
-    tester = PerformanceTester(args.xml)
+    tester = PerformanceTester(args.xml, use_cache=not args.no_cache, streaming=args.stream,
+                               iterations=args.iterations, handlers=args.handlers or args.profile,
+                               warmup_time=args.warmup, target_time=args.target_time)
+    
+    def run():
+        if args.matrix:
+            from benchmark_matrix import BenchmarkMatrix, run_matrix
+            matrix = BenchmarkMatrix(args.xml, handlers=args.handlers, use_cache=not args.no_cache,
+                                     iterations=args.iterations, warmup_time=args.warmup, target_time=args.target_time)
+            return run_matrix(matrix)
+        if args.profile:
+            return tester.run_profile(args.profile_out, args.top, args.profile_hook, args.profile_interval,
+                                      args.profile_time)
+        success = tester.run_benchmarks()
+        if args.compare:
+            print("")
+            success = compare_with_baseline(tester.benchmark_results, tester.mode, args.compare,
+                                            args.max_regression, args.diff, skipped=tester.skipped) and success
+        if args.save_baseline:
+            if success:
+                success = tester.save_baseline(args.save_baseline, max(1, args.baseline_runs))
+            else:
+                print(f"Not saving the baseline to {args.save_baseline}: the run failed")
+        return success
     
     if args.quiet:
         # Suppress print statements
@@ -624,9 +1592,9 @@ def main():
         
         f = io.StringIO()
         with contextlib.redirect_stdout(f):
-            success = tester.run_benchmarks()
+            success = run()
     else:
-        success = tester.run_benchmarks()
+        success = run()
     
     if args.json:
         results = tester.get_results()
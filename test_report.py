@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Streaming Test Reports for LuminariGUI
+Writes one JSON line per finished test case as soon as it completes and a
+JUnit XML file with per-case times, holding only per-suite counters in memory.
+"""
+
+import os
+import re
+import json
+import shutil
+import tempfile
+from xml.sax.saxutils import escape, quoteattr
+
+# Longest failure message kept per case
+EXCERPT_CHARS = 2000
+
+# Control characters XML 1.0 does not allow, even escaped
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def excerpt(message):
+    """Trim a failure message to EXCERPT_CHARS, keeping its start."""
+    message = (message or '').strip()
+    if len(message) > EXCERPT_CHARS:
+        return message[:EXCERPT_CHARS] + f"... ({len(message) - EXCERPT_CHARS} more characters)"
+    return message
+
+
+def xml_text(text):
+    """Replace the characters XML 1.0 does not allow with U+FFFD."""
+    return INVALID_XML_CHARS.sub('\ufffd', text)
+
+
+def case_status(entry):
+    """Return 'skipped', 'passed' or 'failed' for a case entry."""
+    if entry.get('skipped'):
+        return 'skipped'
+    return 'passed' if entry['success'] else 'failed'
+
+
+class CaseReporter:
+    def __init__(self, jsonl_file=None, junit_file=None):
+        self.jsonl_file = jsonl_file
+        self.junit_file = junit_file
+        self._jsonl = None
+        self._spool_dir = None
+        # suite -> [spool file, tests, failures, time, skipped], in first-seen order
+        self._suites = {}
+        if jsonl_file:
+            self._jsonl = open(jsonl_file, 'w', encoding='utf-8')
+        if junit_file:
+            self._spool_dir = tempfile.TemporaryDirectory(prefix='luminari-junit-')
+
+    def case(self, suite, entry):
+        """Record one finished case: an entry with name, success, optional skipped, duration and message."""
+        duration = entry.get('duration') or 0.0
+        message = excerpt(entry.get('message', ''))
+        status = case_status(entry)
+
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps({
+                'suite': suite,
+                'case': entry['name'],
+                'status': status,
+                'duration': round(duration, 6),
+                'stderr': message
+            }) + '\n')
+            self._jsonl.flush()
+
+        if self._spool_dir is not None:
+            if suite not in self._suites:
+                path = os.path.join(self._spool_dir.name, f"{len(self._suites)}.xml")
+                self._suites[suite] = [open(path, 'w+', encoding='utf-8'), 0, 0, 0.0, 0]
+            record = self._suites[suite]
+            spool = record[0]
+            spool.write(f'    <testcase classname={quoteattr(xml_text(suite))} name={quoteattr(xml_text(entry["name"]))} '
+                        f'time="{duration:.6f}"')
+            if status == 'skipped':
+                spool.write(f'>\n      <skipped message={quoteattr(xml_text(message or "skipped"))}/>\n    </testcase>\n')
+                record[4] += 1
+            elif status == 'passed':
+                spool.write('/>\n')
+            else:
+                first_line = message.splitlines()[0] if message else 'failed'
+                spool.write(f'>\n      <failure message={quoteattr(xml_text(first_line))}>{escape(xml_text(message))}</failure>\n'
+                            f'    </testcase>\n')
+                record[2] += 1
+            record[1] += 1
+            record[3] += duration
+
+    def close(self):
+        """Finish both reports; the JUnit file is assembled from the per-suite spools."""
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+        if self._spool_dir is None:
+            return
+        tests = sum(record[1] for record in self._suites.values())
+        failures = sum(record[2] for record in self._suites.values())
+        total_time = sum(record[3] for record in self._suites.values())
+        skipped = sum(record[4] for record in self._suites.values())
+        with open(self.junit_file, 'w', encoding='utf-8') as out:
+            out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            out.write(f'<testsuites name="LuminariGUI" tests="{tests}" failures="{failures}" '
+                      f'skipped="{skipped}" time="{total_time:.6f}">\n')
+            for suite, (spool, suite_tests, suite_failures, suite_time, suite_skipped) in self._suites.items():
+                out.write(f'  <testsuite name={quoteattr(xml_text(suite))} tests="{suite_tests}" '
+                          f'failures="{suite_failures}" errors="0" skipped="{suite_skipped}" '
+                          f'time="{suite_time:.6f}">\n')
+                spool.seek(0)
+                shutil.copyfileobj(spool, out)
+                spool.close()
+                out.write('  </testsuite>\n')
+            out.write('</testsuites>\n')
+        self._suites = {}
+        self._spool_dir.cleanup()
+        self._spool_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """Main entry point for command-line usage."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summarize a per-case JSON lines log from run_tests.py')
+    parser.add_argument('log', help='Case log written by run_tests.py --case-log')
+    parser.add_argument('--junit', help='Also convert the log to a JUnit XML file')
+    parser.add_argument('--slowest', type=int, default=10, help='Number of slowest cases to list (default: %(default)s)')
+
+    args = parser.parse_args()
+
+    slowest = []
+    passed = failed = skipped = 0
+    reporter = CaseReporter(junit_file=args.junit)
+    with open(args.log, encoding='utf-8') as f, reporter:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            status = record['status']
+            passed += status == 'passed'
+            failed += status == 'failed'
+            skipped += status == 'skipped'
+            reporter.case(record['suite'], {'name': record['case'], 'success': status != 'failed',
+                                            'skipped': status == 'skipped', 'duration': record['duration'], 'message': record.get('stderr', '')})
+            # Only the current top N are kept, so any log size fits in memory
+            slowest.append((record['duration'], f"{record['suite']}::{record['case']}"))
+            slowest = sorted(slowest, reverse=True)[:args.slowest]
+
+    print(f"{passed + failed + skipped} cases: {passed} passed, {failed} failed, {skipped} skipped")
+    if slowest:
+        print(f"\nSlowest {len(slowest)}:")
+        for duration, name in slowest:
+            print(f"  {duration * 1000:9.1f} ms  {name}")
+    if args.junit:
+        print(f"\nJUnit report saved to: {args.junit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,28 @@ Tests for memory leaks, error boundaries, and resource management.
 
 import os
 import sys
-import tempfile
-import subprocess
-import xml.etree.ElementTree as ET
 import json
 import re
 import time
 from pathlib import Path
 
+from package_model import load_package_model, stream_package_scripts
+from lua_worker import LuaWorkerPool
+
 class SystemTester:
-    def __init__(self, xml_file="LuminariGUI.xml"):
+    def __init__(self, xml_file="LuminariGUI.xml", model=None, use_cache=True, streaming=False, pool=None,
+                 timeout=20, cases=None, on_case=None):
         self.xml_file = xml_file
+        self.pool = pool
+        # Names of the only cases to run, or None for all of them
+        self.cases = None if cases is None else set(cases)
+        # Called with each case's test_results entry as soon as it finishes
+        self.on_case = on_case
+        self.timeout = timeout
+        self._owns_pool = False
+        self.model = model
+        self.use_cache = use_cache
+        self.streaming = streaming
         self.lua_path = self._find_lua()
         self.test_results = []
         self.errors = []
@@ -31,40 +42,29 @@ class SystemTester:
                     return full_path
         return None
     
+    def get_model(self):
+        """Return the shared package model, parsing the XML on first use."""
+        if self.model is None:
+            self.model = load_package_model(self.xml_file, self.errors, self.use_cache)
+        return self.model
+    
+    def _iter_scripts(self):
+        """Yield script records from the shared model, or stream them from the XML."""
+        if self.streaming and self.model is None:
+            return stream_package_scripts(self.xml_file, self.errors)
+        model = self.get_model()
+        return iter(model.scripts) if model is not None else iter(())
+    
     def _extract_resource_usage(self):
         """Extract timer and handler usage patterns from XML."""
-        if not os.path.exists(self.xml_file):
-            self.errors.append(f"XML file not found: {self.xml_file}")
-            return {}
-        
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            self.errors.append(f"XML parsing error: {e}")
-            return {}
-        
         resource_usage = {
             'timers': {'created': [], 'killed': []},
             'handlers': {'registered': [], 'killed': []},
             'potential_leaks': []
         }
         
-        # Create a parent map for ElementTree compatibility
-        parent_map = {c: p for p in root.iter() for c in p}
-        
-        # Find all script elements
-        for script_elem in root.iter('script'):
-            script_text = script_elem.text
-            if script_text and script_text.strip():
-                parent = parent_map.get(script_elem)
-                if parent is not None:
-                    name_elem = parent.find('name')
-                    script_name = name_elem.text if name_elem is not None else "unnamed"
-                else:
-                    script_name = "unnamed"
-                
-                self._analyze_resource_usage(script_text, script_name, resource_usage)
+        for script in self._iter_scripts():
+            self._analyze_resource_usage(script['content'], script['name'], resource_usage)
         
         return resource_usage
     
@@ -352,16 +352,28 @@ map = {room_info = {}}
             }
         ]
     
+    def _get_pool(self):
+        """Return the Lua worker pool, starting a private one if none was shared."""
+        if self.pool is None:
+            self.pool = LuaWorkerPool(self.lua_path)
+            self._owns_pool = True
+        return self.pool
+    
+    def close_pool(self):
+        """Stop a private worker pool once the run is over."""
+        if self._owns_pool:
+            self.pool.close()
+            self.pool = None
+            self._owns_pool = False
+    
     def _run_system_test(self, test_case):
         """Run a single system test case."""
         if not self.lua_path:
             self.errors.append("lua interpreter not found in PATH")
             return False
         
-        # Create test Lua code
+        # Create test Lua code; the mocks are a prelude compiled once per worker
         lua_code = f'''
-{self._create_system_mocks()}
-
 -- Test execution
 local function run_test()
 {test_case['test']}
@@ -376,40 +388,71 @@ else
 end
 '''
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.lua', delete=False) as lua_file:
-            lua_file.write(lua_code)
-            lua_file_path = lua_file.name
-        
+        pool = self._get_pool()
+        pool.add_prelude('system.mocks', self._create_system_mocks())
         try:
-            # Run lua interpreter
-            result = subprocess.run(
-                [self.lua_path, lua_file_path],
-                capture_output=True,
-                text=True,
-                timeout=20
-            )
-            
-            if result.returncode == 0:
-                output = result.stdout.strip()
-                lines = output.split('\n')
-                test_result = lines[-1]  # Last line should be PASS/FAIL
-                additional_output = '\n'.join(lines[:-1]) if len(lines) > 1 else ""
-                
-                return test_result == "PASS", additional_output
-            else:
-                return False, result.stderr.strip()
-                
-        except subprocess.TimeoutExpired:
-            return False, "Timeout"
+            result = pool.run(lua_code, prelude='system.mocks', name=test_case['name'], timeout=self.timeout)
         except Exception as e:
             return False, str(e)
-        finally:
-            # Clean up
-            try:
-                os.unlink(lua_file_path)
-            except:
-                pass
+        
+        if result['timed_out']:
+            return False, "Timeout"
+        if result['returncode'] == 0:
+            output = result['stdout'].strip()
+            lines = output.split('\n')
+            test_result = lines[-1]  # Last line should be PASS/FAIL
+            additional_output = '\n'.join(lines[:-1]) if len(lines) > 1 else ""
+            
+            return test_result == "PASS", additional_output
+        return False, result['stderr'].strip()
+    
+    def selected_cases(self):
+        """Return the test cases to run, limited to self.cases when set."""
+        test_cases = self._create_system_test_cases()
+        if self.cases is None:
+            return test_cases
+        return [test_case for test_case in test_cases if test_case['name'] in self.cases]
+    
+    def list_cases(self):
+        """Return the names of the test cases, in the order run_tests runs them."""
+        return [test_case['name'] for test_case in self.selected_cases()]
+    
+    def get_case(self, test_name):
+        """Return the definition of one test case by name."""
+        for test_case in self._create_system_test_cases():
+            if test_case['name'] == test_name:
+                return test_case
+        raise KeyError(f"Unknown system test case: {test_name}")
+    
+    def run_case(self, test_name):
+        """Run one test case by name; see run_test_case."""
+        return self.run_test_case(self.get_case(test_name))
+    
+    def _record_case(self, entry):
+        self.test_results.append(entry)
+        if self.on_case is not None:
+            self.on_case(entry)
+    
+    def run_test_case(self, test_case):
+        """Run one system test case and return its pass/fail counts and output lines."""
+        test_name = test_case['name']
+        description = test_case['description']
+        
+        start = time.perf_counter()
+        success, output = self._run_system_test(test_case)
+        self._record_case({
+            'name': test_name,
+            'success': success,
+            'duration': time.perf_counter() - start,
+            'message': '' if success else str(output)
+        })
+        
+        if success:
+            lines = [f"  ✓ {test_name}: {description}"]
+            if output:
+                lines.append(f"    {output}")
+            return {'passed': 1, 'failed': 0, 'lines': lines}
+        return {'passed': 0, 'failed': 1, 'lines': [f"  ✗ {test_name}: {description} - {output}"]}
     
     def run_tests(self):
         """Run all system tests."""
@@ -433,7 +476,7 @@ end
             print("No obvious resource leaks detected in static analysis")
         
         # Run system tests
-        test_cases = self._create_system_test_cases()
+        test_cases = self.selected_cases()
         
         total_tests = len(test_cases)
         passed_tests = 0
@@ -442,19 +485,13 @@ end
         print(f"\nRunning {total_tests} system tests...")
         
         for test_case in test_cases:
-            test_name = test_case['name']
-            description = test_case['description']
-            
-            success, output = self._run_system_test(test_case)
-            
-            if success:
-                passed_tests += 1
-                print(f"  ✓ {test_name}: {description}")
-                if output:
-                    print(f"    {output}")
-            else:
-                failed_tests += 1
-                print(f"  ✗ {test_name}: {description} - {output}")
+            outcome = self.run_test_case(test_case)
+            for line in outcome['lines']:
+                print(line)
+            passed_tests += outcome['passed']
+            failed_tests += outcome['failed']
+        
+        self.close_pool()
         
         # Summary
         print(f"\nSystem test results:")
@@ -485,12 +522,14 @@ def main():
     
     parser = argparse.ArgumentParser(description='Run system tests for LuminariGUI')
     parser.add_argument('--xml', default='LuminariGUI.xml', help='XML file to test')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--stream', action='store_true', help='Stream scripts from the XML instead of building the full index (bounded memory)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode')
     
     args = parser.parse_args()
     
-    tester = SystemTester(args.xml)
+    tester = SystemTester(args.xml, use_cache=not args.no_cache, streaming=args.stream)
     
     if args.quiet:
         # Suppress print statements
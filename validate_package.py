@@ -9,6 +9,10 @@ import xml.etree.ElementTree as ET
 import sys
 import os
 
+from package_model import PackageModel, default_package_cache
+from package_issues import IssueScanner, format_issue
+from package_watch import PackageWatcher, print_change, DEFAULT_POLL_INTERVAL
+
 # Try to import Lua syntax tester
 try:
     from test_lua_syntax import LuaSyntaxTester
@@ -16,70 +20,50 @@ try:
 except ImportError:
     SYNTAX_TESTING_AVAILABLE = False
 
-def validate_package(filename, include_lua_syntax=True):
-    """Validate Mudlet package for XML structure and embedded Lua syntax."""
+def validate_package(filename, include_lua_syntax=True, model=None, use_cache=True):
+    """Validate Mudlet package for XML structure and embedded Lua syntax.
+
+    An already loaded PackageModel can be passed in to avoid re-parsing;
+    otherwise the cached script index is used when the XML is unchanged.
+    """
     try:
         # Check if file exists
         if not os.path.exists(filename):
             print(f"Error: File '{filename}' not found.")
             return False
             
-        # Parse the XML file
+        # Parse the XML file once; the model is shared with the syntax tester
         print(f"Validating {filename}...")
-        tree = ET.parse(filename)
-        root = tree.getroot()
+        if model is None:
+            cache = default_package_cache() if use_cache else None
+            model = PackageModel(filename, cache=cache).load()
         
         # Check root element
-        if root.tag != 'MudletPackage':
-            print(f"Error: Root element should be 'MudletPackage', found '{root.tag}'")
+        if model.root_tag != 'MudletPackage':
+            print(f"Error: Root element should be 'MudletPackage', found '{model.root_tag}'")
             return False
             
         # Check version attribute
-        version = root.get('version')
+        version = model.version
         if not version:
             print("Warning: No version attribute found in MudletPackage")
         else:
             print(f"✓ MudletPackage version: {version}")
             
-        # Count main components
-        components = {
-            'TriggerPackage': 0,
-            'AliasPackage': 0,
-            'ScriptPackage': 0,
-            'TimerPackage': 0,
-            'KeyPackage': 0,
-            'ActionPackage': 0
-        }
-        
-        for child in root:
-            if child.tag in components:
-                components[child.tag] += 1
-                
         # Report component counts
         print("\nPackage Components:")
-        for comp_type, count in components.items():
+        for comp_type, count in model.components.items():
             if count > 0:
                 print(f"  ✓ {comp_type}: {count}")
                 
         # Validate script content for common issues
         print("\nChecking for common issues...")
-        issues = []
-        
-        # Find all script elements
-        for script in root.iter('script'):
-            if script.text:
-                # Check for unescaped XML characters in scripts
-                if '<' in script.text and '&lt;' not in script.text:
-                    line_num = list(root.iter()).index(script) + 1
-                    issues.append(f"Line ~{line_num}: Possible unescaped '<' in script")
-                if '>' in script.text and '&gt;' not in script.text and '-->' not in script.text:
-                    line_num = list(root.iter()).index(script) + 1
-                    issues.append(f"Line ~{line_num}: Possible unescaped '>' in script")
-                    
+        issues = IssueScanner(model).scan()
+
         if issues:
             print("Potential issues found:")
             for issue in issues:  # Show all issues
-                print(f"  ⚠ {issue}")
+                print(f"  ⚠ {format_issue(issue)}")
         else:
             print("  ✓ No common issues detected")
             
@@ -90,7 +74,7 @@ def validate_package(filename, include_lua_syntax=True):
         if include_lua_syntax and SYNTAX_TESTING_AVAILABLE:
             print("\nRunning Lua syntax validation...")
             try:
-                syntax_tester = LuaSyntaxTester(filename)
+                syntax_tester = LuaSyntaxTester(filename, model=model)
                 lua_syntax_passed = syntax_tester.run_tests()
                 
                 results = syntax_tester.get_results()
@@ -132,6 +116,19 @@ def validate_package(filename, include_lua_syntax=True):
         print(f"\n❌ Unexpected error: {e}")
         return False
 
+def watch_package(filename, include_lua_syntax=True, interval=DEFAULT_POLL_INTERVAL):
+    """Validate once, then re-validate only the scripts changed by each save."""
+    watcher = PackageWatcher(filename, interval=interval)
+    validate_package(filename, include_lua_syntax, model=watcher.snapshot())
+
+    def on_change(change):
+        print_change(change)
+        if change['model'] is not None and change['changed']:
+            subset = change['model'].subset(change['changed'])
+            validate_package(filename, include_lua_syntax, model=subset)
+
+    watcher.run(on_change)
+
 if __name__ == "__main__":
     import argparse
     
@@ -142,9 +139,17 @@ if __name__ == "__main__":
                         help='Skip Lua syntax validation')
     parser.add_argument('--quiet', '-q', action='store_true',
                         help='Quiet mode - minimal output')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-parse the XML instead of using the cached script index')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and re-validate the scripts changed by each save')
     
     args = parser.parse_args()
     
+    if args.watch:
+        watch_package(args.filename, include_lua_syntax=not args.no_lua_syntax)
+        sys.exit(0)
+    
     # Suppress output in quiet mode
     if args.quiet:
         import io
@@ -152,13 +157,15 @@ if __name__ == "__main__":
         
         f = io.StringIO()
         with contextlib.redirect_stdout(f):
-            success = validate_package(args.filename, include_lua_syntax=not args.no_lua_syntax)
+            success = validate_package(args.filename, include_lua_syntax=not args.no_lua_syntax,
+                                       use_cache=not args.no_cache)
         
         # Only show errors in quiet mode
         if not success:
             print(f"Validation failed for {args.filename}")
     else:
-        success = validate_package(args.filename, include_lua_syntax=not args.no_lua_syntax)
+        success = validate_package(args.filename, include_lua_syntax=not args.no_lua_syntax,
+                                   use_cache=not args.no_cache)
     
     # Exit with appropriate code
     sys.exit(0 if success else 1)
\ No newline at end of file